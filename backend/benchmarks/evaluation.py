@@ -0,0 +1,442 @@
+"""
+Evaluation: translation and summary quality against latency
+
+Replays recorded doctor-patient consultations (benchmarks/data/consultations.json)
+through TranslationService and AISummaryService under several configurations
+and reports, for each one, latency, upstream calls and output quality: BLEU
+and chrF of the translations against reference translations, and how much of
+the structured summary's sections and expected facts it covers.
+
+Azure Translator and Groq are replaced at the HTTP layer by stand-ins that
+serve recorded responses (benchmarks/data/recorded_responses.json) with
+simulated latency, so segmentation, caching, request coalescing and the
+upstream scheduler run as they do in production. Recordings of another
+provider or model can be compared by passing them with --responses.
+
+Configurations:
+    whole      every message sent to the translator in one request, no cache
+    segmented  long messages split into sentences translated in parallel, no cache
+    cached     segmented, with the translation cache
+
+Usage:
+    python -m benchmarks.evaluation [--configs whole segmented cached] [--passes 2] [--json results.json]
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import re
+import statistics
+import sys
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Dict, List, Tuple
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.ai_summary import AISummaryService
+from services.segmentation import TextSegmenter
+from services.translation import TranslationService
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+
+CONFIGS = {
+    "whole": {"segmented": False, "cached": False},
+    "segmented": {"segmented": True, "cached": False},
+    "cached": {"segmented": True, "cached": True},
+}
+
+SUMMARY_MODES = ("groq", "fallback")
+
+# Headings of the structured summary, keyed like the fallback's sections
+SUMMARY_SECTIONS = {
+    "symptoms": "CHIEF COMPLAINT & SYMPTOMS",
+    "history": "MEDICAL HISTORY",
+    "diagnosis": "DIAGNOSIS/ASSESSMENT",
+    "medications": "MEDICATIONS PRESCRIBED",
+    "treatment": "TREATMENT PLAN",
+    "follow_up": "FOLLOW-UP ACTIONS",
+    "concerns": "KEY CONCERNS/WARNINGS",
+}
+
+# Placeholders the prompt and the fallback summary use for empty sections
+EMPTY_SECTION = re.compile(r"^(none\b|no follow-up)", re.IGNORECASE)
+
+
+class RecordedUpstreams(httpx.AsyncBaseTransport):
+    """
+    Serve recorded Azure Translator and Groq responses with simulated latency
+    
+    A translation request is answered with the recording for its exact text,
+    or else sentence by sentence, so whole and segmented requests both work;
+    sentences without a recording are returned untranslated and counted as
+    misses. A summary request is matched to its consultation by the
+    consultation's first message.
+    """
+    
+    def __init__(self, recorded: Dict, conversations: List[Dict], args: argparse.Namespace):
+        self.translations = recorded.get("azure_translator", {})
+        self.summaries = recorded.get("groq", {})
+        self.first_messages = {conversation["messages"][0]["text"]: conversation["id"] for conversation in conversations}
+        self.sentences = TextSegmenter(min_split_chars=0)
+        self.args = args
+        self.reset()
+    
+    def reset(self):
+        self.calls = Counter()
+        self.chars_sent = 0
+        self.misses = 0
+    
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        if request.url.host == "api.groq.com":
+            return await self._summary(body)
+        return await self._translation(request, body)
+    
+    async def _translation(self, request: httpx.Request, body: List[Dict]) -> httpx.Response:
+        text = body[0]["text"]
+        source_lang = request.url.params["from"]
+        target_lang = request.url.params["to"]
+        self.calls["azure_translator"] += 1
+        self.chars_sent += len(text)
+        await asyncio.sleep((self.args.translator_rtt_ms + self.args.translator_ms_per_char * len(text)) / 1000)
+        translated = self._lookup(self.translations.get(f"{source_lang}:{target_lang}", {}), text)
+        return httpx.Response(200, json=[{"translations": [{"text": translated, "to": target_lang}]}])
+    
+    def _lookup(self, recorded: Dict[str, str], text: str) -> str:
+        if text in recorded:
+            return recorded[text]
+        sentences, separators = self.sentences.split(text)
+        translated = []
+        for sentence in sentences:
+            if sentence not in recorded:
+                self.misses += 1
+            translated.append(recorded.get(sentence, sentence))
+        return self.sentences.join(translated, separators)
+    
+    async def _summary(self, body: Dict) -> httpx.Response:
+        self.calls["groq"] += 1
+        prompt = body["messages"][-1]["content"]
+        conversation_id = next((conversation_id for first, conversation_id in self.first_messages.items() if first in prompt), None)
+        summary = self.summaries.get(conversation_id)
+        if summary is None:
+            self.misses += 1
+            return httpx.Response(404, json={"error": {"message": "no recorded summary"}})
+        # Generation time grows with the output, at ~4 characters per token
+        await asyncio.sleep((self.args.groq_rtt_ms + self.args.groq_ms_per_token * len(summary) / 4) / 1000)
+        return httpx.Response(200, json={"choices": [{"message": {"role": "assistant", "content": summary}}]})
+
+
+@contextmanager
+def replay(upstreams: RecordedUpstreams):
+    """Send the requests of every httpx.AsyncClient the services create to the stand-ins"""
+    original = httpx.AsyncClient
+    
+    class ReplayClient(original):
+        def __init__(self, *args, **kwargs):
+            kwargs["transport"] = upstreams
+            super().__init__(*args, **kwargs)
+    
+    httpx.AsyncClient = ReplayClient
+    try:
+        yield
+    finally:
+        httpx.AsyncClient = original
+
+
+def _tokenize(text: str) -> List[str]:
+    """Words and punctuation marks as separate tokens"""
+    return re.findall(r"\w+|[^\w\s]", text)
+
+
+def _ngrams(items, n: int) -> Counter:
+    return Counter(tuple(items[i:i + n]) for i in range(len(items) - n + 1))
+
+
+def corpus_bleu(hypotheses: List[str], references: List[str], max_order: int = 4) -> float:
+    """
+    Corpus-level BLEU (0-100) with sacreBLEU's default exponential smoothing
+    
+    Tokenization is simpler than sacreBLEU's, so scores follow it closely
+    but are not identical; compare them between runs of this harness.
+    """
+    correct = [0] * max_order
+    total = [0] * max_order
+    hypothesis_length = reference_length = 0
+    
+    for hypothesis, reference in zip(hypotheses, references):
+        hypothesis_tokens = _tokenize(hypothesis)
+        reference_tokens = _tokenize(reference)
+        hypothesis_length += len(hypothesis_tokens)
+        reference_length += len(reference_tokens)
+        for n in range(1, max_order + 1):
+            matches = _ngrams(hypothesis_tokens, n) & _ngrams(reference_tokens, n)
+            correct[n - 1] += sum(matches.values())
+            total[n - 1] += max(len(hypothesis_tokens) - n + 1, 0)
+    
+    if hypothesis_length == 0:
+        return 0.0
+    
+    log_precision = 0.0
+    smoothing = 1
+    for n in range(max_order):
+        if total[n] == 0:
+            return 0.0
+        if correct[n] == 0:
+            smoothing *= 2
+            precision = 1 / (smoothing * total[n])
+        else:
+            precision = correct[n] / total[n]
+        log_precision += math.log(precision) / max_order
+    
+    brevity_penalty = 1.0 if hypothesis_length > reference_length else math.exp(1 - reference_length / hypothesis_length)
+    return 100 * brevity_penalty * math.exp(log_precision)
+
+
+def corpus_chrf(hypotheses: List[str], references: List[str], max_order: int = 6, beta: float = 2.0) -> float:
+    """
+    Corpus-level chrF (0-100): character n-gram F-score, whitespace ignored
+    
+    Precision and recall are averaged over n-gram orders 1..max_order, and
+    recall weighs `beta` times as much as precision.
+    """
+    matches = [0] * max_order
+    hypothesis_total = [0] * max_order
+    reference_total = [0] * max_order
+    
+    for hypothesis, reference in zip(hypotheses, references):
+        hypothesis_chars = re.sub(r"\s+", "", hypothesis)
+        reference_chars = re.sub(r"\s+", "", reference)
+        for n in range(1, max_order + 1):
+            hypothesis_ngrams = _ngrams(hypothesis_chars, n)
+            reference_ngrams = _ngrams(reference_chars, n)
+            matches[n - 1] += sum((hypothesis_ngrams & reference_ngrams).values())
+            hypothesis_total[n - 1] += sum(hypothesis_ngrams.values())
+            reference_total[n - 1] += sum(reference_ngrams.values())
+    
+    precision = statistics.mean(m / t if t else 0.0 for m, t in zip(matches, hypothesis_total))
+    recall = statistics.mean(m / t if t else 0.0 for m, t in zip(matches, reference_total))
+    if precision + recall == 0:
+        return 0.0
+    return 100 * (1 + beta ** 2) * precision * recall / (beta ** 2 * precision + recall)
+
+
+def parse_summary(summary: str) -> Dict[str, List[str]]:
+    """Non-empty bullet points under each heading of a structured summary"""
+    sections: Dict[str, List[str]] = {}
+    current = None
+    for line in summary.splitlines():
+        stripped = line.strip()
+        if stripped.startswith("═"):
+            current = None
+            continue
+        # Headings may carry emoji or markdown; compare the capitalized text
+        title = re.sub(r"[^A-Z/&\- ]", "", stripped).strip()
+        heading = next((key for key, name in SUMMARY_SECTIONS.items() if title == name), None)
+        if heading:
+            current = heading
+            sections[current] = []
+            continue
+        item = stripped.lstrip("•-* ").strip()
+        if current and item and not EMPTY_SECTION.match(item):
+            sections[current].append(item)
+    return sections
+
+
+def score_summary(summary: str, expected: Dict[str, List[str]]) -> Dict[str, float]:
+    """
+    Score a structured summary against the facts expected in each section
+    
+    Returns:
+        headings: share of the summary's headings present
+        sections: share of sections with expected facts that have content
+        facts: share of expected facts found (case-insensitively) in their section
+    """
+    sections = parse_summary(summary)
+    expected_sections = [key for key, facts in expected.items() if facts]
+    found = 0
+    for key in expected_sections:
+        content = " ".join(sections.get(key, [])).lower()
+        found += sum(1 for fact in expected[key] if fact.lower() in content)
+    return {
+        "headings": len(sections) / len(SUMMARY_SECTIONS),
+        "sections": sum(1 for key in expected_sections if sections.get(key)) / len(expected_sections),
+        "facts": found / sum(len(expected[key]) for key in expected_sections)
+    }
+
+
+def percentile(values: List[float], p: int) -> float:
+    if len(values) < 2:
+        return values[0] if values else 0.0
+    return statistics.quantiles(values, n=100)[p - 1]
+
+
+def make_translation_service(segmented: bool, cached: bool) -> TranslationService:
+    os.environ.setdefault("AZURE_TRANSLATOR_KEY", "evaluation")
+    os.environ.setdefault("AZURE_TRANSLATOR_ENDPOINT", "https://api.cognitive.microsofttranslator.com")
+    os.environ.setdefault("AZURE_TRANSLATOR_REGION", "evaluation")
+    service = TranslationService()
+    if not segmented:
+        service.segmenter.min_split_chars = sys.maxsize
+    if not cached:
+        service.cache_size = 0
+    return service
+
+
+async def replay_conversation(service: TranslationService, conversation: Dict) -> Tuple[List[Dict], List[float]]:
+    """
+    Translate a consultation's messages one after another, as they were sent
+    
+    Returns:
+        (messages as stored in the database, translation latencies in ms)
+    """
+    messages = []
+    latencies = []
+    started_at = datetime(2024, 1, 1, 9, 0)
+    for i, message in enumerate(conversation["messages"]):
+        start = time.perf_counter()
+        translated = await service.translate(message["text"], message["language"], message["target_language"])
+        latencies.append((time.perf_counter() - start) * 1000)
+        messages.append({
+            "_id": f"{conversation['id']}:{i}",
+            "original_text": message["text"],
+            "translated_text": translated,
+            "role": message["role"],
+            "language": message["language"],
+            "target_language": message["target_language"],
+            "conversation_id": conversation["id"],
+            "timestamp": (started_at + timedelta(minutes=i)).isoformat()
+        })
+    return messages, latencies
+
+
+async def summarize(service: AISummaryService, messages: List[Dict]) -> Tuple[str, float]:
+    """Summary text and latency in ms"""
+    start = time.perf_counter()
+    summary = await service.generate_summary(messages)
+    return summary["summary"], (time.perf_counter() - start) * 1000
+
+
+async def evaluate(name: str, corpus: List[Dict], upstreams: RecordedUpstreams, passes: int) -> Dict:
+    """Replay the corpus under one configuration and score the output"""
+    translation = make_translation_service(**CONFIGS[name])
+    upstreams.reset()
+    
+    # Consultations run concurrently, like visits in different rooms
+    hypotheses, references, latencies = [], [], []
+    for _ in range(passes):
+        replays = await asyncio.gather(*(replay_conversation(translation, conversation) for conversation in corpus))
+        for conversation, (messages, timings) in zip(corpus, replays):
+            hypotheses += [message["translated_text"] for message in messages]
+            references += [message["reference"] for message in conversation["messages"]]
+            latencies += timings
+    
+    result = {
+        "config": name,
+        "translation": {
+            "messages": len(latencies),
+            "p50_ms": round(statistics.median(latencies), 1),
+            "p95_ms": round(percentile(latencies, 95), 1),
+            "upstream_calls": upstreams.calls["azure_translator"],
+            "chars_sent": upstreams.chars_sent,
+            "coalesced": translation.single_flight.metrics["coalesced"],
+            "unrecorded": upstreams.misses,
+            "bleu": round(corpus_bleu(hypotheses, references), 2),
+            "chrf": round(corpus_chrf(hypotheses, references), 2)
+        },
+        "summary": {}
+    }
+    
+    # Summaries are generated from the last pass's translations
+    for mode in SUMMARY_MODES:
+        summary_service = AISummaryService()
+        summary_service.groq_api_key = "evaluation" if mode == "groq" else None
+        upstreams.reset()
+        summaries = await asyncio.gather(*(summarize(summary_service, messages) for messages, _ in replays))
+        scores = [
+            {"conversation_id": conversation["id"], **score_summary(text, conversation["expected_summary"])}
+            for conversation, (text, _) in zip(corpus, summaries)
+        ]
+        result["summary"][mode] = {
+            "p50_ms": round(statistics.median(ms for _, ms in summaries), 1),
+            "upstream_calls": upstreams.calls["groq"],
+            "unrecorded": upstreams.misses,
+            **{
+                metric: round(statistics.mean(score[metric] for score in scores), 3)
+                for metric in ("headings", "sections", "facts")
+            },
+            "conversations": scores
+        }
+    return result
+
+
+def load_json(path: str) -> Dict:
+    with open(path, encoding="utf-8") as file:
+        return json.load(file)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", default=os.path.join(DATA_DIR, "consultations.json"))
+    parser.add_argument("--responses", default=os.path.join(DATA_DIR, "recorded_responses.json"), help="Recorded upstream responses")
+    parser.add_argument("--configs", nargs="+", choices=list(CONFIGS), default=list(CONFIGS))
+    parser.add_argument("--passes", type=int, default=2, help="Times the corpus is replayed per configuration")
+    parser.add_argument("--translator-rtt-ms", type=float, default=80.0)
+    parser.add_argument("--translator-ms-per-char", type=float, default=0.4)
+    parser.add_argument("--groq-rtt-ms", type=float, default=200.0)
+    parser.add_argument("--groq-ms-per-token", type=float, default=2.0)
+    parser.add_argument("--json", help="Also write the full results to this file")
+    args = parser.parse_args()
+    
+    # Upstream rate limits are deployment settings; lift them so that latency
+    # comes from the stand-ins alone (the scheduler reads them on first use)
+    for upstream in ("AZURE_TRANSLATOR", "GROQ"):
+        for setting in ("RPS", "BURST", "UNITS_PER_SEC", "UNIT_BURST"):
+            os.environ.setdefault(f"SCHEDULER_{upstream}_{setting}", "1e9")
+    
+    corpus = load_json(args.corpus)["conversations"]
+    upstreams = RecordedUpstreams(load_json(args.responses), corpus, args)
+    
+    results = []
+    with replay(upstreams):
+        for name in args.configs:
+            results.append(await evaluate(name, corpus, upstreams, args.passes))
+    
+    message_count = sum(len(conversation["messages"]) for conversation in corpus)
+    print(f"Translation ({len(corpus)} consultations, {message_count} messages, {args.passes} passes)")
+    print(f"{'config':<10} {'p50 ms':>8} {'p95 ms':>8} {'calls':>6} {'chars':>7} {'BLEU':>6} {'chrF':>6}")
+    for result in results:
+        t = result["translation"]
+        print(
+            f"{result['config']:<10} {t['p50_ms']:>8.1f} {t['p95_ms']:>8.1f} {t['upstream_calls']:>6} "
+            f"{t['chars_sent']:>7} {t['bleu']:>6.2f} {t['chrf']:>6.2f}"
+        )
+    
+    print()
+    print("Summary (share of headings present, expected sections filled, expected facts found)")
+    print(f"{'config':<10} {'mode':<9} {'p50 ms':>8} {'calls':>6} {'headings':>9} {'sections':>9} {'facts':>6}")
+    for result in results:
+        for mode, s in result["summary"].items():
+            print(
+                f"{result['config']:<10} {mode:<9} {s['p50_ms']:>8.1f} {s['upstream_calls']:>6} "
+                f"{s['headings']:>9.2f} {s['sections']:>9.2f} {s['facts']:>6.2f}"
+            )
+    
+    unrecorded = sum(result["translation"]["unrecorded"] for result in results)
+    unrecorded += sum(s["unrecorded"] for result in results for s in result["summary"].values())
+    if unrecorded:
+        print(f"\n⚠️ {unrecorded} requests had no recorded response (untranslated text, or the fallback summary)")
+    
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2, ensure_ascii=False)
+        print(f"\nResults written to {args.json}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
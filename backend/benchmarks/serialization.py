@@ -0,0 +1,185 @@
+"""
+Benchmark: serializing a 10k-message history response
+
+Compares the previous path (per-document str(_id)/isoformat() in Python,
+then jsonable_encoder + json.dumps) with the current one (rows converted by
+the MongoDB $set stage, then orjson), plus typed-model validation and
+compressed payload sizes.
+
+By default documents are generated locally and no database is needed. The
+current path's conversion then happens "in MongoDB" for free, so that line
+excludes work the previous path pays for; the Python conversion + orjson
+line does the same work as the previous path with only the encoder
+changed. With --mongodb-uri both paths run end to end against a scratch
+database, including the query and the server-side conversion.
+
+Usage:
+    python -m benchmarks.serialization [--messages 10000] [--mongodb-uri mongodb://localhost:27017]
+"""
+import argparse
+import asyncio
+import gzip
+import json
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import orjson
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+
+from compression import brotli
+from main import HistoryResponse
+from services.database import MessageService
+
+
+def make_documents(count: int) -> list:
+    """Message documents as motor returns them"""
+    started = datetime(2024, 1, 1, 9, 0, 0)
+    documents = []
+    for i in range(count):
+        timestamp = started + timedelta(seconds=i * 7, milliseconds=i % 1000)
+        documents.append({
+            "_id": ObjectId(),
+            "original_text": f"Patient reports headache and mild fever since day {i % 14}.",
+            "translated_text": f"El paciente reporta dolor de cabeza y fiebre leve desde el dia {i % 14}.",
+            "role": "doctor" if i % 2 else "patient",
+            "language": "en",
+            "target_language": "es",
+            "message_type": "text",
+            "audio_url": None,
+            "audio_hash": None,
+            "conversation_id": "default",
+            "timestamp": timestamp,
+            "created_at": timestamp
+        })
+    return documents
+
+
+def server_converted(documents: list) -> list:
+    """Rows as produced by MessageService.SERIALIZE_STAGE (done by MongoDB)"""
+    return [
+        {
+            **doc,
+            "_id": str(doc["_id"]),
+            "timestamp": doc["timestamp"].strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "000",
+            "created_at": doc["created_at"].strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "000"
+        }
+        for doc in documents
+    ]
+
+
+def python_converted(documents: list) -> list:
+    """Per-document conversion as the previous get_messages did it"""
+    messages = []
+    for doc in documents:
+        doc = dict(doc)
+        doc["_id"] = str(doc["_id"])
+        doc["timestamp"] = doc["timestamp"].isoformat()
+        doc["created_at"] = doc["created_at"].isoformat()
+        messages.append(doc)
+    return messages
+
+
+def previous_path(documents: list) -> bytes:
+    content = jsonable_encoder({"success": True, "messages": list(reversed(python_converted(documents)))})
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def python_orjson_path(documents: list) -> bytes:
+    return orjson_path(python_converted(documents))
+
+
+def orjson_path(rows: list) -> bytes:
+    rows = list(rows)
+    rows.reverse()
+    return orjson.dumps({"success": True, "messages": rows})
+
+
+def typed_path(rows: list) -> bytes:
+    return HistoryResponse(success=True, messages=rows).model_dump_json(by_alias=True).encode("utf-8")
+
+
+def measure(fn, arg, runs: int) -> float:
+    """Median time in milliseconds"""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn(arg)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+async def measure_end_to_end(uri: str, documents: list, runs: int):
+    """Time query + conversion + encoding for both paths against a real MongoDB"""
+    from motor.motor_asyncio import AsyncIOMotorClient
+    
+    client = AsyncIOMotorClient(uri)
+    db = client["benchmark_serialization"]
+    collection = db.messages
+    try:
+        await collection.drop()
+        await collection.insert_many([dict(doc) for doc in documents])
+        limit = len(documents)
+        
+        async def previous():
+            docs = await collection.find({}).sort("timestamp", -1).limit(limit).to_list(length=limit)
+            return previous_path(docs)
+        
+        async def current():
+            rows = await collection.aggregate([
+                {"$match": {}},
+                {"$sort": {"timestamp": -1}},
+                {"$limit": limit},
+                MessageService.SERIALIZE_STAGE
+            ]).to_list(length=limit)
+            rows.reverse()
+            return orjson.dumps({"success": True, "messages": rows})
+        
+        for name, fn in (("previous (find + python loop + jsonable_encoder + json)", previous),
+                         ("current (aggregate with $set conversion + orjson)     ", current)):
+            timings = []
+            for _ in range(runs):
+                start = time.perf_counter()
+                await fn()
+                timings.append((time.perf_counter() - start) * 1000)
+            print(f"  {name}: {statistics.median(timings):8.1f} ms")
+    finally:
+        await client.drop_database("benchmark_serialization")
+        client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=10000)
+    parser.add_argument("--runs", type=int, default=7)
+    parser.add_argument("--mongodb-uri", help="Also measure end to end against this MongoDB (uses a scratch database)")
+    args = parser.parse_args()
+    
+    documents = make_documents(args.messages)
+    rows = server_converted(documents)
+    
+    print(f"{args.messages} messages, median of {args.runs} runs, encoding only")
+    print(f"  previous (python loop + jsonable_encoder + json): {measure(previous_path, documents, args.runs):8.1f} ms")
+    print(f"  python loop + orjson (same work, new encoder):    {measure(python_orjson_path, documents, args.runs):8.1f} ms")
+    print(f"  typed model validation + pydantic JSON:           {measure(typed_path, rows, args.runs):8.1f} ms")
+    print(f"  mongo-converted rows + orjson:                    {measure(orjson_path, rows, args.runs):8.1f} ms")
+    print("  (the last two exclude the conversion MongoDB does; use --mongodb-uri to include it)")
+    
+    if args.mongodb_uri:
+        print(f"\nEnd to end against {args.mongodb_uri}")
+        asyncio.run(measure_end_to_end(args.mongodb_uri, documents, args.runs))
+    
+    payload = orjson_path(rows)
+    print(f"\nPayload: {len(payload) / 1024:8.1f} KiB raw")
+    print(f"         {len(gzip.compress(payload, 6)) / 1024:8.1f} KiB gzip (level 6)")
+    if brotli is not None:
+        print(f"         {len(brotli.compress(payload, quality=4)) / 1024:8.1f} KiB brotli (quality 4)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Benchmark: whole-text vs segmented translation latency on long inputs
+
+Azure Translator is replaced with a simulated upstream whose latency grows
+with the number of characters sent, so the benchmark runs offline.
+
+Usage:
+    python -m benchmarks.translation_segmentation [--rtt-ms 80] [--ms-per-char 0.4]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.translation import TranslationService
+
+SENTENCES = [
+    "The scan shows mild inflammation in the lower lobe of your left lung.",
+    "This is consistent with the cough and fever you described last week.",
+    "I am prescribing amoxicillin 500 mg, to be taken three times a day for seven days.",
+    "Please finish the full course even if you start feeling better.",
+    "Drink plenty of fluids and get as much rest as you can.",
+    "If you notice shortness of breath or chest pain, come to the emergency room immediately.",
+    "We will repeat the X-ray in two weeks to make sure the infection has cleared.",
+    "Do you have any questions about the medication or the treatment plan?",
+]
+
+
+def build_text(sentence_count: int) -> str:
+    """Build a long doctor explanation by cycling through sample sentences"""
+    return " ".join(SENTENCES[i % len(SENTENCES)] for i in range(sentence_count))
+
+
+def make_service(segmented: bool, rtt_ms: float, ms_per_char: float) -> TranslationService:
+    """Create a TranslationService whose upstream call is simulated"""
+    os.environ.setdefault("AZURE_TRANSLATOR_KEY", "benchmark")
+    service = TranslationService()
+    if not segmented:
+        service.segmenter.min_split_chars = sys.maxsize
+    service.cache_size = 0  # measure upstream latency, not cache hits
+    
+    async def fake_segment(client, segment, source_lang, target_lang):
+        await asyncio.sleep((rtt_ms + ms_per_char * len(segment)) / 1000)
+        return segment.upper()
+    
+    service._translate_segment = fake_segment
+    return service
+
+
+async def measure(service: TranslationService, text: str, runs: int) -> float:
+    """Median latency in milliseconds"""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        await service.translate(text, "en", "es")
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rtt-ms", type=float, default=80.0, help="Simulated round trip per request")
+    parser.add_argument("--ms-per-char", type=float, default=0.4, help="Simulated processing time per character")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+    
+    whole = make_service(False, args.rtt_ms, args.ms_per_char)
+    segmented = make_service(True, args.rtt_ms, args.ms_per_char)
+    
+    print(f"{'sentences':>10} {'chars':>7} {'whole ms':>10} {'segmented ms':>13} {'speedup':>8}")
+    for sentence_count in (2, 8, 16, 32, 64):
+        text = build_text(sentence_count)
+        whole_ms = await measure(whole, text, args.runs)
+        segmented_ms = await measure(segmented, text, args.runs)
+        print(
+            f"{sentence_count:>10} {len(text):>7} {whole_ms:>10.1f} "
+            f"{segmented_ms:>13.1f} {whole_ms / segmented_ms:>7.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
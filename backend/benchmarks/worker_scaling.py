@@ -0,0 +1,110 @@
+"""
+Benchmark: request throughput with 1..N uvicorn worker processes
+
+Starts the app with an increasing number of workers and drives it with
+several load-generating processes, reporting requests/second for each
+worker count. The default endpoint needs no database or API keys.
+
+Usage:
+    python -m benchmarks.worker_scaling [--workers 1 2 4] [--path /api/live]
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import subprocess
+import sys
+import time
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def wait_until_up(url: str, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(url, timeout=1.0).status_code < 500:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"Server did not start: {url}")
+
+
+async def drive(url: str, concurrency: int, duration: float) -> int:
+    """Send requests from `concurrency` connections for `duration` seconds"""
+    completed = 0
+    deadline = time.monotonic() + duration
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    
+    async with httpx.AsyncClient(limits=limits, timeout=10.0) as client:
+        async def loop():
+            nonlocal completed
+            while time.monotonic() < deadline:
+                response = await client.get(url)
+                if response.status_code < 500:
+                    completed += 1
+        
+        await asyncio.gather(*(loop() for _ in range(concurrency)))
+    return completed
+
+
+def load_process(url: str, concurrency: int, duration: float, results):
+    results.put(asyncio.run(drive(url, concurrency, duration)))
+
+
+def measure(url: str, clients: int, concurrency: int, duration: float) -> float:
+    """Requests per second across all load-generating processes"""
+    results = multiprocessing.Queue()
+    processes = [
+        multiprocessing.Process(target=load_process, args=(url, concurrency, duration, results))
+        for _ in range(clients)
+    ]
+    for process in processes:
+        process.start()
+    total = sum(results.get() for _ in processes)
+    for process in processes:
+        process.join()
+    return total / duration
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--path", default="/api/live")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--clients", type=int, default=max(1, multiprocessing.cpu_count() // 2),
+                        help="Load-generating processes")
+    parser.add_argument("--concurrency", type=int, default=32, help="Connections per client process")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per measurement")
+    args = parser.parse_args()
+    
+    url = f"http://127.0.0.1:{args.port}{args.path}"
+    env = {**os.environ, "SHARED_STATE_BACKEND": os.getenv("SHARED_STATE_BACKEND", "memory")}
+    print(f"{multiprocessing.cpu_count()} CPUs, {args.clients} client processes x {args.concurrency} connections")
+    print(f"{'workers':>8} {'req/s':>10} {'scaling':>8}")
+    
+    baseline = None
+    for workers in args.workers:
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--port", str(args.port),
+             "--workers", str(workers), "--log-level", "warning", "--no-access-log"],
+            cwd=BACKEND_DIR,
+            env=env
+        )
+        try:
+            wait_until_up(url)
+            measure(url, args.clients, args.concurrency, 1.0)  # warm up every worker
+            throughput = measure(url, args.clients, args.concurrency, args.duration)
+        finally:
+            server.terminate()
+            server.wait()
+        
+        baseline = baseline or throughput
+        print(f"{workers:>8} {throughput:>10.0f} {throughput / baseline:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+"""
+Multi-worker deployment: gunicorn managing uvicorn workers
+    
+    gunicorn main:app -c gunicorn.conf.py
+
+Each worker is a separate process with its own event loop and services.
+Anything that must be consistent across workers (translation cache,
+upstream rate-limit buckets, job status, group membership) lives in the
+shared state, so more than one worker requires SHARED_STATE_BACKEND=mongo.
+"""
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", str(multiprocessing.cpu_count())))
+worker_class = "uvicorn.workers.UvicornWorker"
+
+# Long transcriptions poll AssemblyAI for up to two minutes
+timeout = int(os.getenv("WORKER_TIMEOUT", "180"))
+graceful_timeout = 30
+keepalive = 5
+
+# Each worker process also has its own audio preprocessing pool; keep the
+# total number of processes around the number of cores
+os.environ.setdefault(
+    "AUDIO_PREPROCESS_WORKERS",
+    str(max(1, multiprocessing.cpu_count() // max(1, workers)))
+)
+
+if workers > 1:
+    os.environ.setdefault("SHARED_STATE_BACKEND", "mongo")
+    if os.environ["SHARED_STATE_BACKEND"] != "mongo":
+        raise RuntimeError("Running more than one worker requires SHARED_STATE_BACKEND=mongo")
@@ -1,20 +1,40 @@
-from fastapi import FastAPI, File, UploadFile, HTTPException, Form
+import asyncio
+import time
+
+# Reference point for the startup report (module import -> services ready)
+process_started = time.perf_counter()
+
+from fastapi import FastAPI, File, UploadFile, HTTPException, Form, Request
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import Optional, List
+from fastapi.responses import JSONResponse, ORJSONResponse, StreamingResponse
+from pydantic import BaseModel, ConfigDict, Field
+from typing import Optional, List, Dict
 from datetime import datetime
 import os
 from dotenv import load_dotenv
 
-from services.database import Database, MessageService
+from compression import CompressionMiddleware
+
+from services.database import Database, MessageService, AudioIndexService
 from services.translation import TranslationService
 from services.speech import SpeechService
-from services.storage import StorageService
+from services.storage import StorageService, read_with_hash
+from services.storage_backends import LocalDiskBackend
 from services.ai_summary import AISummaryService
+from services.audio_processing import AudioPreprocessor
+from services.scheduler import current_tenant, get_scheduler
+from services.registry import ServiceRegistry
+from services.shared_state import create_shared_state, shared_state_backend
+from services.export import ExportService
+from services.retention import RetentionService
+from services.summary_precompute import SummaryPrecomputeService
+from services.tracing import SPAN_KIND_SERVER, get_tracer, record_exception, span
+from services.profiling import EventLoopMonitor, RequestProfiler, profiling_enabled
 
 load_dotenv()
 
-app = FastAPI(title="Healthcare Translation API")
+# orjson serializes responses several times faster than the stdlib encoder
+app = FastAPI(title="Healthcare Translation API", default_response_class=ORJSONResponse)
 
 # CORS middleware for frontend
 allowed_origins = os.getenv("ALLOWED_ORIGINS", "http://localhost:5173").split(",")
@@ -26,38 +46,194 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Service instances will be initialized on startup
-message_service = None
-translation_service = None
-speech_service = None
-storage_service = None
-ai_summary_service = None
+# Brotli (if installed) or gzip for large history, search and export payloads
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=int(os.getenv("RESPONSE_COMPRESSION_MIN_SIZE", "1024"))
+)
 
 
-@app.on_event("startup")
-async def startup_event():
-    """Initialize database connection and services on startup"""
-    global message_service, translation_service, speech_service, storage_service, ai_summary_service
-    
+@app.middleware("http")
+async def tenant_context(request: Request, call_next):
+    """Attribute upstream API usage to the calling clinic for fair scheduling"""
+    tenant = request.headers.get("X-Tenant-ID") or (request.client.host if request.client else "default")
+    current_tenant.set(tenant)
+    return await call_next(request)
+
+
+@app.middleware("http")
+async def trace_requests(request: Request, call_next):
+    """Root trace span per request (TRACING_ENABLED); optional profiling (PROFILING_ENABLED)"""
+    name = f"{request.method} {request.url.path}"
+    with span(name, kind=SPAN_KIND_SERVER, **{"http.method": request.method, "http.target": request.url.path}) as request_span:
+        if request_profiler and request_profiler.should_profile(request.headers):
+            async with request_profiler.profile(name):
+                response = await call_next(request)
+        else:
+            response = await call_next(request)
+        
+        route = request.scope.get("route")
+        if route is not None:
+            request_span.update_name(f"{request.method} {route.path}")
+            request_span.set_attribute("http.route", route.path)
+        request_span.set_attribute("http.status_code", response.status_code)
+    return response
+
+
+async def connect_database():
+    """Connect to MongoDB and verify the connection"""
     print("🔄 Connecting to database...")
     await Database.connect_db()
+    try:
+        await Database.client.admin.command("ping")
+    except Exception:
+        await Database.close_db()
+        raise
     print("✅ Database connected")
-    
-    print("🔄 Initializing services...")
+    return Database
+
+
+async def create_message_service():
     message_service = MessageService()
-    translation_service = TranslationService()
-    speech_service = SpeechService()
-    storage_service = StorageService()
-    ai_summary_service = AISummaryService()
-    print("✅ All services initialized successfully")
+    await message_service.ensure_indexes()
+    return message_service
+
+
+async def create_export_service():
+    return ExportService(await services.get("messages"), await services.get("storage"))
+
+
+async def create_retention_service():
+    retention_service = RetentionService(
+        message_service=await services.get("messages"),
+        audio_index_service=await services.get("audio_index"),
+        storage_service=await services.get("storage"),
+        summary_precompute=await services.get("summary_precompute"),
+        shared_state=await services.get("shared_state")
+    )
+    await retention_service.ensure_indexes()
+    return retention_service
+
+
+async def create_summary_precompute_service():
+    summary_precompute = SummaryPrecomputeService(
+        message_service=await services.get("messages"),
+        ai_summary_service=await services.get("summary"),
+        shared_state=await services.get("shared_state")
+    )
+    summary_precompute.start()
+    return summary_precompute
+
+
+async def create_state():
+    """Shared state for caches and rate limits; see gunicorn.conf.py for multi-worker mode"""
+    shared_state = await create_shared_state()
+    get_scheduler().use_shared_state(shared_state)
+    return shared_state
+
+
+async def create_translation_service():
+    return TranslationService(shared_state=await services.get("shared_state"))
+
+
+# Services are created lazily and concurrently; see ServiceRegistry
+services = ServiceRegistry()
+services.register("database", connect_database)
+services.register(
+    "shared_state",
+    create_state,
+    depends_on=["database"] if shared_state_backend() == "mongo" else []
+)
+services.register("messages", create_message_service, depends_on=["database"])
+services.register("export", create_export_service, depends_on=["messages", "storage"])
+services.register("audio_index", AudioIndexService, depends_on=["database"])
+services.register("translation", create_translation_service, depends_on=["shared_state"])
+services.register("speech", SpeechService)
+services.register("storage", StorageService)
+services.register("summary", AISummaryService)
+services.register("audio_preprocessor", AudioPreprocessor)
+services.register(
+    "summary_precompute",
+    create_summary_precompute_service,
+    depends_on=["messages", "summary", "shared_state"]
+)
+services.register(
+    "retention",
+    create_retention_service,
+    depends_on=["messages", "audio_index", "storage", "summary_precompute", "shared_state"]
+)
+
+import_ms = None
+retention_task = None
+loop_monitor = None
+request_profiler = None
+
+
+async def get_service(name: str):
+    """Get a service for a request, waiting for it if it is still warming up"""
+    try:
+        return await services.get(name)
+    except Exception as e:
+        raise HTTPException(
+            status_code=503,
+            detail=f"Service '{name}' unavailable: {str(e)}. Please try again."
+        )
+
+
+@app.on_event("startup")
+async def startup_event():
+    """Start warming up services in the background; the app answers immediately"""
+    global import_ms, retention_task, loop_monitor, request_profiler
+    import_ms = (time.perf_counter() - process_started) * 1000
+    print(f"🔄 Initializing services in the background (imports took {import_ms:.0f}ms)...")
+    services.start_warm_up()
+    retention_task = asyncio.create_task(run_retention())
+    
+    if profiling_enabled():
+        loop_monitor = EventLoopMonitor(threshold_ms=float(os.getenv("EVENT_LOOP_LAG_MS", "100")))
+        loop_monitor.start()
+        request_profiler = RequestProfiler(
+            directory=os.getenv("PROFILE_DIR", "profiles"),
+            sample_rate=float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+        )
+        print("🔬 Profiling enabled: event loop monitor running, profile requests with 'X-Profile: 1'")
+
+
+async def run_retention():
+    """Archive inactive conversations in the background, if retention is enabled"""
+    # Keep retrying (e.g. while MongoDB is unreachable at boot) with backoff
+    delay = 5
+    while True:
+        try:
+            retention_service = await services.get("retention")
+            break
+        except Exception:
+            # The error itself is logged by the registry
+            print(f"⚠️ Retention not started, retrying in {delay}s")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 300)
+    if retention_service.enabled:
+        print(f"🗄️ Archiving conversations inactive for {retention_service.archive_after_days:g} days")
+        await retention_service.run_forever()
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Close database connection on shutdown"""
     print("👋 Shutting down...")
-    await Database.close_db()
-    print("✅ Database connection closed")
+    if retention_task:
+        retention_task.cancel()
+    if loop_monitor:
+        loop_monitor.stop()
+    summary_precompute = services.peek("summary_precompute")
+    if summary_precompute:
+        summary_precompute.stop()
+    audio_preprocessor = services.peek("audio_preprocessor")
+    if audio_preprocessor:
+        audio_preprocessor.shutdown()
+    if services.peek("database"):
+        await Database.close_db()
+        print("✅ Database connection closed")
 
 
 class MessageRequest(BaseModel):
@@ -76,22 +252,108 @@ class SummaryRequest(BaseModel):
     conversation_id: str
 
 
+class MessageRecord(BaseModel):
+    model_config = ConfigDict(populate_by_name=True)
+    
+    id: str = Field(alias="_id")
+    original_text: str
+    translated_text: str
+    role: str
+    language: str
+    target_language: str
+    message_type: str = "text"
+    audio_url: Optional[str] = None
+    audio_hash: Optional[str] = None
+    conversation_id: str = "default"
+    timestamp: str
+    created_at: str
+
+
+class SearchResult(MessageRecord):
+    highlight: str = ""
+
+
+class SendMessageResponse(BaseModel):
+    success: bool
+    message: MessageRecord
+    translated_text: str
+
+
+class AudioMessageResponse(BaseModel):
+    success: bool
+    message: MessageRecord
+    transcription: str
+    translated_text: str
+    audio_url: str
+    preprocessing: Optional[Dict[str, float]] = None
+    deduplicated: bool = False
+
+
+class HistoryResponse(BaseModel):
+    success: bool
+    messages: List[MessageRecord]
+
+
+class SearchResponse(BaseModel):
+    success: bool
+    results: List[SearchResult]
+
+
+class SummaryResult(BaseModel):
+    summary: str
+    message_count: int
+    generated_at: str
+    fallback: bool = False  # AI summary failed; keyword-based summary instead
+
+
+class SummaryResponse(BaseModel):
+    success: bool
+    summary: SummaryResult
+    precomputed: bool = False
+
+
+class SummaryJobStatus(BaseModel):
+    status: str  # "none", "queued", "running", "done" or "failed"
+    updated_at: Optional[str] = None
+    error: Optional[str] = None
+
+
+class SummaryJobResponse(BaseModel):
+    success: bool
+    conversation_id: str
+    job: SummaryJobStatus
+
+
+def message_added(conversation_id: str):
+    """Restart the idle countdown before the conversation is summarized in the background"""
+    summary_precompute = services.peek("summary_precompute")
+    if summary_precompute:
+        summary_precompute.message_added(conversation_id)
+
+
+async def with_playback_urls(messages: List[Dict]) -> List[Dict]:
+    """Replace stored audio references with playable URLs (e.g. presigned S3 URLs)"""
+    if any(message.get("audio_url") for message in messages):
+        storage_service = await get_service("storage")
+        for message in messages:
+            if message.get("audio_url"):
+                message["audio_url"] = storage_service.playback_url(message["audio_url"])
+    return messages
+
+
 @app.get("/")
 async def root():
     return {"status": "Healthcare Translation API is running"}
 
 
-@app.post("/api/messages/send")
+@app.post("/api/messages/send", response_model=SendMessageResponse)
 async def send_message(message: MessageRequest):
     """Send a text message and get translation"""
+    # Waits for the services if they are still warming up (503 if they fail)
+    translation_service = await get_service("translation")
+    message_service = await get_service("messages")
+    
     try:
-        # Check if services are initialized
-        if not translation_service or not message_service:
-            raise HTTPException(
-                status_code=503, 
-                detail="Services not initialized. Please wait a moment and try again."
-            )
-        
         # Translate the message
         translated_text = await translation_service.translate(
             text=message.text,
@@ -100,14 +362,16 @@ async def send_message(message: MessageRequest):
         )
         
         # Save to database
-        saved_message = await message_service.create_message(
-            original_text=message.text,
-            translated_text=translated_text,
-            role=message.role,
-            language=message.language,
-            target_language=message.target_language,
-            message_type="text"
-        )
+        with span("db.create_message"):
+            saved_message = await message_service.create_message(
+                original_text=message.text,
+                translated_text=translated_text,
+                role=message.role,
+                language=message.language,
+                target_language=message.target_language,
+                message_type="text"
+            )
+        message_added(saved_message["conversation_id"])
         
         return {
             "success": True,
@@ -121,12 +385,12 @@ async def send_message(message: MessageRequest):
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         print(f"❌ Error in send_message: {type(e).__name__}: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        # Stack trace goes to the request's trace span (printed if tracing is off)
+        record_exception(e)
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
 
-@app.post("/api/messages/audio")
+@app.post("/api/messages/audio", response_model=AudioMessageResponse)
 async def upload_audio(
     file: UploadFile = File(...),
     role: str = Form(...),
@@ -134,20 +398,64 @@ async def upload_audio(
     target_language: str = Form(...)
 ):
     """Upload audio, transcribe, translate, and store"""
+    audio_index_service = await get_service("audio_index")
+    audio_preprocessor = await get_service("audio_preprocessor")
+    storage_service = await get_service("storage")
+    speech_service = await get_service("speech")
+    translation_service = await get_service("translation")
+    message_service = await get_service("messages")
+    
     try:
         print(f"📝 Received audio from role: {role}")
         
-        # Read audio file
-        audio_content = await file.read()
+        # Read audio file, hashing it as it streams in
+        with span("audio.read"):
+            audio_content, audio_hash = await read_with_hash(file)
         
-        # Upload to Cloudinary
-        audio_url = await storage_service.upload_audio(
-            audio_content,
-            filename=file.filename
-        )
+        # Retries and duplicate submissions reuse the stored audio and transcript
+        with span("audio_index.lookup"):
+            indexed = await audio_index_service.reuse(audio_hash)
+        preprocessing = None
+        
+        # Audio the retention job is deleting right now is uploaded again,
+        # under a key of its own so the pending deletion cannot remove it
+        replacing = indexed is not None and "deleting" in indexed
+        if replacing:
+            print(f"♻️ Stored audio is being deleted, uploading a new copy: {audio_hash[:12]}")
+            indexed = None
         
-        # Transcribe audio using AssemblyAI
-        transcription = await speech_service.transcribe_audio(audio_url)
+        if indexed:
+            print(f"♻️ Audio already stored: {audio_hash[:12]}")
+            audio_url = indexed["audio_url"]
+        else:
+            # Downmix, resample, trim silence and compress before upload
+            with span("audio.preprocess", bytes=len(audio_content)):
+                audio_content, filename, preprocessing = await audio_preprocessor.process(
+                    audio_content,
+                    filename=file.filename
+                )
+            print(f"🎚️ Audio preprocessed: {preprocessing}")
+            
+            # Upload to the storage backend
+            audio_url, public_id = await storage_service.upload_audio(
+                audio_content,
+                filename=filename,
+                content_hash=None if replacing else audio_hash
+            )
+            await audio_index_service.save_upload(audio_hash, audio_url, public_id, size=len(audio_content))
+        
+        if indexed and indexed.get("transcript") is not None:
+            transcription = indexed["transcript"]
+        elif storage_service.backend.remote_fetchable:
+            # Transcribe audio using AssemblyAI
+            transcription = await speech_service.transcribe_audio(storage_service.playback_url(audio_url))
+            await audio_index_service.save_transcript(audio_hash, transcription)
+        else:
+            # On-prem storage is not reachable by AssemblyAI; send the bytes
+            if indexed:
+                audio_content = await storage_service.read_audio(indexed["public_id"])
+            transcription = await speech_service.transcribe_audio_content(audio_content)
+            await audio_index_service.save_transcript(audio_hash, transcription)
         
         # Translate transcription
         translated_text = await translation_service.translate(
@@ -157,85 +465,250 @@ async def upload_audio(
         )
         
         # Save to database
-        saved_message = await message_service.create_message(
-            original_text=transcription,
-            translated_text=translated_text,
-            role=role,
-            language=language,
-            target_language=target_language,
-            message_type="audio",
-            audio_url=audio_url
-        )
+        with span("db.create_message"):
+            saved_message = await message_service.create_message(
+                original_text=transcription,
+                translated_text=translated_text,
+                role=role,
+                language=language,
+                target_language=target_language,
+                message_type="audio",
+                audio_url=audio_url,
+                audio_hash=audio_hash
+            )
+        message_added(saved_message["conversation_id"])
         
+        saved_message["audio_url"] = storage_service.playback_url(audio_url)
         return {
             "success": True,
             "message": saved_message,
             "transcription": transcription,
             "translated_text": translated_text,
-            "audio_url": audio_url
+            "audio_url": saved_message["audio_url"],
+            "preprocessing": preprocessing,
+            "deduplicated": indexed is not None
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.get("/api/messages/history")
+@app.get("/api/audio/{key:path}")
+async def get_audio(key: str, request: Request):
+    """Serve audio kept on local storage, with HTTP range support for seeking"""
+    backend = (await get_service("storage")).backend
+    if not isinstance(backend, LocalDiskBackend):
+        raise HTTPException(status_code=404, detail="Audio is not served by this backend")
+    
+    try:
+        size = backend.size(key)
+    except (FileNotFoundError, ValueError):
+        raise HTTPException(status_code=404, detail="Audio not found")
+    
+    headers = {"Accept-Ranges": "bytes"}
+    byte_range = parse_range_header(request.headers.get("range"), size)
+    if byte_range is None:
+        start, end, status_code = 0, size - 1, 200
+    elif byte_range == (-1, -1):
+        raise HTTPException(
+            status_code=416,
+            detail="Requested range not satisfiable",
+            headers={"Content-Range": f"bytes */{size}"}
+        )
+    else:
+        start, end = byte_range
+        status_code = 206
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    headers["Content-Length"] = str(end - start + 1)
+    
+    return StreamingResponse(
+        backend.iter_range(key, start, end),
+        status_code=status_code,
+        media_type=backend.content_type(key),
+        headers=headers
+    )
+
+
+def parse_range_header(range_header: Optional[str], size: int):
+    """
+    Parse a single-range 'Range: bytes=...' header
+    
+    Returns:
+        None to serve the whole file, (start, end) inclusive, or (-1, -1) if
+        the range starts past the end of the file
+    
+    Invalid ranges (e.g. 'bytes=5-3') are ignored, as RFC 9110 requires,
+    and the whole file is served.
+    """
+    if not range_header or not range_header.startswith("bytes="):
+        return None
+    # Multiple ranges are not supported; serve the first one
+    spec = range_header[len("bytes="):].split(",")[0].strip()
+    start_text, _, end_text = spec.partition("-")
+    try:
+        if start_text:
+            start = int(start_text)
+            end = min(int(end_text), size - 1) if end_text else size - 1
+        else:
+            # Suffix range: the last N bytes
+            start = max(0, size - int(end_text))
+            end = size - 1
+    except ValueError:
+        return None
+    if start >= size:
+        return (-1, -1)
+    if start > end:
+        return None
+    return start, end
+
+
+@app.get("/api/messages/history", response_model=HistoryResponse)
 async def get_message_history(
     conversation_id: Optional[str] = None,
     limit: int = 100
 ):
-    """Get conversation history"""
+    """
+    Get conversation history
+    
+    Rows are returned as an ORJSONResponse directly, so HistoryResponse only
+    documents the response shape in the OpenAPI schema; it is not validated.
+    """
+    message_service = await get_service("messages")
+    
     try:
         messages = await message_service.get_messages(
             conversation_id=conversation_id,
             limit=limit
         )
-        return {
+        # Rows are already response-shaped (converted in MongoDB); skip
+        # per-row model validation for large histories
+        return ORJSONResponse({
             "success": True,
-            "messages": messages
-        }
+            "messages": await with_playback_urls(messages)
+        })
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.post("/api/messages/search")
+@app.post("/api/messages/search", response_model=SearchResponse)
 async def search_messages(search: SearchRequest):
-    """Search through conversation history"""
+    """
+    Search through conversation history
+    
+    Like the history endpoint, SearchResponse only documents the shape.
+    """
+    message_service = await get_service("messages")
+    
     try:
         results = await message_service.search_messages(
             query=search.query,
             conversation_id=search.conversation_id
         )
-        return {
+        return ORJSONResponse({
             "success": True,
-            "results": results
-        }
+            "results": await with_playback_urls(results)
+        })
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.post("/api/summary/generate")
+@app.get("/api/messages/export")
+async def export_messages(
+    format: str = "ndjson",
+    conversation_id: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    include_summary: bool = True
+):
+    """
+    Export a conversation or date range for EHR import or analytics
+    
+    Streams NDJSON, Parquet, an Arrow IPC stream or a PDF transcript (with
+    the AI summary first, for a single conversation). Messages are read and
+    encoded one cursor batch at a time, so any size export runs in constant
+    memory.
+    """
+    export_service = await get_service("export")
+    export_format = format.lower()
+    if export_format not in export_service.FORMATS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported export format '{format}' (expected one of: {', '.join(export_service.FORMATS)})"
+        )
+    
+    summary = None
+    if export_format == "pdf" and include_summary and conversation_id:
+        summary_precompute = await get_service("summary_precompute")
+        try:
+            result, _ = await summary_precompute.get_summary(conversation_id)
+            if result["message_count"]:
+                summary = result["summary"]
+        except Exception as e:
+            print(f"⚠️ Exporting without summary: {str(e)}")
+    
+    title = f"Consultation transcript: {conversation_id or 'all conversations'}"
+    if start or end:
+        title += f" ({start.isoformat() if start else '...'} to {end.isoformat() if end else '...'})"
+    try:
+        encoder = export_service.create_encoder(export_format, title=title, summary=summary)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    filename = "".join(
+        char if char.isalnum() or char in "-_" else "_"
+        for char in (conversation_id or "messages")
+    )
+    return StreamingResponse(
+        export_service.stream(encoder, conversation_id=conversation_id, start=start, end=end),
+        media_type=encoder.media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{encoder.extension}"'}
+    )
+
+
+@app.post("/api/summary/generate", response_model=SummaryResponse)
 async def generate_summary(request: SummaryRequest):
-    """Generate AI-powered summary of conversation"""
+    """Generate AI-powered summary of conversation (served instantly if precomputed)"""
+    summary_precompute = await get_service("summary_precompute")
+    
     try:
-        # Get conversation history
-        messages = await message_service.get_messages(
-            conversation_id=request.conversation_id
-        )
-        
-        # Generate summary using AssemblyAI
-        summary = await ai_summary_service.generate_summary(messages)
+        summary, precomputed = await summary_precompute.get_summary(request.conversation_id)
         
         return {
             "success": True,
-            "summary": summary
+            "summary": summary,
+            "precomputed": precomputed
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/api/conversations/{conversation_id}/close", response_model=SummaryJobResponse)
+async def close_conversation(conversation_id: str):
+    """End of the visit: start summarizing the conversation in the background"""
+    summary_precompute = await get_service("summary_precompute")
+    
+    try:
+        job = await summary_precompute.close_conversation(conversation_id)
+        return {"success": True, "conversation_id": conversation_id, "job": job}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/conversations/{conversation_id}/summary/status", response_model=SummaryJobResponse)
+async def summary_status(conversation_id: str):
+    """Status of the background summary job"""
+    summary_precompute = await get_service("summary_precompute")
+    job = await summary_precompute.get_status(conversation_id)
+    return {"success": True, "conversation_id": conversation_id, "job": job}
+
+
 @app.get("/api/health")
 async def health_check():
     """Health check endpoint"""
+    message_service = services.peek("messages")
+    translation_service = services.peek("translation")
+    speech_service = services.peek("speech")
+    storage_service = services.peek("storage")
+    ai_summary_service = services.peek("summary")
     return {
         "status": "healthy",
         "timestamp": datetime.utcnow().isoformat(),
@@ -249,6 +722,50 @@ async def health_check():
     }
 
 
+@app.get("/api/live")
+async def liveness():
+    """Liveness probe: the process is up and the event loop is responsive"""
+    return {"status": "alive"}
+
+
+@app.get("/api/ready")
+async def readiness():
+    """Readiness probe: 200 once every service is initialized, 503 before"""
+    report = services.startup_report()
+    report["import_ms"] = round(import_ms, 2) if import_ms is not None else None
+    ready = services.is_ready()
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"status": "ready" if ready else "starting", "startup": report}
+    )
+
+
+@app.get("/api/metrics")
+async def metrics():
+    """Upstream scheduler metrics (queue wait times, throttle state), background work and diagnostics"""
+    retention_service = services.peek("retention")
+    summary_precompute = services.peek("summary_precompute")
+    # Requests coalesced into an identical in-flight upstream call
+    single_flight = {
+        name: service.single_flight.get_metrics()
+        for name, service in (
+            ("translation", services.peek("translation")),
+            ("summary", services.peek("summary")),
+            ("speech", services.peek("speech"))
+        )
+        if service
+    }
+    return {
+        "timestamp": datetime.utcnow().isoformat(),
+        "upstreams": get_scheduler().get_metrics(),
+        "single_flight": single_flight,
+        "summaries": summary_precompute.get_metrics() if summary_precompute else None,
+        "tracing": get_tracer().get_metrics(),
+        "event_loop": loop_monitor.get_metrics() if loop_monitor else None,
+        "retention": await retention_service.get_metrics() if retention_service else None
+    }
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
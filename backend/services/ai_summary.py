@@ -1,13 +1,21 @@
+import hashlib
 import httpx
 import os
 from typing import List, Dict
 
+from services.scheduler import PRIORITY_BULK, get_scheduler
+from services.singleflight import SingleFlight
+from services.tracing import span
+
 class AISummaryService:
     """Service for AI-powered conversation summarization using Groq API"""
     
     def __init__(self):
         self.groq_api_key = os.getenv("GROQ_API_KEY")
         self.groq_url = "https://api.groq.com/openai/v1/chat/completions"
+        # Both participants (or a retrying client) asking for the same
+        # summary at once share one Groq call
+        self.single_flight = SingleFlight()
     
     async def generate_summary(self, messages: List[Dict]) -> Dict:
         """
@@ -17,11 +25,23 @@ class AISummaryService:
             messages: List of message objects from database
         
         Returns:
-            Dictionary with summary sections
+            Dictionary with summary sections; `fallback` is True if Groq is
+            configured but failed and the keyword-based summary was used
+        
+        Concurrent calls for the same conversation text are coalesced into one.
         """
         # Prepare conversation text
         conversation_text = self._format_conversation(messages)
         
+        key = hashlib.sha256(conversation_text.encode("utf-8")).hexdigest()
+        with span("summary.generate", messages=len(messages), ai=bool(self.groq_api_key)):
+            return await self.single_flight.do(
+                key,
+                lambda: self._summarize(conversation_text, len(messages))
+            )
+    
+    async def _summarize(self, conversation_text: str, message_count: int) -> Dict:
+        fallback = False
         if not self.groq_api_key:
             print("⚠️ WARNING: Groq API key not configured. Using fallback summarization.")
             summary = await self._generate_structured_summary(conversation_text, "")
@@ -33,11 +53,13 @@ class AISummaryService:
             except Exception as e:
                 print(f"⚠️ Groq AI summarization failed: {str(e)}. Using fallback.")
                 summary = await self._generate_structured_summary(conversation_text, "")
+                fallback = True
         
         return {
             "summary": summary,
-            "message_count": len(messages),
-            "generated_at": self._get_timestamp()
+            "message_count": message_count,
+            "generated_at": self._get_timestamp(),
+            "fallback": fallback
         }
     
     def _format_conversation(self, messages: List[Dict]) -> str:
@@ -114,11 +136,19 @@ Be concise but thorough. If any section has no information, state "None mentione
             "max_tokens": 1000
         }
         
+        # Groq limits tokens per minute; estimate ~4 characters per token
+        estimated_tokens = len(prompt) // 4 + payload["max_tokens"]
+        
         async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.post(
-                self.groq_url,
-                headers=headers,
-                json=payload
+            response = await get_scheduler().request(
+                "groq",
+                lambda: client.post(
+                    self.groq_url,
+                    headers=headers,
+                    json=payload
+                ),
+                cost=estimated_tokens,
+                priority=PRIORITY_BULK
             )
             
             if response.status_code != 200:
@@ -0,0 +1,185 @@
+import asyncio
+import os
+import shutil
+import subprocess
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Optional, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import numpy as np
+
+
+def _run_ffmpeg(args: list, data: bytes) -> bytes:
+    """Run ffmpeg with stdin/stdout pipes and return its output"""
+    result = subprocess.run(
+        ["ffmpeg", "-hide_banner", "-loglevel", "error", *args],
+        input=data,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        check=False
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg failed: {result.stderr.decode(errors='replace').strip()}")
+    return result.stdout
+
+
+def trim_silence(
+    pcm: "np.ndarray",
+    sample_rate: int,
+    threshold_db: float = -40.0,
+    frame_ms: int = 20,
+    padding_ms: int = 200
+) -> "np.ndarray":
+    """
+    Trim leading and trailing silence from mono 16-bit PCM
+    
+    Frame energy is computed for all frames at once; the signal is cut to the
+    first and last frame louder than `threshold_db` (dBFS), keeping
+    `padding_ms` of context on each side so word onsets are not clipped.
+    
+    Returns:
+        Trimmed samples (empty if the whole clip is below the threshold)
+    """
+    import numpy as np
+    
+    frame_len = sample_rate * frame_ms // 1000
+    frame_count = len(pcm) // frame_len
+    if frame_count == 0:
+        return pcm
+    
+    frames = pcm[:frame_count * frame_len].reshape(frame_count, frame_len).astype(np.float32)
+    rms = np.sqrt(np.mean(np.square(frames / 32768.0), axis=1))
+    loud = np.flatnonzero(20 * np.log10(np.maximum(rms, 1e-10)) > threshold_db)
+    if loud.size == 0:
+        return pcm[:0]
+    
+    padding = padding_ms // frame_ms
+    start = max(0, loud[0] - padding) * frame_len
+    last = loud[-1] + 1 + padding
+    # Keep any partial frame at the end if the speech runs to the end
+    end = len(pcm) if last >= frame_count else last * frame_len
+    return pcm[start:end]
+
+
+def preprocess_audio(
+    audio_content: bytes,
+    sample_rate: int,
+    threshold_db: float,
+    bitrate: str
+) -> Tuple[Optional[bytes], Dict[str, float]]:
+    """
+    Decode, downmix, resample, trim and re-encode audio (runs in a worker process)
+    
+    Returns:
+        (encoded Ogg/Opus bytes or None if the clip is entirely silent,
+         per-stage timings in milliseconds)
+    """
+    # Imported in the worker process only; keeps numpy out of app startup
+    import numpy as np
+    
+    timings = {}
+    
+    # Decode to raw PCM; ffmpeg downmixes to mono and resamples in one pass
+    started = time.perf_counter()
+    raw = _run_ffmpeg(
+        ["-i", "pipe:0", "-ac", "1", "-ar", str(sample_rate), "-f", "s16le", "pipe:1"],
+        audio_content
+    )
+    pcm = np.frombuffer(raw, dtype=np.int16)
+    timings["decode_ms"] = (time.perf_counter() - started) * 1000
+    
+    started = time.perf_counter()
+    trimmed = trim_silence(pcm, sample_rate, threshold_db)
+    timings["trim_ms"] = (time.perf_counter() - started) * 1000
+    timings["trimmed_seconds"] = (len(pcm) - len(trimmed)) / sample_rate
+    if len(trimmed) == 0:
+        return None, timings
+    
+    started = time.perf_counter()
+    encoded = _run_ffmpeg(
+        [
+            "-f", "s16le", "-ar", str(sample_rate), "-ac", "1", "-i", "pipe:0",
+            "-c:a", "libopus", "-b:a", bitrate, "-application", "voip", "-f", "ogg", "pipe:1"
+        ],
+        trimmed.tobytes()
+    )
+    timings["encode_ms"] = (time.perf_counter() - started) * 1000
+    
+    return encoded, timings
+
+
+class AudioPreprocessor:
+    """CPU-side audio preprocessing before upload and transcription"""
+    
+    def __init__(self):
+        self.sample_rate = int(os.getenv("AUDIO_SAMPLE_RATE", "16000"))
+        self.silence_threshold_db = float(os.getenv("AUDIO_SILENCE_THRESHOLD_DB", "-40"))
+        self.bitrate = os.getenv("AUDIO_BITRATE", "24k")
+        self.max_workers = int(os.getenv("AUDIO_PREPROCESS_WORKERS", str(min(4, os.cpu_count() or 1))))
+        self.enabled = (
+            os.getenv("AUDIO_PREPROCESS", "true").lower() == "true"
+            and shutil.which("ffmpeg") is not None
+        )
+        self._pool: Optional[ProcessPoolExecutor] = None
+        
+        if not self.enabled:
+            print("⚠️ WARNING: Audio preprocessing disabled (AUDIO_PREPROCESS=false or ffmpeg not found). Uploading audio as-is.")
+    
+    async def process(self, audio_content: bytes, filename: str) -> Tuple[bytes, str, Dict]:
+        """
+        Convert recorded audio to trimmed 16 kHz mono Opus
+        
+        Args:
+            audio_content: Audio file content as bytes (webm, wav, ...)
+            filename: Original filename
+        
+        Returns:
+            (audio bytes, filename, stats) - the original audio and filename
+            are returned unchanged if preprocessing is disabled or fails
+        """
+        stats = {"original_bytes": len(audio_content), "processed_bytes": len(audio_content)}
+        if not self.enabled:
+            return audio_content, filename, stats
+        
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+        
+        started = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            encoded, timings = await loop.run_in_executor(
+                self._pool,
+                preprocess_audio,
+                audio_content,
+                self.sample_rate,
+                self.silence_threshold_db,
+                self.bitrate
+            )
+        except BrokenProcessPool:
+            # A worker died (e.g. OOM-killed); the pool is unusable from now on,
+            # so drop it and let the next call start a fresh one
+            print("⚠️ Audio preprocessing worker pool broke. Restarting it on the next upload; uploading original audio.")
+            self.shutdown()
+            return audio_content, filename, stats
+        except Exception as e:
+            print(f"⚠️ Audio preprocessing failed: {str(e)}. Uploading original audio.")
+            return audio_content, filename, stats
+        
+        stats.update({key: round(value, 2) for key, value in timings.items()})
+        stats["total_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        
+        # Nothing above the silence threshold: keep the original rather than
+        # uploading an empty clip
+        if encoded is None:
+            return audio_content, filename, stats
+        
+        stats["processed_bytes"] = len(encoded)
+        return encoded, f"{os.path.splitext(filename or 'recording')[0]}.ogg", stats
+    
+    def shutdown(self):
+        """Stop the worker processes"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
@@ -1,15 +1,19 @@
-from motor.motor_asyncio import AsyncIOMotorClient
-from typing import Optional, List, Dict
+from typing import AsyncIterator, Optional, List, Dict, TYPE_CHECKING
 from datetime import datetime
 import os
-from bson import ObjectId
+
+if TYPE_CHECKING:
+    from motor.motor_asyncio import AsyncIOMotorClient
 
 class Database:
-    client: Optional[AsyncIOMotorClient] = None
+    client: Optional["AsyncIOMotorClient"] = None
     
     @classmethod
     async def connect_db(cls):
         """Connect to MongoDB"""
+        # Imported on first connect: motor/pymongo are slow to import
+        from motor.motor_asyncio import AsyncIOMotorClient
+        
         cls.client = AsyncIOMotorClient(os.getenv("MONGODB_URI"))
         
     @classmethod
@@ -27,10 +31,42 @@ class Database:
 class MessageService:
     """Service for handling message operations"""
     
+    # Convert ids and dates to response strings inside MongoDB, for the whole
+    # result set at once, instead of per document in a Python loop.
+    # MongoDB stores milliseconds; %L000 pads them to the six fraction digits
+    # format_timestamp() writes, so every response uses one format.
+    SERIALIZE_STAGE = {
+        "$set": {
+            "_id": {"$toString": "$_id"},
+            "timestamp": {"$dateToString": {"date": "$timestamp", "format": "%Y-%m-%dT%H:%M:%S.%L000"}},
+            "created_at": {"$dateToString": {"date": "$created_at", "format": "%Y-%m-%dT%H:%M:%S.%L000"}}
+        }
+    }
+    
+    @staticmethod
+    def format_timestamp(value: datetime) -> str:
+        """Format a date the way SERIALIZE_STAGE does (microseconds always present)"""
+        return value.strftime("%Y-%m-%dT%H:%M:%S.%f")
+    
     def __init__(self):
         self.db = Database.get_db()
         self.collection = self.db.messages
     
+    async def ensure_indexes(self):
+        """Indexes for conversation history, date-range exports and audio references"""
+        await self.collection.create_index([("conversation_id", 1), ("timestamp", 1)])
+        await self.collection.create_index("timestamp")
+        # Retention checks whether any message still references stored audio.
+        # Text messages store None for both, so only index actual references
+        await self.collection.create_index(
+            "audio_hash",
+            partialFilterExpression={"audio_hash": {"$type": "string"}}
+        )
+        await self.collection.create_index(
+            "audio_url",
+            partialFilterExpression={"audio_url": {"$type": "string"}}
+        )
+    
     async def create_message(
         self,
         original_text: str,
@@ -40,9 +76,14 @@ class MessageService:
         target_language: str,
         message_type: str = "text",
         audio_url: Optional[str] = None,
-        conversation_id: Optional[str] = None
+        conversation_id: Optional[str] = None,
+        audio_hash: Optional[str] = None
     ) -> Dict:
         """Create a new message in the database"""
+        # Truncated to the millisecond precision MongoDB stores, so the
+        # response matches what history returns for the same message later
+        now = datetime.utcnow()
+        now = now.replace(microsecond=now.microsecond // 1000 * 1000)
         message = {
             "original_text": original_text,
             "translated_text": translated_text,
@@ -51,15 +92,16 @@ class MessageService:
             "target_language": target_language,
             "message_type": message_type,  # "text" or "audio"
             "audio_url": audio_url,
+            "audio_hash": audio_hash,  # SHA-256 of the uploaded audio bytes
             "conversation_id": conversation_id or "default",
-            "timestamp": datetime.utcnow(),
-            "created_at": datetime.utcnow()
+            "timestamp": now,
+            "created_at": now
         }
         
         result = await self.collection.insert_one(message)
         message["_id"] = str(result.inserted_id)
-        message["timestamp"] = message["timestamp"].isoformat()
-        message["created_at"] = message["created_at"].isoformat()
+        message["timestamp"] = self.format_timestamp(now)
+        message["created_at"] = self.format_timestamp(now)
         
         return message
     
@@ -73,17 +115,70 @@ class MessageService:
         if conversation_id:
             query["conversation_id"] = conversation_id
         
-        cursor = self.collection.find(query).sort("timestamp", -1).limit(limit)
-        messages = []
-        
-        async for doc in cursor:
-            doc["_id"] = str(doc["_id"])
-            doc["timestamp"] = doc["timestamp"].isoformat()
-            doc["created_at"] = doc["created_at"].isoformat()
-            messages.append(doc)
+        cursor = self.collection.aggregate([
+            {"$match": query},
+            {"$sort": {"timestamp": -1, "_id": -1}},
+            {"$limit": limit},
+            self.SERIALIZE_STAGE
+        ])
+        messages = await cursor.to_list(length=limit)
         
         # Return in chronological order
-        return list(reversed(messages))
+        messages.reverse()
+        return messages
+    
+    async def get_latest_message_id(self, conversation_id: str) -> Optional[str]:
+        """Id of the most recent message in a conversation, or None if it has none"""
+        doc = await self.collection.find_one(
+            {"conversation_id": conversation_id},
+            {"_id": 1},
+            sort=[("timestamp", -1), ("_id", -1)]
+        )
+        return str(doc["_id"]) if doc else None
+    
+    async def iter_message_batches(
+        self,
+        conversation_id: Optional[str] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        batch_size: int = 1000
+    ) -> AsyncIterator[List[Dict]]:
+        """
+        Iterate over messages in chronological order, one cursor batch at a time
+        
+        Only one batch is held in memory, so this works for any number of
+        messages. Dates are left as datetimes for the export encoders.
+        
+        Args:
+            conversation_id: Only this conversation (all if None)
+            start: Only messages at or after this time (UTC)
+            end: Only messages before this time (UTC)
+            batch_size: Messages per batch
+        """
+        query = {}
+        if conversation_id:
+            query["conversation_id"] = conversation_id
+        if start or end:
+            query["timestamp"] = {}
+            if start:
+                query["timestamp"]["$gte"] = start
+            if end:
+                query["timestamp"]["$lt"] = end
+        
+        cursor = self.collection.aggregate(
+            [
+                {"$match": query},
+                {"$sort": {"timestamp": 1, "_id": 1}},
+                {"$set": {"_id": {"$toString": "$_id"}}}
+            ],
+            batchSize=batch_size,
+            allowDiskUse=True
+        )
+        while True:
+            batch = await cursor.to_list(length=batch_size)
+            if not batch:
+                break
+            yield batch
     
     async def search_messages(
         self,
@@ -101,17 +196,16 @@ class MessageService:
         if conversation_id:
             search_filter["conversation_id"] = conversation_id
         
-        cursor = self.collection.find(search_filter).sort("timestamp", -1)
-        messages = []
+        cursor = self.collection.aggregate([
+            {"$match": search_filter},
+            {"$sort": {"timestamp": -1}},
+            self.SERIALIZE_STAGE
+        ])
+        messages = await cursor.to_list(length=None)
         
-        async for doc in cursor:
-            doc["_id"] = str(doc["_id"])
-            doc["timestamp"] = doc["timestamp"].isoformat()
-            doc["created_at"] = doc["created_at"].isoformat()
-            
-            # Highlight matched text
+        # Highlight matched text
+        for doc in messages:
             doc["highlight"] = self._highlight_match(query, doc)
-            messages.append(doc)
         
         return messages
     
@@ -137,3 +231,77 @@ class MessageService:
             snippet = snippet + "..."
         
         return snippet
+
+
+class AudioIndexService:
+    """Content-addressed index of uploaded audio: SHA-256 -> (url, transcript)"""
+    
+    def __init__(self):
+        self.db = Database.get_db()
+        self.collection = self.db.audio_index
+    
+    async def reuse(self, content_hash: str) -> Optional[Dict]:
+        """
+        Get the index entry for an audio hash and record that it was reused
+        
+        Both happen in one update, so the retention job cannot claim the
+        entry for deletion in between (see claim_for_deletion).
+        
+        Returns:
+            The entry, or None if the audio is not stored. An entry with
+            `deleting` set is being deleted and must not be reused.
+        """
+        return await self.collection.find_one_and_update(
+            {"_id": content_hash},
+            {"$set": {"last_used": datetime.utcnow()}}
+        )
+    
+    async def save_upload(self, content_hash: str, audio_url: str, public_id: str, size: Optional[int] = None):
+        """Record where the audio with this hash is stored, and its stored size in bytes"""
+        await self.collection.update_one(
+            {"_id": content_hash},
+            {
+                "$set": {"audio_url": audio_url, "public_id": public_id, "size": size, "last_used": datetime.utcnow()},
+                "$setOnInsert": {"transcript": None, "created_at": datetime.utcnow()},
+                # A new copy replaces audio the retention job is deleting
+                "$unset": {"deleting": ""}
+            },
+            upsert=True
+        )
+    
+    async def save_transcript(self, content_hash: str, transcript: str):
+        """Record the transcript of the audio with this hash"""
+        await self.collection.update_one(
+            {"_id": content_hash},
+            {"$set": {"transcript": transcript}}
+        )
+    
+    async def claim_for_deletion(self, content_hash: str, unused_since: datetime) -> Optional[Dict]:
+        """
+        Mark an entry as being deleted, unless it was reused since `unused_since`
+        
+        Returns:
+            The claimed entry (its `deleting` value identifies the claim), or
+            None if it does not exist, was reused recently or is already claimed
+        """
+        return await self.collection.find_one_and_update(
+            {
+                "_id": content_hash,
+                "deleting": {"$exists": False},
+                "last_used": {"$lt": unused_since}
+            },
+            {"$set": {"deleting": datetime.utcnow()}},
+            return_document=True  # ReturnDocument.AFTER, as stored (ms precision)
+        )
+    
+    async def release(self, entry: Dict):
+        """Give up a deletion claim; the audio is still in use"""
+        await self.collection.update_one(
+            {"_id": entry["_id"], "deleting": entry["deleting"]},
+            {"$unset": {"deleting": ""}}
+        )
+    
+    async def delete(self, entry: Dict):
+        """Remove a claimed entry once its audio has been deleted from storage"""
+        # No-op if an upload stored a new copy in the meantime (save_upload)
+        await self.collection.delete_one({"_id": entry["_id"], "deleting": entry["deleting"]})
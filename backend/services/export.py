@@ -0,0 +1,351 @@
+import asyncio
+import os
+import unicodedata
+import zlib
+from datetime import datetime
+from typing import AsyncIterator, Dict, List, Optional
+
+import orjson
+
+from services.database import MessageService
+from services.storage import StorageService
+
+# Columns of an exported message, in order
+EXPORT_FIELDS = [
+    "_id", "conversation_id", "timestamp", "role", "language", "target_language",
+    "message_type", "original_text", "translated_text", "audio_url", "audio_hash", "created_at"
+]
+
+
+class NDJSONEncoder:
+    """One JSON message per line, for EHR import"""
+    
+    media_type = "application/x-ndjson"
+    extension = "ndjson"
+    
+    def begin(self) -> bytes:
+        return b""
+    
+    def write_batch(self, rows: List[Dict]) -> bytes:
+        return b"".join(orjson.dumps(row) + b"\n" for row in rows)
+    
+    def finish(self) -> bytes:
+        return b""
+
+
+class _ChunkSink:
+    """Writable file object whose contents are drained after every batch"""
+    
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+        self.closed = False
+    
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+    
+    def tell(self) -> int:
+        return self._position
+    
+    def flush(self):
+        pass
+    
+    def close(self):
+        self.closed = True
+    
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+class ArrowEncoder:
+    """
+    Columnar export for analytics: Parquet (one row group per batch) or an
+    Arrow IPC stream (one record batch per batch)
+    """
+    
+    def __init__(self, parquet: bool = True):
+        try:
+            import pyarrow
+        except ImportError:
+            raise ValueError("Parquet/Arrow export requires pyarrow (pip install pyarrow)")
+        
+        self.pa = pyarrow
+        self.parquet = parquet
+        self.media_type = "application/vnd.apache.parquet" if parquet else "application/vnd.apache.arrow.stream"
+        self.extension = "parquet" if parquet else "arrow"
+        self.schema = pyarrow.schema([
+            (field, pyarrow.timestamp("ms", tz="UTC") if field in ("timestamp", "created_at") else pyarrow.string())
+            for field in EXPORT_FIELDS
+        ])
+        self._sink = _ChunkSink()
+        self._writer = None
+    
+    def begin(self) -> bytes:
+        if self.parquet:
+            import pyarrow.parquet
+            self._writer = pyarrow.parquet.ParquetWriter(self._sink, self.schema, compression="zstd")
+        else:
+            self._writer = self.pa.ipc.new_stream(self._sink, self.schema)
+        return self._sink.drain()
+    
+    def write_batch(self, rows: List[Dict]) -> bytes:
+        self._writer.write_table(self.pa.Table.from_pylist(rows, schema=self.schema))
+        return self._sink.drain()
+    
+    def finish(self) -> bytes:
+        self._writer.close()
+        return self._sink.drain()
+
+
+class StreamingPDFWriter:
+    """
+    Minimal PDF writer that emits each page as soon as it is full
+    
+    Only the byte offsets of written objects are kept, so memory does not grow
+    with the document. Text is set in the standard Courier fonts (fixed width,
+    so lines wrap exactly without font metrics) using WinAnsiEncoding; symbols
+    and characters outside it (e.g. CJK scripts) cannot be rendered and are
+    dropped or replaced with '?'.
+    """
+    
+    PAGE_WIDTH = 612  # US Letter, in points
+    PAGE_HEIGHT = 792
+    MARGIN = 54
+    FONT_SIZE = 9
+    LEADING = 12
+    CHAR_WIDTH = 0.6  # Courier advance width, in ems
+    
+    # Objects 1-4 are fixed; page and content objects are numbered from 5
+    CATALOG, PAGES, FONT, FONT_BOLD = 1, 2, 3, 4
+    
+    def __init__(self):
+        self.columns = int((self.PAGE_WIDTH - 2 * self.MARGIN) / (self.FONT_SIZE * self.CHAR_WIDTH))
+        self.lines_per_page = int((self.PAGE_HEIGHT - 2 * self.MARGIN) / self.LEADING)
+        self._offsets: Dict[int, int] = {}
+        self._position = 0
+        self._next_object = 5
+        self._page_objects: List[int] = []
+        self._lines: List[tuple] = []
+    
+    def begin(self) -> bytes:
+        output = self._emit(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        output += self._object(self.FONT, b"<< /Type /Font /Subtype /Type1 /BaseFont /Courier /Encoding /WinAnsiEncoding >>")
+        output += self._object(self.FONT_BOLD, b"<< /Type /Font /Subtype /Type1 /BaseFont /Courier-Bold /Encoding /WinAnsiEncoding >>")
+        return output
+    
+    def add_text(self, text: str, bold: bool = False, indent: int = 0) -> bytes:
+        """
+        Add wrapped text
+        
+        Returns:
+            Bytes of any pages completed by this text
+        """
+        output = b""
+        width = self.columns - indent
+        for paragraph in (text or "").splitlines() or [""]:
+            paragraph = paragraph.rstrip()
+            while True:
+                if len(paragraph) <= width:
+                    line, paragraph = paragraph, None
+                else:
+                    cut = paragraph.rfind(" ", 0, width + 1)
+                    if cut <= 0:
+                        cut = width
+                    line, paragraph = paragraph[:cut], paragraph[cut:].lstrip()
+                output += self._add_line(" " * indent + line, bold)
+                if paragraph is None:
+                    break
+        return output
+    
+    def add_blank_line(self) -> bytes:
+        # Not at the top of a page
+        return self._add_line("", False) if self._lines else b""
+    
+    def finish(self) -> bytes:
+        output = self._flush_page() if self._lines or not self._page_objects else b""
+        kids = b" ".join(b"%d 0 R" % number for number in self._page_objects)
+        output += self._object(
+            self.PAGES,
+            b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(self._page_objects))
+        )
+        output += self._object(self.CATALOG, b"<< /Type /Catalog /Pages %d 0 R >>" % self.PAGES)
+        
+        xref_offset = self._position
+        count = self._next_object
+        xref = [b"xref\n0 %d\n" % count, b"0000000000 65535 f \n"]
+        xref.extend(b"%010d 00000 n \n" % self._offsets[number] for number in range(1, count))
+        xref.append(b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (count, self.CATALOG, xref_offset))
+        return output + self._emit(b"".join(xref))
+    
+    def _add_line(self, line: str, bold: bool) -> bytes:
+        self._lines.append((line, bold))
+        if len(self._lines) >= self.lines_per_page:
+            return self._flush_page()
+        return b""
+    
+    def _flush_page(self) -> bytes:
+        commands = [b"BT", b"%d TL" % self.LEADING, b"%d %d Td" % (self.MARGIN, self.PAGE_HEIGHT - self.MARGIN - self.FONT_SIZE)]
+        current_font = None
+        for line, bold in self._lines:
+            font = b"/F2" if bold else b"/F1"
+            if font != current_font:
+                commands.append(b"%s %d Tf" % (font, self.FONT_SIZE))
+                current_font = font
+            commands.append(b"(%s) Tj T*" % self._encode(line))
+        commands.append(b"ET")
+        self._lines = []
+        
+        stream = zlib.compress(b"\n".join(commands))
+        content_number = self._allocate()
+        page_number = self._allocate()
+        self._page_objects.append(page_number)
+        
+        output = self._object(
+            content_number,
+            b"<< /Length %d /Filter /FlateDecode >>\nstream\n%s\nendstream" % (len(stream), stream)
+        )
+        output += self._object(
+            page_number,
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 %d %d] "
+            b"/Resources << /Font << /F1 %d 0 R /F2 %d 0 R >> >> /Contents %d 0 R >>"
+            % (self.PAGES, self.PAGE_WIDTH, self.PAGE_HEIGHT, self.FONT, self.FONT_BOLD, content_number)
+        )
+        return output
+    
+    def _encode(self, text: str) -> bytes:
+        # Drop emoji and other symbols the standard fonts cannot draw; other
+        # unsupported letters become '?'
+        text = "".join(
+            char for char in text
+            if char.encode("cp1252", "ignore") or unicodedata.category(char)[0] in "LN"
+        )
+        encoded = text.encode("cp1252", errors="replace")
+        return encoded.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)")
+    
+    def _allocate(self) -> int:
+        number = self._next_object
+        self._next_object += 1
+        return number
+    
+    def _object(self, number: int, body: bytes) -> bytes:
+        self._offsets[number] = self._position
+        return self._emit(b"%d 0 obj\n%s\nendobj\n" % (number, body))
+    
+    def _emit(self, data: bytes) -> bytes:
+        self._position += len(data)
+        return data
+
+
+class PDFTranscriptEncoder:
+    """Printable consultation transcript, preceded by the AI summary if given"""
+    
+    media_type = "application/pdf"
+    extension = "pdf"
+    
+    def __init__(self, title: str, summary: Optional[str] = None):
+        self.title = title
+        self.summary = summary
+        self._pdf = StreamingPDFWriter()
+        self._count = 0
+    
+    def begin(self) -> bytes:
+        output = self._pdf.begin()
+        output += self._pdf.add_text(self.title, bold=True)
+        output += self._pdf.add_text(f"Exported {datetime.utcnow().strftime('%Y-%m-%d %H:%M')} UTC")
+        if self.summary:
+            output += self._pdf.add_blank_line()
+            output += self._pdf.add_text("Summary", bold=True)
+            output += self._pdf.add_text(self.summary)
+        output += self._pdf.add_blank_line()
+        output += self._pdf.add_text("Transcript", bold=True)
+        return output
+    
+    def write_batch(self, rows: List[Dict]) -> bytes:
+        output = b""
+        for row in rows:
+            timestamp = row.get("timestamp")
+            if isinstance(timestamp, datetime):
+                timestamp = timestamp.strftime("%Y-%m-%d %H:%M:%S")
+            role = (row.get("role") or "unknown").capitalize()
+            header = f"[{timestamp}] {role} ({row.get('language')} -> {row.get('target_language')})"
+            if row.get("message_type") == "audio":
+                header += " [audio]"
+            
+            output += self._pdf.add_blank_line()
+            output += self._pdf.add_text(header, bold=True)
+            output += self._pdf.add_text(row.get("original_text", ""), indent=2)
+            if row.get("translated_text") and row["translated_text"] != row.get("original_text"):
+                output += self._pdf.add_text("Translation: " + row["translated_text"], indent=2)
+        self._count += len(rows)
+        return output
+    
+    def finish(self) -> bytes:
+        output = b""
+        if self._count == 0:
+            output += self._pdf.add_blank_line()
+            output += self._pdf.add_text("No messages.")
+        return output + self._pdf.finish()
+
+
+class ExportService:
+    """Stream conversations out of MongoDB in bulk formats, batch by batch"""
+    
+    FORMATS = ("ndjson", "parquet", "arrow", "pdf")
+    
+    def __init__(self, message_service: MessageService, storage_service: StorageService):
+        self.message_service = message_service
+        self.storage_service = storage_service
+        # Messages fetched from the cursor and encoded at a time
+        self.batch_size = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+    
+    def create_encoder(self, export_format: str, title: str = "", summary: Optional[str] = None):
+        """
+        Create the encoder for a format
+        
+        Raises:
+            ValueError: Unknown format, or its optional dependency is missing
+        """
+        if export_format == "ndjson":
+            return NDJSONEncoder()
+        if export_format in ("parquet", "arrow"):
+            return ArrowEncoder(parquet=export_format == "parquet")
+        if export_format == "pdf":
+            return PDFTranscriptEncoder(title, summary)
+        raise ValueError(f"Unsupported export format '{export_format}' (expected one of: {', '.join(self.FORMATS)})")
+    
+    async def stream(
+        self,
+        encoder,
+        conversation_id: Optional[str] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None
+    ) -> AsyncIterator[bytes]:
+        """
+        Encoded export, one chunk per cursor batch
+        
+        Encoding runs in a thread so large batches do not block the event loop.
+        Stored audio references are replaced with playable URLs, as in history.
+        """
+        chunk = encoder.begin()
+        if chunk:
+            yield chunk
+        async for rows in self.message_service.iter_message_batches(
+            conversation_id=conversation_id,
+            start=start,
+            end=end,
+            batch_size=self.batch_size
+        ):
+            for row in rows:
+                if row.get("audio_url"):
+                    row["audio_url"] = self.storage_service.playback_url(row["audio_url"])
+            chunk = await asyncio.to_thread(encoder.write_batch, rows)
+            if chunk:
+                yield chunk
+        chunk = encoder.finish()
+        if chunk:
+            yield chunk
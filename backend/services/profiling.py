@@ -0,0 +1,152 @@
+import asyncio
+import os
+import random
+import re
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import Dict, Optional
+
+
+class EventLoopMonitor:
+    """
+    Detect blocking calls on the event loop
+    
+    A task on the loop records a heartbeat every `interval_ms`; a watchdog
+    thread notices when the heartbeat stops for longer than `threshold_ms`
+    and captures the loop thread's stack at that moment. This names the
+    synchronous call responsible (e.g. a blocking SDK call such as a
+    Cloudinary upload) without asyncio debug mode overhead.
+    """
+    
+    def __init__(self, threshold_ms: float = 100, interval_ms: float = 20):
+        self.threshold = threshold_ms / 1000
+        self.interval = interval_ms / 1000
+        self.stalls = deque(maxlen=20)
+        self.metrics = {"stalls": 0, "max_lag_ms": 0.0}
+        self._heartbeat = time.monotonic()
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stop = threading.Event()
+    
+    def start(self):
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._task = asyncio.create_task(self._beat())
+        threading.Thread(target=self._watch, name="event-loop-watchdog", daemon=True).start()
+    
+    def stop(self):
+        self._stop.set()
+        if self._task:
+            self._task.cancel()
+    
+    async def _beat(self):
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            self._heartbeat = now
+            lag_ms = (now - expected) * 1000
+            self.metrics["max_lag_ms"] = round(max(self.metrics["max_lag_ms"], lag_ms), 2)
+    
+    def _watch(self):
+        reported_heartbeat = None
+        while not self._stop.wait(self.threshold / 2):
+            heartbeat = self._heartbeat
+            blocked = time.monotonic() - heartbeat
+            if blocked < self.threshold or heartbeat == reported_heartbeat:
+                continue
+            # Report each stall once, with the stack of whatever is blocking
+            reported_heartbeat = heartbeat
+            frame = sys._current_frames().get(self._loop_thread_id)
+            stack = "".join(traceback.format_stack(frame)) if frame else ""
+            self.metrics["stalls"] += 1
+            self.stalls.append({
+                "at": datetime.utcnow().isoformat(),
+                "blocked_ms": round(blocked * 1000, 2),
+                "stack": stack
+            })
+            location = traceback.extract_stack(frame)[-1] if frame else None
+            where = f" in {location.name} ({location.filename}:{location.lineno})" if location else ""
+            print(f"⚠️ Event loop blocked for {blocked * 1000:.0f}ms+{where}")
+    
+    def get_metrics(self) -> Dict:
+        return {
+            **self.metrics,
+            "tasks": len(asyncio.all_tasks()),
+            "recent_stalls": list(self.stalls)
+        }
+
+
+class RequestProfiler:
+    """
+    Per-request sampling profiles, written to PROFILE_DIR
+    
+    A request is profiled when it sends an `X-Profile: 1` header, or at random
+    with probability PROFILE_SAMPLE_RATE. pyinstrument (optional) produces an
+    HTML call tree per request; without it cProfile statistics are written
+    instead, which also include other requests running at the same time.
+    One request is profiled at a time.
+    """
+    
+    def __init__(self, directory: str = "profiles", sample_rate: float = 0.0):
+        self.directory = directory
+        self.sample_rate = sample_rate
+        self._busy = False
+        try:
+            import pyinstrument
+            self._pyinstrument = pyinstrument
+        except ImportError:
+            self._pyinstrument = None
+    
+    def should_profile(self, headers) -> bool:
+        if self._busy:
+            return False
+        return headers.get("x-profile") == "1" or random.random() < self.sample_rate
+    
+    @asynccontextmanager
+    async def profile(self, name: str):
+        """Profile the enclosed block and write the result to a file"""
+        self._busy = True
+        started = time.perf_counter()
+        if self._pyinstrument:
+            profiler = self._pyinstrument.Profiler(async_mode="enabled")
+            profiler.start()
+        else:
+            import cProfile
+            profiler = cProfile.Profile()
+            profiler.enable()
+        try:
+            yield
+        finally:
+            if self._pyinstrument:
+                profiler.stop()
+            else:
+                profiler.disable()
+            self._busy = False
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            slug = re.sub(r"[^A-Za-z0-9]+", "_", name).strip("_")
+            path = os.path.join(self.directory, f"{datetime.utcnow().strftime('%Y%m%dT%H%M%S%f')}_{slug}")
+            await asyncio.to_thread(self._write, profiler, path)
+            print(f"🔬 Profiled {name} ({elapsed_ms:.0f}ms): {path}")
+    
+    def _write(self, profiler, path: str):
+        os.makedirs(self.directory, exist_ok=True)
+        if self._pyinstrument:
+            with open(path + ".html", "w", encoding="utf-8") as file:
+                file.write(profiler.output_html())
+        else:
+            import io
+            import pstats
+            output = io.StringIO()
+            pstats.Stats(profiler, stream=output).sort_stats("cumulative").print_stats(60)
+            with open(path + ".txt", "w", encoding="utf-8") as file:
+                file.write(output.getvalue())
+
+
+def profiling_enabled() -> bool:
+    return os.getenv("PROFILING_ENABLED", "false").lower() == "true"
@@ -0,0 +1,125 @@
+import asyncio
+import inspect
+import time
+from typing import Any, Callable, Dict, Iterable, Optional
+
+
+class ServiceRegistry:
+    """
+    Lazily and concurrently initialized application services
+    
+    Services are registered with a factory and the names of services they
+    depend on. Nothing is constructed at import time: start_warm_up() starts every
+    service in the background as soon as the app boots, in parallel where
+    dependencies allow, and get() awaits (or triggers) a single service so
+    requests arriving before warm-up finishes simply wait for what they need.
+    """
+    
+    def __init__(self):
+        self._factories: Dict[str, Callable] = {}
+        self._dependencies: Dict[str, tuple] = {}
+        self._instances: Dict[str, Any] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self.timings: Dict[str, float] = {}
+        self.errors: Dict[str, str] = {}
+        self._warm_up_started: Optional[float] = None
+        self._warm_up_finished: Optional[float] = None
+    
+    def register(self, name: str, factory: Callable, depends_on: Iterable[str] = ()):
+        """
+        Register a service
+        
+        Args:
+            name: Service name
+            factory: Callable creating the service. Async factories are
+                awaited; sync ones (constructors, SDK imports) run in a thread
+                so they do not block the event loop
+            depends_on: Services that must be initialized first
+        """
+        self._factories[name] = factory
+        self._dependencies[name] = tuple(depends_on)
+    
+    async def get(self, name: str) -> Any:
+        """Get a service, initializing it (and its dependencies) if needed"""
+        if name in self._instances:
+            return self._instances[name]
+        
+        task = self._tasks.get(name)
+        # A failed initialization is retried on the next request
+        if task is None or (task.done() and task.exception() is not None):
+            task = asyncio.create_task(self._initialize(name))
+            self._tasks[name] = task
+        return await asyncio.shield(task)
+    
+    def peek(self, name: str) -> Any:
+        """Get a service if it is already initialized, without waiting"""
+        return self._instances.get(name)
+    
+    async def _initialize(self, name: str) -> Any:
+        started = time.perf_counter()
+        try:
+            for dependency in self._dependencies[name]:
+                await self.get(dependency)
+            started = time.perf_counter()
+            
+            factory = self._factories[name]
+            if inspect.iscoroutinefunction(factory):
+                instance = await factory()
+            else:
+                instance = await asyncio.to_thread(factory)
+        except Exception as e:
+            self.errors[name] = f"{type(e).__name__}: {str(e)}"
+            print(f"❌ Failed to initialize {name}: {self.errors[name]}")
+            raise
+        
+        self.timings[name] = (time.perf_counter() - started) * 1000
+        self.errors.pop(name, None)
+        self._instances[name] = instance
+        return instance
+    
+    def start_warm_up(self) -> asyncio.Task:
+        """Start initializing every service in the background"""
+        self._warm_up_started = time.perf_counter()
+        return asyncio.create_task(self._warm_up())
+    
+    async def _warm_up(self):
+        results = await asyncio.gather(
+            *(self.get(name) for name in self._factories),
+            return_exceptions=True
+        )
+        self._warm_up_finished = time.perf_counter()
+        
+        report = self.startup_report()
+        failed = [name for name, result in zip(self._factories, results) if isinstance(result, Exception)]
+        timings = ", ".join(f"{name} {ms:.0f}ms" for name, ms in report["services"].items())
+        print(f"✅ Services warmed up in {report['warm_up_ms']:.0f}ms ({timings})")
+        if failed:
+            print(f"⚠️ Services not ready, will retry on first use: {', '.join(failed)}")
+    
+    def is_ready(self) -> bool:
+        return all(name in self._instances for name in self._factories)
+    
+    def status(self) -> Dict[str, str]:
+        """Initialization state of each service"""
+        result = {}
+        for name in self._factories:
+            if name in self._instances:
+                result[name] = "ready"
+            elif name in self.errors:
+                result[name] = f"failed: {self.errors[name]}"
+            elif name in self._tasks:
+                result[name] = "initializing"
+            else:
+                result[name] = "not started"
+        return result
+    
+    def startup_report(self) -> Dict:
+        """Per-service initialization times and total warm-up time"""
+        warm_up_ms = None
+        if self._warm_up_started is not None and self._warm_up_finished is not None:
+            warm_up_ms = (self._warm_up_finished - self._warm_up_started) * 1000
+        return {
+            "warm_up_ms": round(warm_up_ms, 2) if warm_up_ms is not None else None,
+            "services": {name: round(ms, 2) for name, ms in self.timings.items()},
+            "status": self.status()
+        }
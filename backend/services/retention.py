@@ -0,0 +1,319 @@
+import asyncio
+import os
+import time
+import zlib
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+import orjson
+
+from services.database import AudioIndexService, Database, MessageService
+from services.shared_state import SharedState
+from services.storage import StorageService
+from services.summary_precompute import SummaryPrecomputeService
+
+
+class RetentionService:
+    """
+    Archive inactive conversations and delete their stored audio
+    
+    A conversation whose last message is older than RETENTION_ARCHIVE_AFTER_DAYS
+    is considered closed. Its messages are moved into compressed chunks in the
+    `archived_messages` collection, a record with its AI summary is kept in
+    `archived_conversations`, and audio no longer referenced by any message is
+    deleted from storage. This keeps the `messages` working set and indexes
+    bounded. Disabled unless RETENTION_ARCHIVE_AFTER_DAYS is set.
+    """
+    
+    # First delay before retrying when the shared state or database fails
+    RETRY_DELAY = 5
+    # Audio reused by an upload this recently is never deleted: the upload's
+    # message may not have been saved yet
+    AUDIO_REUSE_GRACE = timedelta(hours=1)
+    
+    def __init__(
+        self,
+        message_service: MessageService,
+        audio_index_service: AudioIndexService,
+        storage_service: StorageService,
+        summary_precompute: SummaryPrecomputeService,
+        shared_state: SharedState
+    ):
+        self.message_service = message_service
+        self.audio_index_service = audio_index_service
+        self.storage_service = storage_service
+        self.summary_precompute = summary_precompute
+        self.shared_state = shared_state
+        
+        self.db = Database.get_db()
+        self.conversations = self.db.archived_conversations
+        self.chunks = self.db.archived_messages
+        
+        self.archive_after_days = float(os.getenv("RETENTION_ARCHIVE_AFTER_DAYS", "0"))
+        # Archives are deleted after this many days (0 keeps them forever)
+        self.archive_retention_days = float(os.getenv("RETENTION_ARCHIVE_KEEP_DAYS", "0"))
+        self.interval = float(os.getenv("RETENTION_INTERVAL_HOURS", "24")) * 60 * 60
+        self.conversations_per_run = int(os.getenv("RETENTION_CONVERSATIONS_PER_RUN", "100"))
+        self.chunk_size = int(os.getenv("RETENTION_CHUNK_MESSAGES", "1000"))
+        self.delete_concurrency = int(os.getenv("RETENTION_DELETE_CONCURRENCY", "8"))
+        
+        self.metrics = {
+            "runs": 0,
+            "conversations_archived": 0,
+            "messages_archived": 0,
+            "message_bytes": 0,  # size of the archived messages as JSON
+            "archive_bytes": 0,  # size after compression
+            "audio_files_deleted": 0,
+            "audio_bytes_reclaimed": 0,
+            "audio_delete_failures": 0,
+            "last_run_at": None,
+            "last_run_ms": None
+        }
+    
+    @property
+    def enabled(self) -> bool:
+        return self.archive_after_days > 0
+    
+    async def ensure_indexes(self):
+        await self.conversations.create_index("conversation_id")
+        await self.chunks.create_index([("archive_id", 1), ("seq", 1)])
+        if self.archive_retention_days > 0:
+            expire_after = int(self.archive_retention_days * 24 * 60 * 60)
+            await self.conversations.create_index("archived_at", expireAfterSeconds=expire_after)
+            await self.chunks.create_index("archived_at", expireAfterSeconds=expire_after)
+    
+    async def run_forever(self):
+        """Archive periodically; with several workers only one runs each interval"""
+        delay = self.RETRY_DELAY
+        while True:
+            try:
+                # A one-token bucket refilled once per interval acts as a
+                # cross-worker lease: the first worker to take it does the run
+                wait = await self.shared_state.take_tokens(
+                    "retention:run",
+                    cost=1,
+                    rate=1 / self.interval,
+                    capacity=1
+                )
+                if wait == 0:
+                    await self.run_once()
+                    wait = self.interval
+                delay = self.RETRY_DELAY
+            except Exception as e:
+                # Shared state or database unreachable: retry with backoff
+                # (a failed run just finds the lease taken until the next interval)
+                wait = delay
+                delay = min(delay * 2, self.interval)
+                print(f"❌ Retention run failed, retrying in {wait:.0f}s: {str(e)}")
+            await asyncio.sleep(wait)
+    
+    async def run_once(self) -> Dict:
+        """
+        Archive the conversations that have been inactive past the cutoff
+        
+        Returns:
+            Statistics for this run
+        """
+        started = time.perf_counter()
+        cutoff = datetime.utcnow() - timedelta(days=self.archive_after_days)
+        run = {"conversations": 0, "messages": 0, "message_bytes": 0, "archive_bytes": 0}
+        audio: Dict[str, Optional[str]] = {}
+        
+        for conversation_id in await self._closed_conversations(cutoff):
+            stats = await self.archive_conversation(conversation_id, cutoff)
+            audio.update(stats.pop("audio"))
+            run["conversations"] += 1
+            for key in ("messages", "message_bytes", "archive_bytes"):
+                run[key] += stats[key]
+        
+        deleted = await self.delete_unreferenced_audio(audio)
+        run.update(deleted)
+        
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.metrics["runs"] += 1
+        self.metrics["conversations_archived"] += run["conversations"]
+        self.metrics["messages_archived"] += run["messages"]
+        self.metrics["message_bytes"] += run["message_bytes"]
+        self.metrics["archive_bytes"] += run["archive_bytes"]
+        self.metrics["audio_files_deleted"] += deleted["audio_files_deleted"]
+        self.metrics["audio_bytes_reclaimed"] += deleted["audio_bytes_reclaimed"]
+        self.metrics["audio_delete_failures"] += deleted["audio_delete_failures"]
+        self.metrics["last_run_at"] = datetime.utcnow().isoformat()
+        self.metrics["last_run_ms"] = round(elapsed_ms, 2)
+        
+        print(
+            f"🗄️ Archived {run['conversations']} conversations ({run['messages']} messages, "
+            f"{run['message_bytes'] / 1024:.0f} KiB -> {run['archive_bytes'] / 1024:.0f} KiB), "
+            f"deleted {deleted['audio_files_deleted']} audio files in {elapsed_ms:.0f}ms"
+        )
+        return run
+    
+    async def _closed_conversations(self, cutoff: datetime) -> List[str]:
+        """Conversations whose last message is older than the cutoff"""
+        cursor = self.message_service.collection.aggregate([
+            {"$group": {"_id": "$conversation_id", "last_message_at": {"$max": "$timestamp"}}},
+            {"$match": {"last_message_at": {"$lt": cutoff}}},
+            {"$sort": {"last_message_at": 1}},
+            {"$limit": self.conversations_per_run}
+        ], allowDiskUse=True)
+        return [doc["_id"] async for doc in cursor]
+    
+    async def archive_conversation(self, conversation_id: str, cutoff: datetime) -> Dict:
+        """
+        Move one conversation's messages (older than the cutoff) into the archive
+        
+        Chunks are written before the messages are deleted, so an interrupted
+        run never loses messages; at worst a conversation is archived twice.
+        The precomputed summary is reused unless it is missing, stale or a
+        fallback.
+        
+        Returns:
+            Statistics, including the audio the messages referenced (URL -> hash)
+        """
+        summary = None
+        try:
+            summary, _ = await self.summary_precompute.get_summary(conversation_id)
+        except Exception as e:
+            print(f"⚠️ Archiving {conversation_id} without summary: {str(e)}")
+        
+        archived_at = datetime.utcnow()
+        archive_id = f"{conversation_id}:{archived_at.strftime('%Y%m%dT%H%M%S%f')}"
+        stats = {"messages": 0, "message_bytes": 0, "archive_bytes": 0, "audio": {}}
+        first_message_at = last_message_at = None
+        seq = 0
+        
+        async for rows in self.message_service.iter_message_batches(
+            conversation_id=conversation_id,
+            end=cutoff,
+            batch_size=self.chunk_size
+        ):
+            data = orjson.dumps(rows)
+            compressed = zlib.compress(data, 9)
+            await self.chunks.insert_one({
+                "archive_id": archive_id,
+                "conversation_id": conversation_id,
+                "seq": seq,
+                "message_count": len(rows),
+                "encoding": "zlib+json",
+                "data": compressed,
+                "archived_at": archived_at
+            })
+            seq += 1
+            stats["messages"] += len(rows)
+            stats["message_bytes"] += len(data)
+            stats["archive_bytes"] += len(compressed)
+            # Messages from before content hashing have only the URL
+            stats["audio"].update((row["audio_url"], row.get("audio_hash")) for row in rows if row.get("audio_url"))
+            first_message_at = first_message_at or rows[0]["timestamp"]
+            last_message_at = rows[-1]["timestamp"]
+        
+        if stats["messages"] == 0:
+            return stats
+        
+        await self.conversations.insert_one({
+            "_id": archive_id,
+            "conversation_id": conversation_id,
+            "summary": summary,
+            "message_count": stats["messages"],
+            "chunks": seq,
+            "first_message_at": first_message_at,
+            "last_message_at": last_message_at,
+            "message_bytes": stats["message_bytes"],
+            "archive_bytes": stats["archive_bytes"],
+            "archived_at": archived_at
+        })
+        await self.message_service.collection.delete_many({
+            "conversation_id": conversation_id,
+            "timestamp": {"$lt": cutoff}
+        })
+        # The archive record keeps the summary; drop the precomputed copy
+        await self.db.summaries.delete_one({"_id": conversation_id})
+        return stats
+    
+    async def delete_unreferenced_audio(self, audio: Dict[str, Optional[str]]) -> Dict:
+        """
+        Delete stored audio that no remaining message refers to
+        
+        Deduplicated audio can be shared by several conversations, so each
+        file is only deleted once no message references its URL or hash.
+        
+        Hashed audio may be reused by an upload at any moment. Its index entry
+        is first claimed (AudioIndexService.claim_for_deletion), which fails
+        if an upload reused it within AUDIO_REUSE_GRACE, and references are
+        checked again under the claim. Uploads that find a claimed entry store
+        a new copy instead. Audio stored before content hashing has no entry;
+        its key is recovered from the URL. Deletions run concurrently, a
+        bounded number at a time.
+        
+        Args:
+            audio: Stored audio URL -> content hash (None for older messages)
+        """
+        result = {"audio_files_deleted": 0, "audio_bytes_reclaimed": 0, "audio_delete_failures": 0}
+        semaphore = asyncio.Semaphore(self.delete_concurrency)
+        
+        async def is_referenced(audio_url: str, content_hash: Optional[str]) -> bool:
+            references = [{"audio_url": audio_url}]
+            if content_hash:
+                references.append({"audio_hash": content_hash})
+            return await self.message_service.collection.count_documents({"$or": references}, limit=1) > 0
+        
+        async def delete(audio_url: str, content_hash: Optional[str]):
+            async with semaphore:
+                if await is_referenced(audio_url, content_hash):
+                    return
+                
+                entry = None
+                if content_hash:
+                    entry = await self.audio_index_service.claim_for_deletion(
+                        content_hash,
+                        unused_since=datetime.utcnow() - self.AUDIO_REUSE_GRACE
+                    )
+                    if entry is None:
+                        return  # reused recently, already deleted or being deleted
+                    if await is_referenced(audio_url, content_hash):
+                        await self.audio_index_service.release(entry)
+                        return
+                    key = entry["public_id"]
+                else:
+                    key = self.storage_service.key_from_url(audio_url)
+                    if not key:
+                        print(f"⚠️ Cannot locate stored audio for {audio_url}")
+                        result["audio_delete_failures"] += 1
+                        return
+                
+                try:
+                    await self.storage_service.delete_audio(key)
+                except Exception as e:
+                    print(f"⚠️ {str(e)}")
+                    result["audio_delete_failures"] += 1
+                    if entry:
+                        await self.audio_index_service.release(entry)
+                    return
+                if entry:
+                    await self.audio_index_service.delete(entry)
+                result["audio_files_deleted"] += 1
+                result["audio_bytes_reclaimed"] += (entry or {}).get("size") or 0
+        
+        await asyncio.gather(*(delete(audio_url, content_hash) for audio_url, content_hash in audio.items()))
+        return result
+    
+    async def get_metrics(self) -> Dict:
+        """Cumulative statistics of this worker, plus current archive size"""
+        archive = await self.conversations.aggregate([
+            {"$group": {
+                "_id": None,
+                "conversations": {"$sum": 1},
+                "messages": {"$sum": "$message_count"},
+                "message_bytes": {"$sum": "$message_bytes"},
+                "archive_bytes": {"$sum": "$archive_bytes"}
+            }}
+        ]).to_list(length=1)
+        totals = archive[0] if archive else {}
+        totals.pop("_id", None)
+        return {
+            "enabled": self.enabled,
+            "archive_after_days": self.archive_after_days,
+            **self.metrics,
+            "bytes_reclaimed": self.metrics["message_bytes"] - self.metrics["archive_bytes"] + self.metrics["audio_bytes_reclaimed"],
+            "archive": totals
+        }
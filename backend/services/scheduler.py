@@ -0,0 +1,413 @@
+import asyncio
+import os
+import time
+from collections import OrderedDict, deque
+from contextvars import ContextVar
+from typing import Awaitable, Callable, Dict, Optional
+
+import httpx
+
+from services.tracing import SPAN_KIND_CLIENT, span
+
+# Live consultation traffic is always dispatched before bulk/summary work
+PRIORITY_LIVE = 0
+PRIORITY_BULK = 1
+
+# Tenant (clinic) of the request being handled, set by middleware in main.py
+current_tenant: ContextVar[str] = ContextVar("current_tenant", default="default")
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at `rate` tokens per second"""
+    
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+    
+    def _refill(self, now: float, rate: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * rate)
+        self.updated = now
+    
+    def wait_time(self, cost: float, rate_factor: float = 1.0) -> float:
+        """Seconds until `cost` tokens are available (0 if available now)"""
+        rate = self.rate * rate_factor
+        self._refill(time.monotonic(), rate)
+        cost = min(cost, self.capacity)
+        if self.tokens >= cost:
+            return 0.0
+        return (cost - self.tokens) / rate
+    
+    def take(self, cost: float):
+        """Remove tokens; call only after wait_time() returned 0"""
+        self.tokens -= min(cost, self.capacity)
+
+
+class UpstreamLimit:
+    """Request and unit (characters/tokens) limits for one upstream API"""
+    
+    def __init__(
+        self,
+        requests_per_sec: float,
+        request_burst: float,
+        units_per_sec: Optional[float] = None,
+        unit_burst: Optional[float] = None,
+        tenant_share: float = 1.0
+    ):
+        """
+        Args:
+            requests_per_sec: Sustained request rate
+            request_burst: Requests allowed back-to-back after idling
+            units_per_sec: Sustained rate of billed units (None = unlimited)
+            unit_burst: Units allowed back-to-back after idling
+            tenant_share: Fraction of the upstream limits a single tenant may use
+        """
+        self.requests_per_sec = requests_per_sec
+        self.request_burst = request_burst
+        self.units_per_sec = units_per_sec
+        self.unit_burst = unit_burst or units_per_sec
+        self.tenant_share = tenant_share
+    
+    @classmethod
+    def from_env(cls, name: str, **defaults) -> "UpstreamLimit":
+        """Read SCHEDULER_<NAME>_{RPS,BURST,UNITS_PER_SEC,UNIT_BURST,TENANT_SHARE} overrides"""
+        prefix = f"SCHEDULER_{name.upper()}_"
+        
+        def value(key: str, default):
+            raw = os.getenv(prefix + key)
+            return float(raw) if raw else default
+        
+        return cls(
+            requests_per_sec=value("RPS", defaults["requests_per_sec"]),
+            request_burst=value("BURST", defaults["request_burst"]),
+            units_per_sec=value("UNITS_PER_SEC", defaults.get("units_per_sec")),
+            unit_burst=value("UNIT_BURST", defaults.get("unit_burst")),
+            tenant_share=value("TENANT_SHARE", defaults.get("tenant_share", 1.0))
+        )
+
+
+class _Waiter:
+    """A queued call waiting for upstream capacity"""
+    
+    def __init__(self, tenant: str, cost: float, priority: int):
+        self.tenant = tenant
+        self.cost = cost
+        self.priority = priority
+        self.enqueued_at = time.monotonic()
+        self.future = asyncio.get_running_loop().create_future()
+
+
+class _UpstreamQueue:
+    """Buckets, fair queues, adaptive throttle state and metrics for one upstream"""
+    
+    # Multiplicative decrease on 429, additive recovery on success
+    THROTTLE_DECREASE = 0.5
+    THROTTLE_RECOVERY = 0.05
+    THROTTLE_FLOOR = 0.05
+    
+    def __init__(self, name: str, limit: UpstreamLimit):
+        self.name = name
+        self.limit = limit
+        self.request_bucket = TokenBucket(limit.requests_per_sec, limit.request_burst)
+        self.unit_bucket = (
+            TokenBucket(limit.units_per_sec, limit.unit_burst)
+            if limit.units_per_sec else None
+        )
+        self.tenant_buckets: Dict[str, tuple] = {}
+        
+        # priority -> tenant -> deque of waiters, tenants served round-robin
+        self.queues: Dict[int, "OrderedDict[str, deque]"] = {
+            PRIORITY_LIVE: OrderedDict(),
+            PRIORITY_BULK: OrderedDict()
+        }
+        self.dispatcher: Optional[asyncio.Task] = None
+        
+        self.rate_factor = 1.0
+        self.blocked_until = 0.0
+        
+        self.granted = {PRIORITY_LIVE: 0, PRIORITY_BULK: 0}
+        self.wait_total = {PRIORITY_LIVE: 0.0, PRIORITY_BULK: 0.0}
+        self.wait_max = {PRIORITY_LIVE: 0.0, PRIORITY_BULK: 0.0}
+        self.recent_waits = {PRIORITY_LIVE: deque(maxlen=500), PRIORITY_BULK: deque(maxlen=500)}
+        self.throttled_responses = 0
+    
+    def _tenant_buckets(self, tenant: str) -> tuple:
+        """Per-tenant quota buckets, a tenant_share slice of the upstream limits"""
+        if tenant not in self.tenant_buckets:
+            share = self.limit.tenant_share
+            self.tenant_buckets[tenant] = (
+                TokenBucket(self.limit.requests_per_sec * share, max(1.0, self.limit.request_burst * share)),
+                TokenBucket(self.limit.units_per_sec * share, self.limit.unit_burst * share)
+                if self.unit_bucket else None
+            )
+        return self.tenant_buckets[tenant]
+    
+    def wait_time(self, tenant: str, cost: float) -> float:
+        """Seconds until a call for this tenant and cost may be dispatched"""
+        wait = max(0.0, self.blocked_until - time.monotonic())
+        buckets = [(self.request_bucket, 1), (self.unit_bucket, cost)]
+        if self.limit.tenant_share < 1.0:
+            tenant_requests, tenant_units = self._tenant_buckets(tenant)
+            buckets += [(tenant_requests, 1), (tenant_units, cost)]
+        for bucket, amount in buckets:
+            if bucket:
+                wait = max(wait, bucket.wait_time(amount, self.rate_factor))
+        return wait
+    
+    def take(self, tenant: str, cost: float):
+        """Consume capacity for a dispatched call"""
+        self.request_bucket.take(1)
+        if self.unit_bucket:
+            self.unit_bucket.take(cost)
+        if self.limit.tenant_share < 1.0:
+            tenant_requests, tenant_units = self._tenant_buckets(tenant)
+            tenant_requests.take(1)
+            if tenant_units:
+                tenant_units.take(cost)
+    
+    def has_waiters(self) -> bool:
+        return any(self.queues.values())
+    
+    def enqueue(self, waiter: _Waiter):
+        self.queues[waiter.priority].setdefault(waiter.tenant, deque()).append(waiter)
+    
+    def next_ready(self) -> tuple:
+        """
+        Pick the next waiter to dispatch
+        
+        Returns:
+            (waiter, 0) if one can go now, otherwise (None, seconds to sleep)
+        """
+        shortest_wait = None
+        for priority in (PRIORITY_LIVE, PRIORITY_BULK):
+            tenants = self.queues[priority]
+            for tenant in list(tenants):
+                waiters = tenants[tenant]
+                while waiters and waiters[0].future.done():
+                    waiters.popleft()  # caller was cancelled
+                if not waiters:
+                    del tenants[tenant]
+                    continue
+                
+                wait = self.wait_time(tenant, waiters[0].cost)
+                if wait == 0:
+                    waiter = waiters.popleft()
+                    # Rotate so the next dispatch starts with another tenant
+                    tenants.move_to_end(tenant)
+                    if not waiters:
+                        del tenants[tenant]
+                    return waiter, 0.0
+                shortest_wait = wait if shortest_wait is None else min(shortest_wait, wait)
+            
+            # Bulk work never overtakes queued live work
+            if tenants:
+                break
+        return None, shortest_wait
+    
+    def record_grant(self, priority: int, waited: float):
+        self.granted[priority] += 1
+        self.wait_total[priority] += waited
+        self.wait_max[priority] = max(self.wait_max[priority], waited)
+        self.recent_waits[priority].append(waited)
+    
+    def record_response(self, status_code: int, retry_after: Optional[float]):
+        """Adapt the dispatch rate to upstream throttling signals"""
+        if status_code == 429:
+            self.throttled_responses += 1
+            self.rate_factor = max(self.THROTTLE_FLOOR, self.rate_factor * self.THROTTLE_DECREASE)
+            pause = retry_after if retry_after is not None else 1.0 / self.rate_factor
+            self.blocked_until = max(self.blocked_until, time.monotonic() + pause)
+        elif status_code < 400 and self.rate_factor < 1.0:
+            self.rate_factor = min(1.0, self.rate_factor + self.THROTTLE_RECOVERY)
+    
+    def metrics(self) -> Dict:
+        queue_wait = {}
+        for priority, label in ((PRIORITY_LIVE, "live"), (PRIORITY_BULK, "bulk")):
+            recent = sorted(self.recent_waits[priority])
+            granted = self.granted[priority]
+            queue_wait[label] = {
+                "granted": granted,
+                "queued": sum(len(waiters) for waiters in self.queues[priority].values()),
+                "avg_ms": round(self.wait_total[priority] / granted * 1000, 2) if granted else 0.0,
+                "p95_ms": round(recent[min(len(recent) - 1, int(len(recent) * 0.95))] * 1000, 2) if recent else 0.0,
+                "max_ms": round(self.wait_max[priority] * 1000, 2)
+            }
+        return {
+            "queue_wait": queue_wait,
+            "rate_factor": round(self.rate_factor, 3),
+            "throttled_responses": self.throttled_responses,
+            "blocked_for_ms": round(max(0.0, self.blocked_until - time.monotonic()) * 1000, 2)
+        }
+
+
+class UpstreamScheduler:
+    """
+    Central rate-limit aware scheduler for calls to third-party APIs
+    
+    Every upstream (Azure Translator, AssemblyAI, Groq) gets token buckets for
+    requests and billed units. Calls that cannot go immediately are queued by
+    priority (live sessions before bulk/summary work) and served round-robin
+    across tenants so one clinic's burst cannot starve the others. 429
+    responses halve the dispatch rate and honor Retry-After; successful
+    responses recover it gradually.
+    """
+    
+    def __init__(self, limits: Dict[str, UpstreamLimit]):
+        self.upstreams = {name: _UpstreamQueue(name, limit) for name, limit in limits.items()}
+        # Set with use_shared_state() when several workers share the limits
+        self.shared_state = None
+    
+    def use_shared_state(self, shared_state):
+        """
+        Enforce upstream limits across worker processes
+        
+        Local buckets keep ordering (priority, tenant fairness) within a
+        worker; a call additionally takes from buckets in the shared state so
+        the combined rate of all workers stays within the upstream limits.
+        """
+        self.shared_state = shared_state if shared_state.distributed else None
+    
+    @classmethod
+    def from_env(cls) -> "UpstreamScheduler":
+        """Create a scheduler with default limits, overridable per upstream via env"""
+        return cls({
+            # Azure Translator S1: ~40M characters/hour
+            "azure_translator": UpstreamLimit.from_env(
+                "azure_translator", requests_per_sec=20, request_burst=40,
+                units_per_sec=11000, unit_burst=33000
+            ),
+            # AssemblyAI: submissions and status polls
+            "assemblyai": UpstreamLimit.from_env(
+                "assemblyai", requests_per_sec=5, request_burst=10
+            ),
+            # Groq free tier: 30 requests/min, ~6000 tokens/min
+            "groq": UpstreamLimit.from_env(
+                "groq", requests_per_sec=0.5, request_burst=5,
+                units_per_sec=100, unit_burst=6000
+            )
+        })
+    
+    async def acquire(
+        self,
+        upstream: str,
+        cost: float = 0,
+        priority: int = PRIORITY_LIVE,
+        tenant: Optional[str] = None
+    ):
+        """
+        Wait until a call to `upstream` may be made
+        
+        Args:
+            upstream: Upstream name (e.g. 'azure_translator')
+            cost: Billed units of the call (characters, tokens)
+            priority: PRIORITY_LIVE or PRIORITY_BULK
+            tenant: Tenant to account the call to (defaults to current_tenant)
+        """
+        queue = self.upstreams[upstream]
+        tenant = tenant or current_tenant.get()
+        
+        # Fast path: nothing queued and capacity available
+        if not queue.has_waiters() and queue.wait_time(tenant, cost) == 0:
+            queue.take(tenant, cost)
+            queue.record_grant(priority, 0.0)
+        else:
+            waiter = _Waiter(tenant, cost, priority)
+            queue.enqueue(waiter)
+            if queue.dispatcher is None or queue.dispatcher.done():
+                queue.dispatcher = asyncio.create_task(self._dispatch(queue))
+            await waiter.future
+        
+        if self.shared_state:
+            await self._take_shared(queue, cost)
+    
+    async def _take_shared(self, queue: _UpstreamQueue, cost: float):
+        """Wait for capacity in the cross-worker buckets of an upstream"""
+        limit = queue.limit
+        buckets = [("requests", 1, limit.requests_per_sec, limit.request_burst)]
+        if limit.units_per_sec:
+            buckets.append(("units", cost, limit.units_per_sec, limit.unit_burst))
+        
+        for bucket, amount, rate, capacity in buckets:
+            while True:
+                wait = await self.shared_state.take_tokens(
+                    f"{queue.name}:{bucket}", amount, rate * queue.rate_factor, capacity
+                )
+                if wait == 0:
+                    break
+                await asyncio.sleep(wait)
+    
+    async def _dispatch(self, queue: _UpstreamQueue):
+        """Release queued waiters as capacity becomes available"""
+        while queue.has_waiters():
+            waiter, wait = queue.next_ready()
+            if waiter is None:
+                if wait is None:
+                    continue  # only cancelled waiters were left
+                # Re-evaluate after sleeping: a live call may have arrived
+                await asyncio.sleep(min(wait, 0.5))
+                continue
+            
+            queue.take(waiter.tenant, waiter.cost)
+            queue.record_grant(waiter.priority, time.monotonic() - waiter.enqueued_at)
+            waiter.future.set_result(None)
+    
+    def record_response(self, upstream: str, status_code: int, retry_after: Optional[str] = None):
+        """Feed an upstream response status back into adaptive throttling"""
+        try:
+            retry_seconds = float(retry_after) if retry_after else None
+        except ValueError:
+            retry_seconds = None  # HTTP-date form; fall back to rate-based pause
+        self.upstreams[upstream].record_response(status_code, retry_seconds)
+    
+    async def request(
+        self,
+        upstream: str,
+        send: Callable[[], Awaitable[httpx.Response]],
+        cost: float = 0,
+        priority: int = PRIORITY_LIVE,
+        max_attempts: int = 3
+    ) -> httpx.Response:
+        """
+        Make an upstream HTTP call through the scheduler
+        
+        Args:
+            upstream: Upstream name
+            send: Zero-argument coroutine function performing the HTTP call
+            cost: Billed units of the call
+            priority: PRIORITY_LIVE or PRIORITY_BULK
+            max_attempts: Attempts when the upstream answers 429
+        
+        Returns:
+            The last upstream response (possibly still a 429)
+        """
+        with span(f"upstream {upstream}", kind=SPAN_KIND_CLIENT, cost=cost, priority=priority) as call_span:
+            wait = 0.0
+            for attempt in range(max_attempts):
+                queued = time.perf_counter()
+                await self.acquire(upstream, cost=cost, priority=priority)
+                wait += time.perf_counter() - queued
+                response = await send()
+                self.record_response(upstream, response.status_code, response.headers.get("Retry-After"))
+                if response.status_code != 429:
+                    break
+                print(f"⚠️ {upstream} rate limited (attempt {attempt + 1}/{max_attempts})")
+            call_span.set_attribute("scheduler.wait_ms", round(wait * 1000, 2))
+            call_span.set_attribute("attempts", attempt + 1)
+            call_span.set_attribute("http.status_code", response.status_code)
+        return response
+    
+    def get_metrics(self) -> Dict:
+        """Queue wait times and throttle state per upstream"""
+        return {name: queue.metrics() for name, queue in self.upstreams.items()}
+
+
+_scheduler: Optional[UpstreamScheduler] = None
+
+
+def get_scheduler() -> UpstreamScheduler:
+    """Get the process-wide scheduler, created on first use after .env is loaded"""
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = UpstreamScheduler.from_env()
+    return _scheduler
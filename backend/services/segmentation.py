@@ -0,0 +1,145 @@
+import re
+from typing import List, Tuple
+
+class TextSegmenter:
+    """Split long text into sentence-sized segments for translation"""
+    
+    # Sentence end: western punctuation followed by whitespace, or CJK
+    # full-width punctuation (which is not followed by a space)
+    SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+|(?<=[。！？])\s*")
+    
+    # Words ending in a period that do not end a sentence
+    ABBREVIATIONS = {
+        "dr", "mr", "mrs", "ms", "prof", "st", "jr", "sr", "vs", "etc",
+        "e.g", "i.e", "approx", "fig", "dept"
+    }
+    
+    # A single initial ("J.") as it appears before another initial
+    INITIAL = re.compile(r"[A-Z]\.")
+    
+    def __init__(self, max_segment_chars: int = 400, min_split_chars: int = 200):
+        """
+        Args:
+            max_segment_chars: Sentences longer than this are split further on
+                clause boundaries (commas, semicolons) and then on whitespace
+            min_split_chars: Text shorter than this is returned as one segment
+        """
+        self.max_segment_chars = max_segment_chars
+        self.min_split_chars = min_split_chars
+    
+    def split(self, text: str) -> Tuple[List[str], List[str]]:
+        """
+        Split text into segments and the separators between them
+        
+        Args:
+            text: Text to split
+        
+        Returns:
+            (segments, separators) where separators[i] is the whitespace that
+            followed segments[i]; join() reverses the split exactly
+        """
+        if len(text) < self.min_split_chars:
+            return [text], [""]
+        
+        segments = []
+        separators = []
+        start = 0
+        
+        for match in self.SENTENCE_BOUNDARY.finditer(text):
+            end = match.start()
+            if end <= start or self._ends_with_abbreviation(text[start:end], text[match.end():match.end() + 64]):
+                continue
+            segments.append(text[start:end])
+            separators.append(match.group())
+            start = match.end()
+        
+        if start < len(text):
+            segments.append(text[start:])
+            separators.append("")
+        
+        return self._split_long_segments(segments, separators)
+    
+    def join(self, segments: List[str], separators: List[str]) -> str:
+        """Reassemble segments produced by split()"""
+        return "".join(segment + separator for segment, separator in zip(segments, separators))
+    
+    def _ends_with_abbreviation(self, sentence: str, following: str) -> bool:
+        """Check if a candidate sentence actually ends on an abbreviation like 'Dr.'"""
+        if not sentence.endswith("."):
+            return False
+        words = sentence.split()
+        last_word = words[-1].rstrip(".")
+        if last_word.lower() in self.ABBREVIATIONS:
+            return True
+        next_word = following.split(None, 1)[0] if following.strip() else ""
+        # "No. 5" is a number; "I said no." ends the sentence
+        if last_word.lower() == "no":
+            return next_word[:1].isdigit()
+        # Uppercase letters are initials when another initial follows
+        # ("J. R. Smith"), or a surname follows a capitalized name
+        # ("John A. Smith"), but not in "Take vitamin D. Return in a week."
+        if len(last_word) == 1 and last_word.isupper():
+            if self.INITIAL.fullmatch(next_word):
+                return True
+            previous_word = words[-2] if len(words) > 1 else ""
+            return next_word[:1].isupper() and previous_word[:1].isupper()
+        return False
+    
+    def _split_long_segments(
+        self,
+        segments: List[str],
+        separators: List[str]
+    ) -> Tuple[List[str], List[str]]:
+        """Break sentences above max_segment_chars on clause, then word boundaries"""
+        result_segments = []
+        result_separators = []
+        
+        for segment, separator in zip(segments, separators):
+            if len(segment) <= self.max_segment_chars:
+                result_segments.append(segment)
+                result_separators.append(separator)
+                continue
+            
+            for clause, clause_sep in self._chunk(segment, separator, r"(?<=[,;:])\s+"):
+                if len(clause) <= self.max_segment_chars:
+                    pieces = [(clause, clause_sep)]
+                else:
+                    pieces = self._chunk(clause, clause_sep, r"\s+")
+                for piece, piece_sep in pieces:
+                    result_segments.append(piece)
+                    result_separators.append(piece_sep)
+        
+        return result_segments, result_separators
+    
+    def _chunk(self, text: str, trailing: str, boundary: str) -> List[Tuple[str, str]]:
+        """
+        Greedily pack boundary-delimited parts of text into chunks of at most
+        max_segment_chars (a single oversized part is kept whole)
+        
+        Returns:
+            List of (chunk, separator) pairs; the last chunk gets `trailing`
+        """
+        chunks = []
+        chunk_start = 0
+        last_boundary = None
+        
+        for match in re.finditer(boundary, text):
+            if (
+                last_boundary
+                and last_boundary.start() > chunk_start
+                and match.start() - chunk_start > self.max_segment_chars
+            ):
+                chunks.append((text[chunk_start:last_boundary.start()], last_boundary.group()))
+                chunk_start = last_boundary.end()
+            last_boundary = match
+        
+        if (
+            last_boundary
+            and last_boundary.start() > chunk_start
+            and len(text) - chunk_start > self.max_segment_chars
+        ):
+            chunks.append((text[chunk_start:last_boundary.start()], last_boundary.group()))
+            chunk_start = last_boundary.end()
+        
+        chunks.append((text[chunk_start:], trailing))
+        return chunks
@@ -0,0 +1,205 @@
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, Optional, Set
+
+from services.database import Database
+
+
+class SharedState:
+    """
+    State shared between worker processes
+    
+    Caches, background job status, rate-limit buckets and group (room)
+    membership go through this interface so the app behaves the same whether
+    it runs as one process or as several gunicorn/uvicorn workers.
+    """
+    
+    # True if the state is visible to other processes
+    distributed = False
+    
+    async def get(self, key: str) -> Any:
+        """Get a value, or None if missing or expired"""
+        raise NotImplementedError
+    
+    async def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """Get several values at once; missing keys are left out"""
+        raise NotImplementedError
+    
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        """Set a value, optionally expiring after `ttl` seconds"""
+        raise NotImplementedError
+    
+    async def delete(self, key: str):
+        raise NotImplementedError
+    
+    async def take_tokens(self, key: str, cost: float, rate: float, capacity: float) -> float:
+        """
+        Atomically take tokens from a token bucket
+        
+        Returns:
+            0 if the tokens were taken, otherwise seconds until they would be
+            available (nothing is taken)
+        """
+        raise NotImplementedError
+    
+    async def add_member(self, group: str, member: str):
+        raise NotImplementedError
+    
+    async def remove_member(self, group: str, member: str):
+        raise NotImplementedError
+    
+    async def members(self, group: str) -> Set[str]:
+        raise NotImplementedError
+
+
+class InMemorySharedState(SharedState):
+    """Process-local state for single-worker deployments and development"""
+    
+    def __init__(self):
+        self._values: Dict[str, tuple] = {}
+        self._buckets: Dict[str, tuple] = {}
+        self._groups: Dict[str, Set[str]] = {}
+    
+    async def get(self, key: str) -> Any:
+        entry = self._values.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._values[key]
+            return None
+        return value
+    
+    async def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        result = {}
+        for key in keys:
+            value = await self.get(key)
+            if value is not None:
+                result[key] = value
+        return result
+    
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        expires_at = time.monotonic() + ttl if ttl else None
+        self._values[key] = (value, expires_at)
+    
+    async def delete(self, key: str):
+        self._values.pop(key, None)
+    
+    async def take_tokens(self, key: str, cost: float, rate: float, capacity: float) -> float:
+        now = time.monotonic()
+        tokens, updated = self._buckets.get(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - updated) * rate)
+        cost = min(cost, capacity)
+        if tokens >= cost:
+            self._buckets[key] = (tokens - cost, now)
+            return 0.0
+        self._buckets[key] = (tokens, now)
+        return (cost - tokens) / rate
+    
+    async def add_member(self, group: str, member: str):
+        self._groups.setdefault(group, set()).add(member)
+    
+    async def remove_member(self, group: str, member: str):
+        self._groups.get(group, set()).discard(member)
+    
+    async def members(self, group: str) -> Set[str]:
+        return set(self._groups.get(group, set()))
+
+
+class MongoSharedState(SharedState):
+    """State kept in MongoDB, shared by every worker connected to the database"""
+    
+    distributed = True
+    
+    def __init__(self):
+        self.db = Database.get_db()
+        self.collection = self.db.shared_state
+    
+    async def ensure_indexes(self):
+        """TTL index so expired values are eventually removed by MongoDB"""
+        await self.collection.create_index("expires_at", expireAfterSeconds=0)
+    
+    def _live_filter(self, **query) -> Dict:
+        # The TTL monitor only runs once a minute; filter expired values too
+        return {
+            **query,
+            "$or": [{"expires_at": None}, {"expires_at": {"$gt": datetime.utcnow()}}]
+        }
+    
+    async def get(self, key: str) -> Any:
+        doc = await self.collection.find_one(self._live_filter(_id=key), {"value": 1})
+        return doc["value"] if doc else None
+    
+    async def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        keys = list(keys)
+        if not keys:
+            return {}
+        cursor = self.collection.find(self._live_filter(_id={"$in": keys}), {"value": 1})
+        return {doc["_id"]: doc["value"] async for doc in cursor}
+    
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        expires_at = datetime.utcnow() + timedelta(seconds=ttl) if ttl else None
+        await self.collection.update_one(
+            {"_id": key},
+            {"$set": {"value": value, "expires_at": expires_at}},
+            upsert=True
+        )
+    
+    async def delete(self, key: str):
+        await self.collection.delete_one({"_id": key})
+    
+    async def take_tokens(self, key: str, cost: float, rate: float, capacity: float) -> float:
+        now = time.time()
+        cost = min(cost, capacity)
+        # Refill and conditional take in one atomic pipeline update
+        doc = await self.collection.find_one_and_update(
+            {"_id": f"bucket:{key}"},
+            [
+                {"$set": {
+                    "tokens": {"$min": [capacity, {"$add": [
+                        {"$ifNull": ["$tokens", capacity]},
+                        {"$multiply": [rate, {"$max": [0, {"$subtract": [now, {"$ifNull": ["$updated", now]}]}]}]}
+                    ]}]},
+                    "updated": now
+                }},
+                {"$set": {"granted": {"$gte": ["$tokens", cost]}}},
+                {"$set": {"tokens": {"$cond": ["$granted", {"$subtract": ["$tokens", cost]}, "$tokens"]}}}
+            ],
+            upsert=True,
+            return_document=True  # ReturnDocument.AFTER
+        )
+        if doc["granted"]:
+            return 0.0
+        return (cost - doc["tokens"]) / rate
+    
+    async def add_member(self, group: str, member: str):
+        await self.collection.update_one(
+            {"_id": f"group:{group}"},
+            {"$addToSet": {"members": member}, "$setOnInsert": {"expires_at": None}},
+            upsert=True
+        )
+    
+    async def remove_member(self, group: str, member: str):
+        await self.collection.update_one({"_id": f"group:{group}"}, {"$pull": {"members": member}})
+    
+    async def members(self, group: str) -> Set[str]:
+        doc = await self.collection.find_one({"_id": f"group:{group}"}, {"members": 1})
+        return set(doc.get("members", [])) if doc else set()
+
+
+def shared_state_backend() -> str:
+    """Configured backend: 'memory' (default) or 'mongo' (required for multiple workers)"""
+    return os.getenv("SHARED_STATE_BACKEND", "memory").lower()
+
+
+async def create_shared_state() -> SharedState:
+    """Create the shared state selected by SHARED_STATE_BACKEND"""
+    backend = shared_state_backend()
+    if backend == "memory":
+        return InMemorySharedState()
+    if backend == "mongo":
+        state = MongoSharedState()
+        await state.ensure_indexes()
+        return state
+    raise ValueError(f"Unknown SHARED_STATE_BACKEND '{backend}' (expected 'memory' or 'mongo')")
@@ -0,0 +1,61 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    """
+    Collapse identical concurrent calls into one
+    
+    The first caller for a key starts the call; callers arriving with the same
+    key while it is in flight wait for it and share its result (or exception)
+    instead of making their own upstream request. Nothing is cached: once the
+    call finishes the next caller starts a new one.
+    
+    The call runs in its own task, so a caller that is cancelled (e.g. a client
+    disconnecting) does not cancel it for the others.
+    """
+    
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Task] = {}
+        self.metrics = {
+            "calls": 0,
+            "executions": 0,
+            "coalesced": 0,  # calls that shared another call's result
+            "failures": 0
+        }
+    
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run `fn`, or wait for the in-flight call with the same key
+        
+        Args:
+            key: Identifies identical calls (e.g. the request parameters)
+            fn: Zero-argument coroutine function making the call
+        
+        Returns:
+            The call's result
+        """
+        self.metrics["calls"] += 1
+        task = self._calls.get(key)
+        if task is None:
+            self.metrics["executions"] += 1
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._finished(key, done))
+        else:
+            self.metrics["coalesced"] += 1
+        return await asyncio.shield(task)
+    
+    def in_flight(self, key: Hashable) -> bool:
+        return key in self._calls
+    
+    def _finished(self, key: Hashable, task: asyncio.Task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if task.cancelled():
+            return
+        if task.exception() is not None:
+            self.metrics["failures"] += 1
+    
+    def get_metrics(self) -> Dict:
+        return {**self.metrics, "in_flight": len(self._calls)}
@@ -1,19 +1,28 @@
+import hashlib
 import httpx
 import os
 import time
 from typing import Optional
 
+from services.scheduler import get_scheduler
+from services.singleflight import SingleFlight
+from services.tracing import span
+
 class SpeechService:
     """Service for AssemblyAI speech-to-text"""
     
     def __init__(self):
         self.api_key = os.getenv("ASSEMBLYAI_API_KEY")
         self.base_url = "https://api.assemblyai.com/v2"
+        # Retried or duplicate uploads of the same audio share one transcription
+        self.single_flight = SingleFlight()
     
     async def transcribe_audio(self, audio_url: str) -> str:
         """
         Transcribe audio file using AssemblyAI
         
+        Concurrent calls for the same URL share one transcription job.
+        
         Args:
             audio_url: URL of the audio file (from Cloudinary)
         
@@ -23,6 +32,10 @@ class SpeechService:
         if not self.api_key:
             raise ValueError("AssemblyAI API key not configured")
         
+        with span("speech.transcribe"):
+            return await self.single_flight.do(("url", audio_url), lambda: self._transcribe_url(audio_url))
+    
+    async def _transcribe_url(self, audio_url: str) -> str:
         headers = {
             "authorization": self.api_key,
             "content-type": "application/json"
@@ -30,13 +43,16 @@ class SpeechService:
         
         # Submit transcription request
         async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.post(
-                f"{self.base_url}/transcript",
-                headers=headers,
-                json={
-                    "audio_url": audio_url,
-                    "language_detection": True  # Auto-detect language
-                }
+            response = await get_scheduler().request(
+                "assemblyai",
+                lambda: client.post(
+                    f"{self.base_url}/transcript",
+                    headers=headers,
+                    json={
+                        "audio_url": audio_url,
+                        "language_detection": True  # Auto-detect language
+                    }
+                )
             )
             response.raise_for_status()
             transcript_id = response.json()["id"]
@@ -44,9 +60,12 @@ class SpeechService:
             # Poll for completion
             max_attempts = 60  # 60 attempts * 2 seconds = 2 minutes max
             for _ in range(max_attempts):
-                response = await client.get(
-                    f"{self.base_url}/transcript/{transcript_id}",
-                    headers=headers
+                response = await get_scheduler().request(
+                    "assemblyai",
+                    lambda: client.get(
+                        f"{self.base_url}/transcript/{transcript_id}",
+                        headers=headers
+                    )
                 )
                 response.raise_for_status()
                 result = response.json()
@@ -61,6 +80,43 @@ class SpeechService:
             
             raise Exception("Transcription timeout")
     
+    async def transcribe_audio_content(self, audio_content: bytes) -> str:
+        """
+        Transcribe audio that is not reachable by URL (e.g. on-prem storage)
+        
+        The bytes are uploaded to AssemblyAI's private upload endpoint first.
+        
+        Args:
+            audio_content: Audio file content as bytes
+        
+        Returns:
+            Transcribed text
+        """
+        if not self.api_key:
+            raise ValueError("AssemblyAI API key not configured")
+        
+        content_hash = hashlib.sha256(audio_content).hexdigest()
+        with span("speech.transcribe", bytes=len(audio_content)):
+            return await self.single_flight.do(
+                ("content", content_hash),
+                lambda: self._transcribe_content(audio_content)
+            )
+    
+    async def _transcribe_content(self, audio_content: bytes) -> str:
+        async with httpx.AsyncClient(timeout=60.0) as client:
+            response = await get_scheduler().request(
+                "assemblyai",
+                lambda: client.post(
+                    f"{self.base_url}/upload",
+                    headers={"authorization": self.api_key},
+                    content=audio_content
+                )
+            )
+            response.raise_for_status()
+            upload_url = response.json()["upload_url"]
+        
+        return await self._transcribe_url(upload_url)
+    
     async def transcribe_audio_with_language(
         self,
         audio_url: str,
@@ -85,13 +141,16 @@ class SpeechService:
         }
         
         async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.post(
-                f"{self.base_url}/transcript",
-                headers=headers,
-                json={
-                    "audio_url": audio_url,
-                    "language_code": language_code
-                }
+            response = await get_scheduler().request(
+                "assemblyai",
+                lambda: client.post(
+                    f"{self.base_url}/transcript",
+                    headers=headers,
+                    json={
+                        "audio_url": audio_url,
+                        "language_code": language_code
+                    }
+                )
             )
             response.raise_for_status()
             transcript_id = response.json()["id"]
@@ -99,9 +158,12 @@ class SpeechService:
             # Poll for completion
             max_attempts = 60
             for _ in range(max_attempts):
-                response = await client.get(
-                    f"{self.base_url}/transcript/{transcript_id}",
-                    headers=headers
+                response = await get_scheduler().request(
+                    "assemblyai",
+                    lambda: client.get(
+                        f"{self.base_url}/transcript/{transcript_id}",
+                        headers=headers
+                    )
                 )
                 response.raise_for_status()
                 result = response.json()
@@ -1,64 +1,112 @@
-import cloudinary
-import cloudinary.uploader
+import hashlib
 import os
-from typing import Optional
+from typing import Optional, Tuple
 import io
 
+from fastapi import UploadFile
+
+from services.storage_backends import StorageBackend, create_backend
+from services.tracing import span
+
+
+async def read_with_hash(file: UploadFile, chunk_size: int = 64 * 1024) -> Tuple[bytes, str]:
+    """
+    Read an uploaded file, hashing it chunk by chunk as it is read
+    
+    Returns:
+        (file content, SHA-256 hex digest)
+    """
+    hasher = hashlib.sha256()
+    chunks = []
+    while True:
+        chunk = await file.read(chunk_size)
+        if not chunk:
+            break
+        hasher.update(chunk)
+        chunks.append(chunk)
+    return b"".join(chunks), hasher.hexdigest()
+
 class StorageService:
-    """Service for Cloudinary audio storage"""
+    """Service for audio storage (Cloudinary, local disk or S3-compatible)"""
     
-    def __init__(self):
-        cloudinary.config(
-            cloud_name=os.getenv("CLOUDINARY_CLOUD_NAME"),
-            api_key=os.getenv("CLOUDINARY_API_KEY"),
-            api_secret=os.getenv("CLOUDINARY_API_SECRET")
-        )
+    def __init__(self, backend: Optional[StorageBackend] = None):
+        self.backend = backend or create_backend()
     
     async def upload_audio(
         self,
         audio_content: bytes,
         filename: str,
-        folder: str = "healthcare_audio"
-    ) -> str:
+        folder: str = "healthcare_audio",
+        content_hash: Optional[str] = None
+    ) -> Tuple[str, str]:
         """
-        Upload audio file to Cloudinary
+        Upload audio file to the configured storage backend
         
         Args:
             audio_content: Audio file content as bytes
             filename: Original filename
-            folder: Cloudinary folder name
+            folder: Storage folder name
+            content_hash: Hash of the audio; used as the file name so the same
+                content always maps to the same stored file
         
         Returns:
-            Public URL of uploaded audio
+            (public URL of uploaded audio, storage key / Cloudinary public ID)
         """
+        stem, extension = os.path.splitext(filename or "recording")
+        name = content_hash or f"{stem}_{int(os.urandom(4).hex(), 16)}"
+        
         try:
-            # Upload to Cloudinary
-            result = cloudinary.uploader.upload(
-                audio_content,
-                resource_type="auto",
-                folder=folder,
-                public_id=f"{filename}_{int(os.urandom(4).hex(), 16)}"
-            )
-            
-            return result["secure_url"]
+            with span("storage.upload", backend=type(self.backend).__name__, bytes=len(audio_content)):
+                return await self.backend.upload(audio_content, f"{folder}/{name}{extension}")
         except Exception as e:
             raise Exception(f"Failed to upload audio: {str(e)}")
     
+    def playback_url(self, audio_url: str) -> str:
+        """
+        Playable URL for a stored audio URL (e.g. a freshly presigned S3 URL)
+        
+        Args:
+            audio_url: URL returned by upload_audio, as stored with the message
+        """
+        return self.backend.playback_url(audio_url)
+    
+    def key_from_url(self, audio_url: str) -> Optional[str]:
+        """
+        Storage key / Cloudinary public ID for a stored audio URL
+        
+        Returns:
+            The key, or None if the URL does not belong to this backend
+        """
+        return self.backend.key_from_url(audio_url)
+    
+    async def read_audio(self, public_id: str) -> bytes:
+        """
+        Read stored audio back
+        
+        Args:
+            public_id: Storage key returned by upload_audio
+        
+        Returns:
+            Audio file content
+        """
+        try:
+            with span("storage.read", backend=type(self.backend).__name__):
+                return await self.backend.read(public_id)
+        except Exception as e:
+            raise Exception(f"Failed to read audio: {str(e)}")
+    
     async def delete_audio(self, public_id: str) -> bool:
         """
-        Delete audio file from Cloudinary
+        Delete audio file from storage
         
         Args:
-            public_id: Cloudinary public ID
+            public_id: Storage key returned by upload_audio
         
         Returns:
             True if successful
         """
         try:
-            result = cloudinary.uploader.destroy(
-                public_id,
-                resource_type="auto"
-            )
-            return result.get("result") == "ok"
+            with span("storage.delete", backend=type(self.backend).__name__):
+                return await self.backend.delete(public_id)
         except Exception as e:
             raise Exception(f"Failed to delete audio: {str(e)}")
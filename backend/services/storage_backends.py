@@ -0,0 +1,252 @@
+import asyncio
+import mmap
+import mimetypes
+import os
+import re
+from typing import Iterator, Optional, Tuple
+from urllib.parse import unquote, urlparse
+
+import httpx
+
+
+class StorageBackend:
+    """Interface for audio storage backends"""
+    
+    # Whether upstream services (AssemblyAI) can fetch stored audio by URL
+    remote_fetchable = True
+    
+    async def upload(self, content: bytes, key: str) -> Tuple[str, str]:
+        """
+        Store content under a key
+        
+        Args:
+            content: File content
+            key: Storage key including folder and extension (e.g. 'folder/name.ogg')
+        
+        Returns:
+            (URL the audio can be played from, key needed for read/delete)
+        """
+        raise NotImplementedError
+    
+    async def read(self, key: str) -> bytes:
+        """Read back stored content"""
+        raise NotImplementedError
+    
+    async def delete(self, key: str) -> bool:
+        """Delete stored content, returning True if it existed"""
+        raise NotImplementedError
+    
+    def playback_url(self, url: str) -> str:
+        """URL to play audio from, given the URL stored for it at upload"""
+        return url
+    
+    def key_from_url(self, url: str) -> Optional[str]:
+        """Storage key of audio, recovered from the URL stored for it at upload"""
+        return None
+
+
+class CloudinaryBackend(StorageBackend):
+    """Cloudinary storage (the original hosted backend)"""
+    
+    def __init__(self):
+        # The Cloudinary SDK is only imported when this backend is selected
+        import cloudinary
+        import cloudinary.uploader
+        import cloudinary.utils
+        
+        self.cloudinary = cloudinary
+        cloudinary.config(
+            cloud_name=os.getenv("CLOUDINARY_CLOUD_NAME"),
+            api_key=os.getenv("CLOUDINARY_API_KEY"),
+            api_secret=os.getenv("CLOUDINARY_API_SECRET")
+        )
+    
+    async def upload(self, content: bytes, key: str) -> Tuple[str, str]:
+        folder, _, name = key.rpartition("/")
+        # Cloudinary derives the format itself; public IDs carry no extension
+        public_id = os.path.splitext(name)[0]
+        result = self.cloudinary.uploader.upload(
+            content,
+            resource_type="auto",
+            folder=folder or None,
+            public_id=public_id,
+            overwrite=False
+        )
+        return result["secure_url"], result["public_id"]
+    
+    async def read(self, key: str) -> bytes:
+        url, _ = self.cloudinary.utils.cloudinary_url(key, resource_type="video")
+        async with httpx.AsyncClient(timeout=30.0) as client:
+            response = await client.get(url)
+            response.raise_for_status()
+            return response.content
+    
+    async def delete(self, key: str) -> bool:
+        # Audio is stored under the "video" resource type by resource_type="auto"
+        result = self.cloudinary.uploader.destroy(key, resource_type="video")
+        return result.get("result") == "ok"
+    
+    def key_from_url(self, url: str) -> Optional[str]:
+        # .../video/upload/v1712345678/healthcare_audio/<name>.ogg -> healthcare_audio/<name>
+        match = re.search(r"/upload/(?:v\d+/)?(.+?)(?:\.[^./]+)?$", urlparse(url).path)
+        return unquote(match.group(1)) if match else None
+
+
+class LocalDiskBackend(StorageBackend):
+    """
+    On-prem storage on the local filesystem
+    
+    Files are sharded into two levels of directories by the first characters
+    of their name (ab/cd/abcd1234.ogg) to keep directories small, and served
+    back through the range-capable /api/audio route using mmap.
+    """
+    
+    remote_fetchable = False
+    
+    def __init__(self):
+        self.root = os.path.abspath(os.getenv("LOCAL_STORAGE_PATH", "./audio_storage"))
+        self.public_base_url = os.getenv("STORAGE_PUBLIC_BASE_URL", "http://localhost:8000").rstrip("/")
+        os.makedirs(self.root, exist_ok=True)
+    
+    def _sharded_key(self, key: str) -> str:
+        folder, _, name = key.rpartition("/")
+        stem = name.rsplit(".", 1)[0].ljust(4, "_")
+        return "/".join(part for part in (folder, stem[:2], stem[2:4], name) if part)
+    
+    def path_for(self, key: str) -> str:
+        """Resolve a storage key to a path, refusing keys that escape the root"""
+        path = os.path.abspath(os.path.join(self.root, key))
+        if not path.startswith(self.root + os.sep):
+            raise ValueError(f"Invalid storage key: {key}")
+        return path
+    
+    def _write(self, path: str, content: bytes):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if os.path.exists(path):
+            return  # content-addressed keys never change
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+    
+    async def upload(self, content: bytes, key: str) -> Tuple[str, str]:
+        key = self._sharded_key(key)
+        await asyncio.to_thread(self._write, self.path_for(key), content)
+        return f"{self.public_base_url}/api/audio/{key}", key
+    
+    async def read(self, key: str) -> bytes:
+        size = self.size(key)
+        return b"".join(await asyncio.to_thread(lambda: list(self.iter_range(key, 0, size - 1))))
+    
+    async def delete(self, key: str) -> bool:
+        try:
+            await asyncio.to_thread(os.remove, self.path_for(key))
+            return True
+        except FileNotFoundError:
+            return False
+    
+    def key_from_url(self, url: str) -> Optional[str]:
+        # The public base URL may have changed since upload; the route has not
+        _, found, key = urlparse(url).path.partition("/api/audio/")
+        return unquote(key) if found and key else None
+    
+    def size(self, key: str) -> int:
+        """Size of a stored file in bytes (raises FileNotFoundError)"""
+        return os.path.getsize(self.path_for(key))
+    
+    def content_type(self, key: str) -> str:
+        return mimetypes.guess_type(key)[0] or "application/octet-stream"
+    
+    def iter_range(self, key: str, start: int, end: int, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+        """
+        Yield bytes start..end (inclusive) of a stored file from a memory map
+        
+        Only the pages that are actually read are loaded, so seeking in long
+        recordings does not read the whole file.
+        """
+        if end < start:
+            return
+        with open(self.path_for(key), "rb") as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                for offset in range(start, end + 1, chunk_size):
+                    yield mapped[offset:min(offset + chunk_size, end + 1)]
+
+
+class S3Backend(StorageBackend):
+    """S3-compatible object storage (AWS S3, MinIO, Ceph, ...) via boto3"""
+    
+    def __init__(self):
+        try:
+            import boto3
+        except ImportError:
+            raise ValueError("STORAGE_BACKEND=s3 requires boto3 (pip install boto3)")
+        
+        self.bucket = os.getenv("S3_BUCKET")
+        if not self.bucket:
+            raise ValueError("S3_BUCKET not configured")
+        self.public_base_url = os.getenv("S3_PUBLIC_BASE_URL")
+        self.url_expires = int(os.getenv("S3_URL_EXPIRES", str(7 * 24 * 60 * 60)))
+        self.client = boto3.client(
+            "s3",
+            endpoint_url=os.getenv("S3_ENDPOINT_URL"),
+            region_name=os.getenv("S3_REGION")
+        )
+    
+    def _url(self, key: str) -> str:
+        """
+        URL stored with the audio
+        
+        Without a public base URL the object is only reachable through
+        presigned URLs, which expire; an s3://bucket/key reference is stored
+        instead and presigned when a response is built (playback_url).
+        """
+        if self.public_base_url:
+            return f"{self.public_base_url.rstrip('/')}/{key}"
+        return f"s3://{self.bucket}/{key}"
+    
+    def key_from_url(self, url: str) -> Optional[str]:
+        for prefix in (f"s3://{self.bucket}/", f"{(self.public_base_url or '').rstrip('/')}/"):
+            if prefix != "/" and url.startswith(prefix):
+                return url[len(prefix):]
+        return None
+    
+    def playback_url(self, url: str) -> str:
+        prefix = f"s3://{self.bucket}/"
+        if not url.startswith(prefix):
+            return url
+        return self.client.generate_presigned_url(
+            "get_object",
+            Params={"Bucket": self.bucket, "Key": url[len(prefix):]},
+            ExpiresIn=self.url_expires
+        )
+    
+    async def upload(self, content: bytes, key: str) -> Tuple[str, str]:
+        await asyncio.to_thread(
+            self.client.put_object,
+            Bucket=self.bucket,
+            Key=key,
+            Body=content,
+            ContentType=mimetypes.guess_type(key)[0] or "application/octet-stream"
+        )
+        return self._url(key), key
+    
+    async def read(self, key: str) -> bytes:
+        response = await asyncio.to_thread(self.client.get_object, Bucket=self.bucket, Key=key)
+        return await asyncio.to_thread(response["Body"].read)
+    
+    async def delete(self, key: str) -> bool:
+        await asyncio.to_thread(self.client.delete_object, Bucket=self.bucket, Key=key)
+        return True
+
+
+def create_backend(name: Optional[str] = None) -> StorageBackend:
+    """Create the backend selected by STORAGE_BACKEND (cloudinary, local or s3)"""
+    name = (name or os.getenv("STORAGE_BACKEND", "cloudinary")).lower()
+    backends = {
+        "cloudinary": CloudinaryBackend,
+        "local": LocalDiskBackend,
+        "s3": S3Backend
+    }
+    if name not in backends:
+        raise ValueError(f"Unknown STORAGE_BACKEND '{name}' (expected one of: {', '.join(backends)})")
+    return backends[name]()
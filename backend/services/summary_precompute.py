@@ -0,0 +1,206 @@
+import asyncio
+import os
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple
+
+from services.ai_summary import AISummaryService
+from services.database import Database, MessageService
+from services.shared_state import SharedState
+from services.singleflight import SingleFlight
+
+
+class SummaryPrecomputeService:
+    """
+    Generate conversation summaries in the background, ahead of the request
+    
+    A summary is computed when a conversation has been idle for
+    SUMMARY_IDLE_SECONDS or is explicitly closed, by a bounded pool of
+    workers, and stored in the `summaries` collection with the id of the last
+    message it covers. generate_summary then serves it instantly; any newer
+    message makes it stale, and the next request (or idle period) recomputes
+    it. Concurrent requests for the same conversation share one computation.
+    A fallback summary (Groq failed) is stored but never served as fresh, so
+    the next request tries Groq again.
+    """
+    
+    def __init__(
+        self,
+        message_service: MessageService,
+        ai_summary_service: AISummaryService,
+        shared_state: SharedState
+    ):
+        self.message_service = message_service
+        self.ai_summary_service = ai_summary_service
+        self.shared_state = shared_state
+        self.collection = Database.get_db().summaries
+        
+        # 0 disables idle precomputation; closing a conversation still works
+        self.idle_seconds = float(os.getenv("SUMMARY_IDLE_SECONDS", "120"))
+        self.worker_count = int(os.getenv("SUMMARY_WORKERS", "2"))
+        self.status_ttl = 24 * 60 * 60
+        
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._queued: Set[str] = set()
+        self.single_flight = SingleFlight()
+        self._timers: Dict[str, asyncio.TimerHandle] = {}
+        self._workers: List[asyncio.Task] = []
+        # Status updates run in the background; keep them until they finish
+        self._status_tasks: Set[asyncio.Task] = set()
+        
+        self.metrics = {
+            "precomputed": 0,
+            "served_precomputed": 0,
+            "computed_on_demand": 0,
+            "fallback": 0,
+            "failed": 0
+        }
+    
+    def start(self):
+        """Start the worker pool"""
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.worker_count)]
+    
+    def stop(self):
+        for timer in self._timers.values():
+            timer.cancel()
+        self._timers.clear()
+        for worker in self._workers:
+            worker.cancel()
+    
+    def message_added(self, conversation_id: str):
+        """Restart the conversation's idle timer after a new message"""
+        if self.idle_seconds <= 0:
+            return
+        timer = self._timers.pop(conversation_id, None)
+        if timer:
+            timer.cancel()
+        self._timers[conversation_id] = asyncio.get_running_loop().call_later(
+            self.idle_seconds,
+            self._idle,
+            conversation_id
+        )
+    
+    def _idle(self, conversation_id: str):
+        self._timers.pop(conversation_id, None)
+        self.schedule(conversation_id)
+    
+    def schedule(self, conversation_id: str):
+        """Queue a background summary unless one is already queued or running"""
+        if conversation_id in self._queued or self.single_flight.in_flight(conversation_id):
+            return
+        self._queued.add(conversation_id)
+        self._queue.put_nowait(conversation_id)
+        task = asyncio.create_task(self._set_status(conversation_id, "queued"))
+        self._status_tasks.add(task)
+        task.add_done_callback(self._status_task_done)
+    
+    def _status_task_done(self, task: asyncio.Task):
+        self._status_tasks.discard(task)
+        if not task.cancelled() and task.exception():
+            print(f"⚠️ Failed to update summary job status: {str(task.exception())}")
+    
+    async def close_conversation(self, conversation_id: str) -> Dict:
+        """
+        Summarize a conversation now that the visit is over
+        
+        Returns:
+            Job status
+        """
+        timer = self._timers.pop(conversation_id, None)
+        if timer:
+            timer.cancel()
+        if await self._get_fresh(conversation_id):
+            return await self.get_status(conversation_id)
+        self.schedule(conversation_id)
+        return {"status": "queued", "updated_at": datetime.utcnow().isoformat()}
+    
+    async def get_status(self, conversation_id: str) -> Dict:
+        """Job status, shared by all workers"""
+        status = await self.shared_state.get(f"summary_job:{conversation_id}")
+        return status or {"status": "none", "updated_at": None}
+    
+    async def get_summary(self, conversation_id: str) -> Tuple[Dict, bool]:
+        """
+        Get a conversation's summary, computing it if there is no fresh one
+        
+        Returns:
+            (summary, True if it was precomputed)
+        """
+        stored = await self._get_fresh(conversation_id)
+        if stored:
+            self.metrics["served_precomputed"] += 1
+            return stored["summary"], True
+        if not self.single_flight.in_flight(conversation_id):
+            self.metrics["computed_on_demand"] += 1
+        return await self._summarize(conversation_id), False
+    
+    async def _get_fresh(self, conversation_id: str) -> Optional[Dict]:
+        """The stored summary, if no message was added since it was generated"""
+        stored = await self.collection.find_one({"_id": conversation_id})
+        if not stored or stored.get("fallback"):
+            return None
+        latest = await self.message_service.get_latest_message_id(conversation_id)
+        if stored.get("last_message_id") != latest:
+            return None
+        return stored
+    
+    async def _worker(self):
+        while True:
+            conversation_id = await self._queue.get()
+            self._queued.discard(conversation_id)
+            try:
+                # Another worker process may have done it already
+                if await self._get_fresh(conversation_id):
+                    await self._set_status(conversation_id, "done")
+                    continue
+                await self._summarize(conversation_id)
+                self.metrics["precomputed"] += 1
+            except Exception as e:
+                print(f"⚠️ Background summary for {conversation_id} failed: {str(e)}")
+            finally:
+                self._queue.task_done()
+    
+    async def _summarize(self, conversation_id: str) -> Dict:
+        """Compute and store a summary; concurrent calls share one computation"""
+        return await self.single_flight.do(conversation_id, lambda: self._compute(conversation_id))
+    
+    async def _compute(self, conversation_id: str) -> Dict:
+        await self._set_status(conversation_id, "running")
+        try:
+            messages = await self.message_service.get_messages(conversation_id=conversation_id)
+            summary = await self.ai_summary_service.generate_summary(messages)
+        except Exception as e:
+            self.metrics["failed"] += 1
+            await self._set_status(conversation_id, "failed", error=str(e))
+            raise
+        
+        fallback = summary.get("fallback", False)
+        await self.collection.update_one(
+            {"_id": conversation_id},
+            {"$set": {
+                "summary": summary,
+                "last_message_id": messages[-1]["_id"] if messages else None,
+                "fallback": fallback,
+                "generated_at": datetime.utcnow()
+            }},
+            upsert=True
+        )
+        if fallback:
+            self.metrics["fallback"] += 1
+            await self._set_status(conversation_id, "failed", error="AI summary unavailable; served the fallback summary")
+        else:
+            await self._set_status(conversation_id, "done")
+        return summary
+    
+    async def _set_status(self, conversation_id: str, status: str, error: Optional[str] = None):
+        value = {"status": status, "updated_at": datetime.utcnow().isoformat()}
+        if error:
+            value["error"] = error
+        await self.shared_state.set(f"summary_job:{conversation_id}", value, ttl=self.status_ttl)
+    
+    def get_metrics(self) -> Dict:
+        return {
+            **self.metrics,
+            "queued": len(self._queued),
+            "single_flight": self.single_flight.get_metrics(),
+            "idle_timers": len(self._timers)
+        }
@@ -0,0 +1,250 @@
+import contextvars
+import os
+import queue
+import threading
+import time
+import traceback
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+import orjson
+
+# OpenTelemetry span kinds and status codes (OTLP enum values)
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+SPAN_KIND_CLIENT = 3
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+
+class Span:
+    """A timed stage of a request, in OpenTelemetry terms"""
+    
+    def __init__(self, name: str, trace: "_Trace", parent: Optional["Span"], kind: int, attributes: Dict):
+        self.name = name
+        self.trace = trace
+        self.parent = parent
+        self.kind = kind
+        self.span_id = os.urandom(8).hex()
+        self.attributes = dict(attributes)
+        self.events: List[Dict] = []
+        self.status_code = STATUS_OK
+        self.status_message = ""
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+    
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e6
+    
+    def update_name(self, name: str):
+        self.name = name
+    
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+    
+    def record_exception(self, error: BaseException):
+        """Mark the span as failed and keep the stack trace with it"""
+        self.status_code = STATUS_ERROR
+        self.status_message = f"{type(error).__name__}: {str(error)}"
+        # Enclosing spans the exception propagates through only get the status
+        if self.trace.last_error is error:
+            return
+        self.trace.last_error = error
+        self.events.append({
+            "timeUnixNano": str(time.time_ns()),
+            "name": "exception",
+            "attributes": _attributes({
+                "exception.type": type(error).__name__,
+                "exception.message": str(error),
+                "exception.stacktrace": "".join(traceback.format_exception(type(error), error, error.__traceback__))
+            })
+        })
+    
+    def to_otlp(self) -> Dict:
+        span = {
+            "traceId": self.trace.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": _attributes(self.attributes),
+            "status": {"code": self.status_code}
+        }
+        if self.parent:
+            span["parentSpanId"] = self.parent.span_id
+        if self.status_message:
+            span["status"]["message"] = self.status_message
+        if self.events:
+            span["events"] = self.events
+        return span
+
+
+class _NoopSpan:
+    """Stand-in used when tracing is disabled"""
+    
+    def update_name(self, name: str):
+        pass
+    
+    def set_attribute(self, key: str, value: Any):
+        pass
+    
+    def record_exception(self, error: BaseException):
+        pass
+
+
+class _Trace:
+    """Finished spans of one trace; shared by every task the request starts"""
+    
+    def __init__(self):
+        self.trace_id = os.urandom(16).hex()
+        self.spans: List[Span] = []
+        self.last_error: Optional[BaseException] = None
+
+
+_current_span: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("current_span", default=None)
+_NOOP_SPAN = _NoopSpan()
+
+
+def _attributes(values: Dict) -> List[Dict]:
+    """OTLP/JSON attribute list"""
+    result = []
+    for key, value in values.items():
+        if value is None:
+            continue
+        if isinstance(value, bool):
+            encoded = {"boolValue": value}
+        elif isinstance(value, int):
+            encoded = {"intValue": str(value)}
+        elif isinstance(value, float):
+            encoded = {"doubleValue": value}
+        else:
+            encoded = {"stringValue": str(value)}
+        result.append({"key": key, "value": encoded})
+    return result
+
+
+class Tracer:
+    """
+    Structured trace spans for each stage of a request
+    
+    Opt-in (TRACING_ENABLED). Traces are written as OTLP/JSON lines (one
+    ExportTraceServiceRequest per trace) to TRACE_FILE, which the
+    OpenTelemetry Collector can read with its otlpjsonfile receiver. Only
+    traces taking at least TRACE_SLOW_MS are written, and those are also
+    logged with a per-stage breakdown. Writing happens on a background thread.
+    """
+    
+    def __init__(self):
+        self.enabled = os.getenv("TRACING_ENABLED", "false").lower() == "true"
+        self.path = os.getenv("TRACE_FILE", "traces.jsonl")
+        self.slow_ms = float(os.getenv("TRACE_SLOW_MS", "0"))
+        self.service_name = os.getenv("TRACE_SERVICE_NAME", "healthcare-translation-api")
+        self.metrics = {"traces": 0, "exported": 0, "dropped": 0}
+        self._queue: "queue.Queue[str]" = queue.Queue(maxsize=10000)
+        self._writer: Optional[threading.Thread] = None
+    
+    @contextmanager
+    def span(self, name: str, kind: int = SPAN_KIND_INTERNAL, **attributes) -> Iterator[Any]:
+        """
+        Time a stage; nested spans (also in tasks it starts) become its children
+        
+        An exception leaving the block is recorded on the span and re-raised.
+        Without a current span a new trace is started.
+        """
+        if not self.enabled:
+            yield _NOOP_SPAN
+            return
+        
+        parent = _current_span.get()
+        span = Span(name, parent.trace if parent else _Trace(), parent, kind, attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.record_exception(e)
+            raise
+        finally:
+            _current_span.reset(token)
+            span.end_ns = time.time_ns()
+            span.trace.spans.append(span)
+            if parent is None:
+                self._finish_trace(span)
+    
+    def _finish_trace(self, root: Span):
+        self.metrics["traces"] += 1
+        if root.duration_ms < self.slow_ms:
+            return
+        
+        if self.slow_ms > 0:
+            stages = ", ".join(
+                f"{span.name} {span.duration_ms:.0f}ms"
+                for span in root.trace.spans
+                if span.parent is root
+            )
+            print(f"🐢 Slow: {root.name} took {root.duration_ms:.0f}ms (trace {root.trace.trace_id}): {stages}")
+        
+        line = orjson.dumps({
+            "resourceSpans": [{
+                "resource": {"attributes": _attributes({"service.name": self.service_name})},
+                "scopeSpans": [{
+                    "scope": {"name": "healthcare-translation"},
+                    "spans": [span.to_otlp() for span in root.trace.spans]
+                }]
+            }]
+        }).decode("utf-8")
+        try:
+            self._queue.put_nowait(line)
+            self.metrics["exported"] += 1
+        except queue.Full:
+            self.metrics["dropped"] += 1
+            return
+        if self._writer is None:
+            self._writer = threading.Thread(target=self._write_loop, name="trace-writer", daemon=True)
+            self._writer.start()
+    
+    def _write_loop(self):
+        while True:
+            lines = [self._queue.get()]
+            while not self._queue.empty():
+                lines.append(self._queue.get_nowait())
+            with open(self.path, "a", encoding="utf-8") as file:
+                file.write("\n".join(lines) + "\n")
+    
+    def get_metrics(self) -> Dict:
+        return {"enabled": self.enabled, "slow_ms": self.slow_ms, **self.metrics}
+
+
+_tracer: Optional[Tracer] = None
+
+
+def get_tracer() -> Tracer:
+    """Get the process-wide tracer, created on first use after .env is loaded"""
+    global _tracer
+    if _tracer is None:
+        _tracer = Tracer()
+    return _tracer
+
+
+def span(name: str, kind: int = SPAN_KIND_INTERNAL, **attributes):
+    """Shorthand for get_tracer().span(...)"""
+    return get_tracer().span(name, kind=kind, **attributes)
+
+
+def current_span():
+    """The active span (a no-op span if tracing is disabled or outside a trace)"""
+    return _current_span.get() or _NOOP_SPAN
+
+
+def record_exception(error: BaseException):
+    """
+    Attach an exception and its stack trace to the current span
+    
+    Without tracing the stack trace is printed instead, as before.
+    """
+    active = _current_span.get()
+    if active is None:
+        traceback.print_exception(type(error), error, error.__traceback__)
+    else:
+        active.record_exception(error)
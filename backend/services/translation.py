@@ -1,15 +1,42 @@
+import asyncio
+import hashlib
 import httpx
 import os
+from collections import OrderedDict
 from typing import Optional
 
+from services.scheduler import PRIORITY_LIVE, get_scheduler
+from services.segmentation import TextSegmenter
+from services.shared_state import SharedState
+from services.singleflight import SingleFlight
+from services.tracing import current_span, span
+
 class TranslationService:
     """Service for Microsoft Azure Translator"""
     
-    def __init__(self):
+    def __init__(self, shared_state: Optional[SharedState] = None):
         self.api_key = os.getenv("AZURE_TRANSLATOR_KEY")
         self.endpoint = os.getenv("AZURE_TRANSLATOR_ENDPOINT")
         self.region = os.getenv("AZURE_TRANSLATOR_REGION")
         self.translate_path = "/translate?api-version=3.0"
+        
+        # Long messages are split into sentences and translated concurrently
+        self.segmenter = TextSegmenter(
+            max_segment_chars=int(os.getenv("TRANSLATION_SEGMENT_MAX_CHARS", "400")),
+            min_split_chars=int(os.getenv("TRANSLATION_SEGMENT_MIN_CHARS", "200"))
+        )
+        self.max_concurrency = int(os.getenv("TRANSLATION_MAX_CONCURRENCY", "4"))
+        
+        # LRU cache of translated segments keyed by (source, target, segment)
+        self.cache_size = int(os.getenv("TRANSLATION_CACHE_SIZE", "5000"))
+        self._cache = OrderedDict()
+        
+        # With multiple workers, translations are also shared between them
+        self.shared_state = shared_state if shared_state and shared_state.distributed else None
+        self.shared_cache_ttl = int(os.getenv("TRANSLATION_SHARED_CACHE_TTL", str(7 * 24 * 60 * 60)))
+        
+        # Identical messages translated concurrently share one set of requests
+        self.single_flight = SingleFlight()
     
     async def translate(
         self,
@@ -27,6 +54,11 @@ class TranslationService:
         
         Returns:
             Translated text
+        
+        Text longer than TRANSLATION_SEGMENT_MIN_CHARS is split into
+        sentences that are translated in parallel and reassembled; only
+        segments that fail are marked with an error. Concurrent calls with
+        the same text and languages are coalesced into one.
         """
         # Skip translation if source and target are the same
         if source_lang == target_lang:
@@ -37,6 +69,71 @@ class TranslationService:
             print("⚠️  WARNING: Azure Translator API key not configured. Returning original text.")
             return f"[Translation disabled - API key needed] {text}"
         
+        with span("translation.translate", source_lang=source_lang, target_lang=target_lang, chars=len(text)):
+            return await self.single_flight.do(
+                (source_lang, target_lang, text),
+                lambda: self._translate_text(text, source_lang, target_lang)
+            )
+    
+    async def _translate_text(self, text: str, source_lang: str, target_lang: str) -> str:
+        segments, separators = self.segmenter.split(text)
+        
+        # Repeated sentences are served from the cache and translated only once
+        results = {}
+        pending = set()
+        for segment in segments:
+            if not segment.strip() or segment in results:
+                continue
+            if (source_lang, target_lang, segment) in self._cache:
+                results[segment] = self._cache_get(source_lang, target_lang, segment)
+            else:
+                pending.add(segment)
+        
+        if pending and self.shared_state:
+            keys = {self._shared_key(source_lang, target_lang, segment): segment for segment in pending}
+            # The shared cache is an optimization; if it fails, translate everything
+            try:
+                shared = await self.shared_state.get_many(keys)
+            except Exception as e:
+                print(f"⚠️ Shared translation cache read failed: {type(e).__name__}: {str(e)}")
+                shared = {}
+            for key, translated in shared.items():
+                segment = keys[key]
+                results[segment] = translated
+                self._cache_put(source_lang, target_lang, segment, translated)
+                pending.discard(segment)
+        
+        current_span().set_attribute("segments", len(segments))
+        current_span().set_attribute("segments_translated", len(pending))
+        if pending:
+            semaphore = asyncio.Semaphore(self.max_concurrency)
+            
+            async def run(client: httpx.AsyncClient, segment: str):
+                async with semaphore:
+                    results[segment] = await self._translate_segment(
+                        client, segment, source_lang, target_lang
+                    )
+            
+            async with httpx.AsyncClient(timeout=10.0) as client:
+                await asyncio.gather(*(run(client, segment) for segment in pending))
+        
+        translated = [results.get(segment, segment) for segment in segments]
+        
+        return self.segmenter.join(translated, separators)
+    
+    async def _translate_segment(
+        self,
+        client: httpx.AsyncClient,
+        segment: str,
+        source_lang: str,
+        target_lang: str
+    ) -> str:
+        """
+        Translate a single segment, caching successful results
+        
+        Failures degrade only this segment: it is returned untranslated with
+        an error marker so the rest of the message is still translated.
+        """
         try:
             url = f"{self.endpoint}{self.translate_path}&from={source_lang}&to={target_lang}"
             
@@ -46,20 +143,53 @@ class TranslationService:
                 "Content-Type": "application/json"
             }
             
-            body = [{"text": text}]
+            body = [{"text": segment}]
             
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.post(url, headers=headers, json=body)
-                response.raise_for_status()
-                
-                result = response.json()
-                return result[0]["translations"][0]["text"]
+            response = await get_scheduler().request(
+                "azure_translator",
+                lambda: client.post(url, headers=headers, json=body),
+                cost=len(segment),
+                priority=PRIORITY_LIVE
+            )
+            response.raise_for_status()
+            
+            result = response.json()
+            translated = result[0]["translations"][0]["text"]
         except httpx.HTTPStatusError as e:
             print(f"❌ Azure Translator Error: {e.response.status_code}")
-            return f"[Translation error] {text}"
+            return f"[Translation error] {segment}"
         except Exception as e:
             print(f"❌ Translation error: {type(e).__name__}: {str(e)}")
-            return f"[Translation unavailable] {text}"
+            return f"[Translation unavailable] {segment}"
+        
+        self._cache_put(source_lang, target_lang, segment, translated)
+        if self.shared_state:
+            try:
+                await self.shared_state.set(
+                    self._shared_key(source_lang, target_lang, segment),
+                    translated,
+                    ttl=self.shared_cache_ttl
+                )
+            except Exception as e:
+                print(f"⚠️ Shared translation cache write failed: {type(e).__name__}: {str(e)}")
+        return translated
+    
+    def _shared_key(self, source_lang: str, target_lang: str, segment: str) -> str:
+        digest = hashlib.sha256(segment.encode("utf-8")).hexdigest()
+        return f"translation:{source_lang}:{target_lang}:{digest}"
+    
+    def _cache_get(self, source_lang: str, target_lang: str, segment: str) -> str:
+        """Get a cached segment translation and mark it recently used"""
+        key = (source_lang, target_lang, segment)
+        self._cache.move_to_end(key)
+        return self._cache[key]
+    
+    def _cache_put(self, source_lang: str, target_lang: str, segment: str, translated: str):
+        """Cache a segment translation, evicting the least recently used entries"""
+        self._cache[(source_lang, target_lang, segment)] = translated
+        self._cache.move_to_end((source_lang, target_lang, segment))
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
     
     async def detect_language(self, text: str) -> str:
         """
@@ -85,7 +215,11 @@ class TranslationService:
         body = [{"text": text}]
         
         async with httpx.AsyncClient() as client:
-            response = await client.post(url, headers=headers, json=body)
+            response = await get_scheduler().request(
+                "azure_translator",
+                lambda: client.post(url, headers=headers, json=body),
+                cost=len(text)
+            )
             response.raise_for_status()
             
             result = response.json()
@@ -0,0 +1,70 @@
+import asyncio
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+
+from services import audio_processing
+from services.audio_processing import AudioPreprocessor, trim_silence
+
+SAMPLE_RATE = 16000
+
+
+def tone(seconds, amplitude=8000):
+    samples = np.arange(int(SAMPLE_RATE * seconds))
+    return (amplitude * np.sin(2 * np.pi * 440 * samples / SAMPLE_RATE)).astype(np.int16)
+
+
+def silence(seconds):
+    return np.zeros(int(SAMPLE_RATE * seconds), dtype=np.int16)
+
+
+def test_trim_keeps_padding_around_speech():
+    pcm = np.concatenate([silence(1), tone(0.5), silence(1)])
+    trimmed = trim_silence(pcm, SAMPLE_RATE, padding_ms=200)
+    assert len(trimmed) == int(SAMPLE_RATE * 0.9)
+
+
+def test_trim_keeps_speech_running_to_the_end():
+    pcm = np.concatenate([silence(1), tone(0.505)])
+    trimmed = trim_silence(pcm, SAMPLE_RATE, padding_ms=0)
+    assert len(trimmed) == int(SAMPLE_RATE * 0.505)
+
+
+def test_trim_all_silent_clip_is_empty():
+    assert len(trim_silence(silence(2), SAMPLE_RATE)) == 0
+
+
+def test_trim_shorter_than_a_frame_is_unchanged():
+    pcm = silence(0.01)
+    assert len(trim_silence(pcm, SAMPLE_RATE)) == len(pcm)
+
+
+class BrokenPool:
+    """Stands in for a ProcessPoolExecutor whose worker was killed"""
+    created = 0
+    
+    def __init__(self, max_workers):
+        BrokenPool.created += 1
+        self.is_shutdown = False
+    
+    def submit(self, fn, *args):
+        future = Future()
+        future.set_exception(BrokenProcessPool("worker died"))
+        return future
+    
+    def shutdown(self, wait=True, cancel_futures=False):
+        self.is_shutdown = True
+
+
+def test_broken_pool_is_replaced_on_next_call(monkeypatch):
+    monkeypatch.setattr(audio_processing, "ProcessPoolExecutor", BrokenPool)
+    preprocessor = AudioPreprocessor()
+    preprocessor.enabled = True
+    
+    audio, filename, stats = asyncio.run(preprocessor.process(b"webm", "clip.webm"))
+    assert (audio, filename) == (b"webm", "clip.webm")
+    assert preprocessor._pool is None
+    
+    asyncio.run(preprocessor.process(b"webm", "clip.webm"))
+    assert BrokenPool.created == 2
@@ -0,0 +1,84 @@
+import asyncio
+import gzip
+
+import pytest
+
+import compression
+from compression import CompressionMiddleware, negotiate_encoding
+
+
+@pytest.fixture
+def without_brotli(monkeypatch):
+    monkeypatch.setattr(compression, "brotli", None)
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("", None),
+    ("gzip", "gzip"),
+    ("gzip, deflate", "gzip"),
+    ("GZIP;q=0.5", "gzip"),
+    ("gzip;q=0", None),
+    ("gzip;q=abc", None),
+    ("identity", None),
+    ("*", "gzip"),
+    ("*, gzip;q=0", None),
+])
+def test_negotiate_encoding_without_brotli(without_brotli, header, expected):
+    assert negotiate_encoding(header) == expected
+
+
+def test_brotli_is_preferred_when_installed(monkeypatch):
+    monkeypatch.setattr(compression, "brotli", object())
+    assert negotiate_encoding("gzip, br") == "br"
+    assert negotiate_encoding("gzip, br;q=0") == "gzip"
+
+
+def run_app(chunks, content_type="application/json", accept_encoding="gzip", minimum_size=100):
+    """Send `chunks` as the response body through the middleware and collect what it sends"""
+    async def app(scope, receive, send):
+        headers = [(b"content-type", content_type.encode())]
+        if len(chunks) == 1:
+            headers.append((b"content-length", str(len(chunks[0])).encode()))
+        await send({"type": "http.response.start", "status": 200, "headers": headers})
+        for index, chunk in enumerate(chunks):
+            await send({"type": "http.response.body", "body": chunk, "more_body": index < len(chunks) - 1})
+    
+    sent = []
+    
+    async def send(message):
+        sent.append(message)
+    
+    scope = {"type": "http", "headers": [(b"accept-encoding", accept_encoding.encode())]}
+    asyncio.run(CompressionMiddleware(app, minimum_size=minimum_size)(scope, None, send))
+    headers = {key.decode(): value.decode() for key, value in sent[0]["headers"]}
+    return headers, b"".join(message.get("body", b"") for message in sent[1:])
+
+
+def test_small_responses_are_not_compressed(without_brotli):
+    headers, body = run_app([b'{"ok": true}'])
+    assert "content-encoding" not in headers
+    assert body == b'{"ok": true}'
+
+
+def test_large_json_is_gzipped(without_brotli):
+    payload = b'{"messages": [' + b'"hello",' * 100 + b'"end"]}'
+    headers, body = run_app([payload])
+    assert headers["content-encoding"] == "gzip"
+    assert headers["content-length"] == str(len(body))
+    assert "Accept-Encoding" in headers["vary"]
+    assert gzip.decompress(body) == payload
+
+
+def test_streamed_ndjson_is_compressed_chunk_by_chunk(without_brotli):
+    chunks = [b'{"n": %d}\n' % n for n in range(50)]
+    headers, body = run_app(chunks, content_type="application/x-ndjson")
+    assert headers["content-encoding"] == "gzip"
+    assert "content-length" not in headers
+    assert gzip.decompress(body) == b"".join(chunks)
+
+
+def test_audio_is_passed_through(without_brotli):
+    payload = b"\x00" * 1000
+    headers, body = run_app([payload], content_type="audio/ogg")
+    assert "content-encoding" not in headers
+    assert body == payload
@@ -0,0 +1,35 @@
+import asyncio
+from datetime import datetime
+
+from services.database import MessageService
+
+
+def test_format_timestamp_matches_serialize_stage():
+    # SERIALIZE_STAGE renders dates as %Y-%m-%dT%H:%M:%S.%L000 in MongoDB
+    assert MessageService.format_timestamp(datetime(2024, 5, 1, 9, 30, 0, 123000)) == "2024-05-01T09:30:00.123000"
+    assert MessageService.format_timestamp(datetime(2024, 5, 1, 9, 30)) == "2024-05-01T09:30:00.000000"
+    assert MessageService.SERIALIZE_STAGE["$set"]["timestamp"]["$dateToString"]["format"].endswith(".%L000")
+
+
+class FakeInsertResult:
+    inserted_id = "665f1c2b9d1e8a0012345678"
+
+
+class FakeCollection:
+    def __init__(self):
+        self.inserted = []
+    
+    async def insert_one(self, document):
+        self.inserted.append(dict(document))
+        return FakeInsertResult()
+
+
+def test_create_message_returns_the_stored_timestamp():
+    service = MessageService.__new__(MessageService)
+    service.collection = FakeCollection()
+    message = asyncio.run(service.create_message("Hello", "Hola", "doctor", "en", "es"))
+    
+    stored = service.collection.inserted[0]["timestamp"]
+    assert stored.microsecond % 1000 == 0
+    assert message["timestamp"] == MessageService.format_timestamp(stored)
+    assert message["timestamp"] == message["created_at"]
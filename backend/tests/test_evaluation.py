@@ -0,0 +1,64 @@
+import pytest
+
+from benchmarks.evaluation import corpus_bleu, corpus_chrf, parse_summary, score_summary
+
+
+def test_bleu_of_identical_text_is_100():
+    assert corpus_bleu(["Take one tablet, twice a day."], ["Take one tablet, twice a day."]) == pytest.approx(100)
+
+
+def test_bleu_matches_hand_computed_precisions():
+    # Precisions 5/6, 3/5, 2/4, 1/3 and equal lengths, so no brevity penalty
+    score = corpus_bleu(["the cat sat on the mat"], ["the cat sat on a mat"])
+    assert score == pytest.approx(100 * (5 / 6 * 3 / 5 * 2 / 4 * 1 / 3) ** 0.25)
+
+
+def test_bleu_penalizes_short_hypotheses():
+    full = corpus_bleu(["take one tablet twice a day"], ["take one tablet twice a day"])
+    short = corpus_bleu(["take one tablet twice"], ["take one tablet twice a day"])
+    assert short < full
+    assert corpus_bleu([""], ["take one tablet"]) == 0.0
+
+
+def test_chrf_ignores_whitespace():
+    assert corpus_chrf(["dolor de cabeza"], ["dolorde cabeza"]) == pytest.approx(100)
+    assert corpus_chrf(["xyz"], ["dolor"]) == 0.0
+
+
+def test_chrf_weighs_recall_over_precision():
+    reference = ["dolor de cabeza fuerte"]
+    missing_words = corpus_chrf(["dolor de cabeza"], reference)
+    extra_words = corpus_chrf(["dolor de cabeza fuerte desde ayer"], reference)
+    assert missing_words < extra_words < 100
+
+
+SUMMARY = """
+═══════════════
+🩺 CHIEF COMPLAINT & SYMPTOMS
+• Headache for three days
+• Nausea
+**MEDICATIONS PRESCRIBED**
+- Ibuprofen 400 mg
+FOLLOW-UP ACTIONS
+• None mentioned
+"""
+
+
+def test_parse_summary_reads_bullets_under_each_heading():
+    assert parse_summary(SUMMARY) == {
+        "symptoms": ["Headache for three days", "Nausea"],
+        "medications": ["Ibuprofen 400 mg"],
+        "follow_up": []
+    }
+
+
+def test_score_summary_counts_sections_and_facts():
+    scores = score_summary(SUMMARY, {
+        "symptoms": ["headache", "fever"],
+        "medications": ["ibuprofen"],
+        "follow_up": ["return in one week"],
+        "history": []
+    })
+    assert scores["headings"] == pytest.approx(3 / 7)
+    assert scores["sections"] == pytest.approx(2 / 3)
+    assert scores["facts"] == pytest.approx(2 / 4)
@@ -0,0 +1,107 @@
+import asyncio
+import re
+from datetime import datetime, timedelta
+
+import orjson
+import pytest
+
+from services.export import ExportService, NDJSONEncoder, PDFTranscriptEncoder, StreamingPDFWriter
+
+
+def message(number, **fields):
+    row = {
+        "_id": f"id{number}",
+        "conversation_id": "visit-1",
+        "timestamp": datetime(2024, 5, 1, 9, 0) + timedelta(seconds=number),
+        "role": "doctor",
+        "language": "en",
+        "target_language": "es",
+        "message_type": "text",
+        "original_text": f"Message {number}",
+        "translated_text": f"Mensaje {number}",
+    }
+    row.update(fields)
+    return row
+
+
+class FakeMessageService:
+    def __init__(self, rows):
+        self.rows = rows
+    
+    async def iter_message_batches(self, conversation_id=None, start=None, end=None, batch_size=1000):
+        for offset in range(0, len(self.rows), batch_size):
+            yield self.rows[offset:offset + batch_size]
+
+
+class FakeStorageService:
+    def playback_url(self, audio_url):
+        return audio_url.replace("s3://bucket/", "https://signed.test/")
+
+
+def export(rows, encoder, batch_size=2):
+    service = ExportService(FakeMessageService(rows), FakeStorageService())
+    service.batch_size = batch_size
+    
+    async def collect():
+        return [chunk async for chunk in service.stream(encoder)]
+    
+    return asyncio.run(collect())
+
+
+def test_ndjson_export_streams_one_chunk_per_batch():
+    chunks = export([message(n) for n in range(5)], NDJSONEncoder())
+    assert len(chunks) == 3
+    lines = b"".join(chunks).splitlines()
+    assert [orjson.loads(line)["_id"] for line in lines] == ["id0", "id1", "id2", "id3", "id4"]
+    assert orjson.loads(lines[0])["timestamp"] == "2024-05-01T09:00:00"
+
+
+def test_export_serves_playable_audio_urls():
+    rows = [message(1, message_type="audio", audio_url="s3://bucket/audio/abc.ogg"), message(2)]
+    lines = b"".join(export(rows, NDJSONEncoder())).splitlines()
+    assert orjson.loads(lines[0])["audio_url"] == "https://signed.test/audio/abc.ogg"
+    assert "audio_url" not in orjson.loads(lines[1])
+
+
+def pdf_objects(document: bytes):
+    """Byte offsets of 'N 0 obj' headers, and the offsets listed in the xref table"""
+    actual = {int(match.group(1)): match.start() for match in re.finditer(rb"(?m)^(\d+) 0 obj\n", document)}
+    startxref = int(re.search(rb"startxref\n(\d+)\n%%EOF\n$", document).group(1))
+    assert document[startxref:].startswith(b"xref\n")
+    entries = re.findall(rb"(\d{10}) 00000 n \n", document[startxref:])
+    return actual, {number: int(offset) for number, offset in enumerate(entries, start=1)}
+
+
+def test_pdf_xref_offsets_point_at_objects():
+    rows = [message(n, original_text="Long line " * 40) for n in range(150)]
+    document = b"".join(export(rows, PDFTranscriptEncoder("Transcript: visit-1", summary="Stable.")))
+    
+    assert document.startswith(b"%PDF-")
+    actual, listed = pdf_objects(document)
+    assert listed == actual
+    page_count = int(re.search(rb"/Type /Pages /Kids \[[^\]]*\] /Count (\d+)", document).group(1))
+    assert page_count > 1
+    assert page_count == document.count(b"/Type /Page ")
+
+
+def test_empty_pdf_export_still_has_a_page():
+    document = b"".join(export([], PDFTranscriptEncoder("Transcript")))
+    actual, listed = pdf_objects(document)
+    assert listed == actual
+    assert b"/Count 1" in document
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("a (b) c\\", b"a \\(b\\) c\\\\"),
+    ("café", "café".encode("cp1252")),
+    ("pain \U0001F600", b"pain "),
+    ("痛", b"?"),
+])
+def test_pdf_text_encoding(text, expected):
+    assert StreamingPDFWriter()._encode(text) == expected
+
+
+def test_unknown_format_is_rejected():
+    service = ExportService(FakeMessageService([]), FakeStorageService())
+    with pytest.raises(ValueError):
+        service.create_encoder("xlsx")
@@ -0,0 +1,26 @@
+import pytest
+
+from main import parse_range_header
+
+
+@pytest.mark.parametrize("header, expected", [
+    (None, None),
+    ("items=0-10", None),
+    ("bytes=0-99", (0, 99)),
+    ("bytes=10-", (10, 999)),
+    ("bytes=990-5000", (990, 999)),
+    ("bytes=-100", (900, 999)),
+    ("bytes=-5000", (0, 999)),
+    ("bytes=0-9, 20-29", (0, 9)),
+])
+def test_parse_range_header(header, expected):
+    assert parse_range_header(header, 1000) == expected
+
+
+@pytest.mark.parametrize("header", ["bytes=5-3", "bytes=abc-", "bytes=-"])
+def test_invalid_ranges_serve_the_whole_file(header):
+    assert parse_range_header(header, 1000) is None
+
+
+def test_range_past_the_end_is_unsatisfiable():
+    assert parse_range_header("bytes=1000-", 1000) == (-1, -1)
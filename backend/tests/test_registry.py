@@ -0,0 +1,87 @@
+import asyncio
+
+import pytest
+
+from services.registry import ServiceRegistry
+
+
+def test_services_start_after_their_dependencies():
+    started = []
+    
+    async def database():
+        started.append("database")
+        return "db"
+    
+    def messages():
+        started.append("messages")
+        return "messages"
+    
+    async def run():
+        registry = ServiceRegistry()
+        registry.register("messages", messages, depends_on=["database"])
+        registry.register("database", database)
+        return await registry.get("messages"), registry
+    
+    instance, registry = asyncio.run(run())
+    assert instance == "messages"
+    assert started == ["database", "messages"]
+    assert registry.peek("database") == "db"
+
+
+def test_concurrent_gets_initialize_once():
+    calls = []
+    
+    async def slow():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return object()
+    
+    async def run():
+        registry = ServiceRegistry()
+        registry.register("slow", slow)
+        return await asyncio.gather(*(registry.get("slow") for _ in range(5)))
+    
+    instances = asyncio.run(run())
+    assert len(calls) == 1
+    assert all(instance is instances[0] for instance in instances)
+
+
+def test_failed_initialization_is_retried():
+    attempts = []
+    
+    async def flaky():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise ConnectionError("not yet")
+        return "ok"
+    
+    async def run():
+        registry = ServiceRegistry()
+        registry.register("flaky", flaky)
+        with pytest.raises(ConnectionError):
+            await registry.get("flaky")
+        assert registry.status()["flaky"] == "failed: ConnectionError: not yet"
+        assert await registry.get("flaky") == "ok"
+        return registry
+    
+    registry = asyncio.run(run())
+    assert registry.status()["flaky"] == "ready"
+    assert "flaky" not in registry.errors
+
+
+def test_warm_up_reports_failures_without_raising():
+    async def broken():
+        raise RuntimeError("boom")
+    
+    async def run():
+        registry = ServiceRegistry()
+        registry.register("good", lambda: "good")
+        registry.register("broken", broken)
+        await registry.start_warm_up()
+        return registry
+    
+    registry = asyncio.run(run())
+    assert not registry.is_ready()
+    report = registry.startup_report()
+    assert report["warm_up_ms"] is not None
+    assert report["status"] == {"good": "ready", "broken": "failed: RuntimeError: boom"}
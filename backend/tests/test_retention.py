@@ -0,0 +1,240 @@
+import asyncio
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from services import retention as retention_module
+from services.database import Database
+from services.retention import RetentionService
+
+
+class FakeCollection:
+    def __init__(self):
+        self.docs = []
+        self.deleted = []
+    
+    async def insert_one(self, doc):
+        self.docs.append(doc)
+    
+    async def delete_one(self, query):
+        self.deleted.append(query)
+
+
+class FakeMessages:
+    """messages collection: the reference check and deletion"""
+    
+    def __init__(self):
+        self.references = set()
+        # Called between the first reference check and the one under the claim
+        self.on_count = None
+        self.deleted = []
+    
+    async def delete_many(self, query):
+        self.deleted.append(query)
+    
+    async def count_documents(self, query, limit=0):
+        if self.on_count:
+            self.on_count()
+        return sum(1 for clause in query["$or"] for value in clause.values() if value in self.references)
+
+
+class FakeAudioIndex:
+    """In-memory AudioIndexService with the same claim semantics as the Mongo filters"""
+    
+    def __init__(self):
+        self.entries = {}
+    
+    def add(self, content_hash, last_used, size=100):
+        self.entries[content_hash] = {
+            "_id": content_hash,
+            "public_id": f"healthcare_audio/{content_hash}",
+            "size": size,
+            "last_used": last_used
+        }
+    
+    async def claim_for_deletion(self, content_hash, unused_since):
+        entry = self.entries.get(content_hash)
+        if entry is None or "deleting" in entry or entry["last_used"] >= unused_since:
+            return None
+        entry["deleting"] = datetime.utcnow()
+        return dict(entry)
+    
+    async def release(self, entry):
+        current = self.entries.get(entry["_id"])
+        if current and current.get("deleting") == entry["deleting"]:
+            del current["deleting"]
+    
+    async def delete(self, entry):
+        current = self.entries.get(entry["_id"])
+        if current and current.get("deleting") == entry["deleting"]:
+            del self.entries[entry["_id"]]
+
+
+class FakeStorage:
+    def __init__(self):
+        self.deleted = []
+        self.failing = False
+    
+    def key_from_url(self, audio_url):
+        prefix = "https://res.cloudinary.com/demo/video/upload/v1/"
+        return audio_url[len(prefix):].rsplit(".", 1)[0] if audio_url.startswith(prefix) else None
+    
+    async def delete_audio(self, key):
+        if self.failing:
+            raise Exception("Failed to delete audio: timeout")
+        self.deleted.append(key)
+        return True
+
+
+class FakeMessageService:
+    def __init__(self, rows=()):
+        self.collection = FakeMessages()
+        self.rows = list(rows)
+    
+    async def iter_message_batches(self, conversation_id=None, start=None, end=None, batch_size=1000):
+        for offset in range(0, len(self.rows), batch_size):
+            yield self.rows[offset:offset + batch_size]
+
+
+class FakeSummaryPrecompute:
+    def __init__(self):
+        self.requested = []
+    
+    async def get_summary(self, conversation_id):
+        self.requested.append(conversation_id)
+        return {"summary": "Stable."}, True
+
+
+@pytest.fixture
+def retention(monkeypatch):
+    monkeypatch.setattr(Database, "get_db", classmethod(lambda cls: SimpleNamespace(
+        archived_conversations=FakeCollection(),
+        archived_messages=FakeCollection(),
+        summaries=FakeCollection()
+    )))
+    service = RetentionService(
+        message_service=FakeMessageService(),
+        audio_index_service=FakeAudioIndex(),
+        storage_service=FakeStorage(),
+        summary_precompute=FakeSummaryPrecompute(),
+        shared_state=None
+    )
+    return service
+
+
+def long_ago():
+    return datetime.utcnow() - timedelta(days=30)
+
+
+def delete(retention, audio):
+    return asyncio.run(retention.delete_unreferenced_audio(audio))
+
+
+def test_archive_keeps_the_precomputed_summary(retention):
+    retention.chunk_size = 2
+    retention.message_service.rows = [
+        {"_id": f"m{n}", "timestamp": datetime(2024, 5, 1, 9, n), "original_text": "Hello"}
+        for n in range(3)
+    ]
+    retention.message_service.rows[1].update(audio_url="s3://bucket/healthcare_audio/abc.ogg", audio_hash="abc")
+    
+    stats = asyncio.run(retention.archive_conversation("visit-1", datetime(2024, 6, 1)))
+    assert stats["messages"] == 3
+    assert stats["audio"] == {"s3://bucket/healthcare_audio/abc.ogg": "abc"}
+    assert len(retention.chunks.docs) == 2
+    
+    record, = retention.conversations.docs
+    assert record["summary"] == {"summary": "Stable."}
+    assert retention.summary_precompute.requested == ["visit-1"]
+    assert retention.db.summaries.deleted == [{"_id": "visit-1"}]
+    assert retention.message_service.collection.deleted == [
+        {"conversation_id": "visit-1", "timestamp": {"$lt": datetime(2024, 6, 1)}}
+    ]
+
+
+def test_unreferenced_audio_and_its_index_entry_are_deleted(retention):
+    retention.audio_index_service.add("abc", long_ago(), size=2048)
+    result = delete(retention, {"s3://bucket/healthcare_audio/abc.ogg": "abc"})
+    assert result == {"audio_files_deleted": 1, "audio_bytes_reclaimed": 2048, "audio_delete_failures": 0}
+    assert retention.storage_service.deleted == ["healthcare_audio/abc"]
+    assert "abc" not in retention.audio_index_service.entries
+
+
+def test_referenced_audio_is_kept(retention):
+    retention.audio_index_service.add("abc", long_ago())
+    retention.message_service.collection.references.add("abc")
+    assert delete(retention, {"s3://bucket/healthcare_audio/abc.ogg": "abc"})["audio_files_deleted"] == 0
+    assert retention.storage_service.deleted == []
+
+
+def test_recently_reused_audio_is_kept(retention):
+    retention.audio_index_service.add("abc", datetime.utcnow() - timedelta(minutes=5))
+    assert delete(retention, {"s3://bucket/healthcare_audio/abc.ogg": "abc"})["audio_files_deleted"] == 0
+    assert "deleting" not in retention.audio_index_service.entries["abc"]
+
+
+def test_claim_is_released_when_a_reference_appears(retention):
+    retention.audio_index_service.add("abc", long_ago())
+    messages = retention.message_service.collection
+    calls = []
+    
+    def referenced_after_first_check():
+        calls.append(1)
+        if len(calls) == 2:
+            messages.references.add("abc")
+    
+    messages.on_count = referenced_after_first_check
+    assert delete(retention, {"s3://bucket/healthcare_audio/abc.ogg": "abc"})["audio_files_deleted"] == 0
+    assert retention.storage_service.deleted == []
+    assert "deleting" not in retention.audio_index_service.entries["abc"]
+
+
+def test_failed_storage_delete_releases_the_claim(retention):
+    retention.audio_index_service.add("abc", long_ago())
+    retention.storage_service.failing = True
+    assert delete(retention, {"s3://bucket/healthcare_audio/abc.ogg": "abc"})["audio_delete_failures"] == 1
+    assert "deleting" not in retention.audio_index_service.entries["abc"]
+
+
+def test_audio_from_before_hashing_is_located_by_url(retention):
+    result = delete(retention, {
+        "https://res.cloudinary.com/demo/video/upload/v1/healthcare_audio/old_123.webm": None,
+        "https://elsewhere.test/unknown.webm": None
+    })
+    assert retention.storage_service.deleted == ["healthcare_audio/old_123"]
+    assert result["audio_files_deleted"] == 1
+    assert result["audio_delete_failures"] == 1
+
+
+class FlakySharedState:
+    def __init__(self, failures):
+        self.failures = failures
+    
+    async def take_tokens(self, key, cost, rate, capacity):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("mongo unreachable")
+        return 0.0
+
+
+def test_run_forever_backs_off_when_the_lease_fails(retention, monkeypatch):
+    retention.shared_state = FlakySharedState(failures=3)
+    runs = []
+    sleeps = []
+    
+    async def run_once():
+        runs.append(1)
+    
+    async def fake_sleep(seconds):
+        sleeps.append(seconds)
+        if len(sleeps) == 5:
+            raise asyncio.CancelledError
+    
+    retention.run_once = run_once
+    monkeypatch.setattr(retention_module.asyncio, "sleep", fake_sleep)
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(retention.run_forever())
+    
+    assert sleeps == [5, 10, 20, retention.interval, retention.interval]
+    assert len(runs) == 2
@@ -0,0 +1,164 @@
+import asyncio
+
+import pytest
+
+from services import scheduler as scheduler_module
+from services.scheduler import (
+    PRIORITY_BULK,
+    PRIORITY_LIVE,
+    TokenBucket,
+    UpstreamLimit,
+    UpstreamScheduler,
+    _UpstreamQueue,
+    _Waiter
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+    
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(scheduler_module.time, "monotonic", fake)
+    return fake
+
+
+def test_token_bucket_starts_full_and_refills(clock):
+    bucket = TokenBucket(rate=2, capacity=4)
+    assert bucket.wait_time(4) == 0
+    bucket.take(4)
+    assert bucket.wait_time(1) == pytest.approx(0.5)
+    
+    clock.now += 1
+    assert bucket.wait_time(2) == 0
+    assert bucket.wait_time(3) == pytest.approx(0.5)
+
+
+def test_token_bucket_caps_refill_and_cost_at_capacity(clock):
+    bucket = TokenBucket(rate=10, capacity=5)
+    clock.now += 60
+    bucket.wait_time(1)
+    assert bucket.tokens == 5
+    
+    # A call larger than the burst must still be able to go eventually
+    assert bucket.wait_time(50) == 0
+
+
+def test_token_bucket_rate_factor_slows_refill(clock):
+    bucket = TokenBucket(rate=4, capacity=4)
+    bucket.take(4)
+    assert bucket.wait_time(1, rate_factor=0.5) == pytest.approx(0.5)
+
+
+def test_limit_reads_env_overrides(monkeypatch):
+    monkeypatch.setenv("SCHEDULER_GROQ_RPS", "3")
+    monkeypatch.setenv("SCHEDULER_GROQ_UNIT_BURST", "900")
+    limit = UpstreamLimit.from_env("groq", requests_per_sec=0.5, request_burst=5, units_per_sec=100)
+    assert limit.requests_per_sec == 3
+    assert limit.request_burst == 5
+    assert limit.units_per_sec == 100
+    assert limit.unit_burst == 900
+
+
+def queue_with_waiters(limit, waiters):
+    """Queue some waiters; _Waiter needs a running loop for its future"""
+    async def build():
+        queue = _UpstreamQueue("test", limit)
+        created = [_Waiter(tenant, cost, priority) for tenant, cost, priority in waiters]
+        for waiter in created:
+            queue.enqueue(waiter)
+        return queue, created
+    return asyncio.run(build())
+
+
+def drain(queue, count):
+    order = []
+    for _ in range(count):
+        waiter, wait = queue.next_ready()
+        assert wait == 0
+        queue.take(waiter.tenant, waiter.cost)
+        order.append(waiter)
+    return order
+
+
+def test_tenants_are_served_round_robin(clock):
+    queue, waiters = queue_with_waiters(UpstreamLimit(100, 100), [
+        ("clinic-a", 0, PRIORITY_LIVE),
+        ("clinic-a", 0, PRIORITY_LIVE),
+        ("clinic-a", 0, PRIORITY_LIVE),
+        ("clinic-b", 0, PRIORITY_LIVE),
+    ])
+    order = [waiter.tenant for waiter in drain(queue, 4)]
+    assert order == ["clinic-a", "clinic-b", "clinic-a", "clinic-a"]
+
+
+def test_live_work_is_dispatched_before_bulk(clock):
+    queue, waiters = queue_with_waiters(UpstreamLimit(100, 100), [
+        ("clinic-a", 0, PRIORITY_BULK),
+        ("clinic-b", 0, PRIORITY_LIVE),
+        ("clinic-a", 0, PRIORITY_LIVE),
+    ])
+    order = drain(queue, 3)
+    assert [waiter.priority for waiter in order] == [PRIORITY_LIVE, PRIORITY_LIVE, PRIORITY_BULK]
+
+
+def test_bulk_waits_while_live_work_is_queued(clock):
+    queue, waiters = queue_with_waiters(UpstreamLimit(1, 1, units_per_sec=10, unit_burst=10), [
+        ("clinic-a", 50, PRIORITY_LIVE),
+        ("clinic-b", 1, PRIORITY_BULK),
+    ])
+    queue.unit_bucket.take(10)
+    
+    # The cheap bulk call could go, but must not overtake the live one
+    waiter, wait = queue.next_ready()
+    assert waiter is None
+    assert wait > 0
+
+
+def test_tenant_share_limits_one_clinic(clock):
+    queue, waiters = queue_with_waiters(UpstreamLimit(10, 10, tenant_share=0.2), [
+        ("clinic-a", 0, PRIORITY_LIVE),
+        ("clinic-a", 0, PRIORITY_LIVE),
+        ("clinic-a", 0, PRIORITY_LIVE),
+        ("clinic-b", 0, PRIORITY_LIVE),
+    ])
+    order = [waiter.tenant for waiter in drain(queue, 3)]
+    assert order == ["clinic-a", "clinic-b", "clinic-a"]
+    
+    # clinic-a used its 2-request slice of the burst; the rest must wait
+    waiter, wait = queue.next_ready()
+    assert waiter is None
+    assert wait > 0
+
+
+def test_throttling_halves_rate_and_recovers(clock):
+    queue = _UpstreamQueue("test", UpstreamLimit(10, 10))
+    queue.record_response(429, retry_after=2.0)
+    assert queue.rate_factor == 0.5
+    assert queue.wait_time("clinic-a", 0) == pytest.approx(2.0)
+    
+    queue.record_response(200, retry_after=None)
+    assert queue.rate_factor == pytest.approx(0.55)
+
+
+def test_request_retries_on_429():
+    scheduler = UpstreamScheduler({"test": UpstreamLimit(1000, 1000)})
+    statuses = iter([429, 200])
+    
+    class Response:
+        def __init__(self, status_code):
+            self.status_code = status_code
+            self.headers = {"Retry-After": "0"}
+    
+    async def send():
+        return Response(next(statuses))
+    
+    response = asyncio.run(scheduler.request("test", send))
+    assert response.status_code == 200
+    assert scheduler.get_metrics()["test"]["throttled_responses"] == 1
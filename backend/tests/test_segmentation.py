@@ -0,0 +1,64 @@
+import pytest
+
+from services.segmentation import TextSegmenter
+
+
+def split(text, **kwargs):
+    segments, _ = TextSegmenter(min_split_chars=0, **kwargs).split(text)
+    return segments
+
+
+def test_short_text_is_one_segment():
+    segmenter = TextSegmenter(min_split_chars=200)
+    assert segmenter.split("Hello. How are you?") == (["Hello. How are you?"], [""])
+
+
+@pytest.mark.parametrize("text", [
+    "First sentence.  Second one!\nThird?",
+    "Trailing space. ",
+    "一句话。另一句话！第三句？",
+    "No boundary at all",
+])
+def test_join_reverses_split(text):
+    segmenter = TextSegmenter(min_split_chars=0)
+    assert segmenter.join(*segmenter.split(text)) == text
+
+
+def test_splits_on_sentence_punctuation():
+    assert split("The scan is clear. Do you have pain? Call us!") == [
+        "The scan is clear.", "Do you have pain?", "Call us!"
+    ]
+
+
+def test_splits_cjk_punctuation_without_spaces():
+    assert split("我头疼。我发烧了！") == ["我头疼。", "我发烧了！"]
+
+
+@pytest.mark.parametrize("text", [
+    "Dr. Smith will see you now.",
+    "Bring your results, e.g. the X-ray.",
+    "Ask John A. Smith at the desk.",
+    "Ask J. R. Smith at the desk.",
+    "Go to room No. 5 please.",
+])
+def test_abbreviations_and_initials_do_not_end_sentences(text):
+    assert split(text) == [text]
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("I said no. Then the pain started.", ["I said no.", "Then the pain started."]),
+    ("Take vitamin D. Return in a week.", ["Take vitamin D.", "Return in a week."]),
+    ("Take 500 mg. Then rest.", ["Take 500 mg.", "Then rest."]),
+    ("Apply 5 ml. Then wait.", ["Apply 5 ml.", "Then wait."]),
+])
+def test_ordinary_words_and_units_end_sentences(text, expected):
+    assert split(text) == expected
+
+
+def test_long_sentences_split_on_clauses_then_words():
+    sentence = ", ".join(["word " * 8] * 6).strip() + "."
+    segments = split(sentence, max_segment_chars=60)
+    assert len(segments) > 1
+    assert all(len(segment) <= 60 for segment in segments)
+    segmenter = TextSegmenter(min_split_chars=0, max_segment_chars=60)
+    assert segmenter.join(*segmenter.split(sentence)) == sentence
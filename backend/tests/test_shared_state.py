@@ -0,0 +1,65 @@
+import asyncio
+
+import pytest
+
+from services import shared_state as shared_state_module
+from services.shared_state import InMemorySharedState
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+    
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(shared_state_module.time, "monotonic", fake)
+    return fake
+
+
+def test_values_expire_after_ttl(clock):
+    state = InMemorySharedState()
+    
+    async def run():
+        await state.set("a", 1, ttl=10)
+        await state.set("b", 2)
+        assert await state.get_many(["a", "b", "c"]) == {"a": 1, "b": 2}
+        clock.now += 10
+        assert await state.get("a") is None
+        assert await state.get("b") == 2
+        await state.delete("b")
+        assert await state.get("b") is None
+    
+    asyncio.run(run())
+
+
+def test_take_tokens_refills_and_takes_nothing_when_short(clock):
+    state = InMemorySharedState()
+    
+    async def run():
+        assert await state.take_tokens("groq:requests", 3, rate=1, capacity=4) == 0
+        assert await state.take_tokens("groq:requests", 3, rate=1, capacity=4) == pytest.approx(2.0)
+        clock.now += 2
+        assert await state.take_tokens("groq:requests", 3, rate=1, capacity=4) == 0
+        # Costs above the capacity are capped so they can eventually go
+        clock.now += 10
+        assert await state.take_tokens("groq:requests", 50, rate=1, capacity=4) == 0
+    
+    asyncio.run(run())
+
+
+def test_group_membership():
+    state = InMemorySharedState()
+    
+    async def run():
+        await state.add_member("room", "a")
+        await state.add_member("room", "b")
+        await state.remove_member("room", "a")
+        await state.remove_member("other", "a")
+        return await state.members("room"), await state.members("other")
+    
+    assert asyncio.run(run()) == ({"b"}, set())
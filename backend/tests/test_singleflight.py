@@ -0,0 +1,83 @@
+import asyncio
+
+import pytest
+
+from services.singleflight import SingleFlight
+
+
+class Upstream:
+    """A call that blocks until released, counting how often it really ran"""
+    
+    def __init__(self):
+        self.calls = 0
+        self.release = asyncio.Event()
+    
+    async def call(self, result="ok"):
+        self.calls += 1
+        await self.release.wait()
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+
+def test_concurrent_calls_with_the_same_key_share_one_call():
+    async def run():
+        single_flight, upstream = SingleFlight(), Upstream()
+        callers = [asyncio.create_task(single_flight.do("key", upstream.call)) for _ in range(3)]
+        await asyncio.sleep(0)
+        assert single_flight.in_flight("key")
+        upstream.release.set()
+        return single_flight, upstream, await asyncio.gather(*callers)
+    
+    single_flight, upstream, results = asyncio.run(run())
+    assert results == ["ok", "ok", "ok"]
+    assert upstream.calls == 1
+    assert not single_flight.in_flight("key")
+    assert single_flight.get_metrics() == {
+        "calls": 3, "executions": 1, "coalesced": 2, "failures": 0, "in_flight": 0
+    }
+
+
+def test_different_keys_and_later_calls_run_separately():
+    async def run():
+        single_flight, upstream = SingleFlight(), Upstream()
+        upstream.release.set()
+        await asyncio.gather(single_flight.do("a", upstream.call), single_flight.do("b", upstream.call))
+        await single_flight.do("a", upstream.call)
+        return upstream
+    
+    assert asyncio.run(run()).calls == 3
+
+
+def test_failure_is_shared_by_every_caller():
+    async def run():
+        single_flight, upstream = SingleFlight(), Upstream()
+        callers = [
+            asyncio.create_task(single_flight.do("key", lambda: upstream.call(ConnectionError("down"))))
+            for _ in range(2)
+        ]
+        await asyncio.sleep(0)
+        upstream.release.set()
+        results = await asyncio.gather(*callers, return_exceptions=True)
+        return single_flight, upstream, results
+    
+    single_flight, upstream, results = asyncio.run(run())
+    assert [type(result) for result in results] == [ConnectionError, ConnectionError]
+    assert upstream.calls == 1
+    assert single_flight.metrics["failures"] == 1
+
+
+def test_cancelled_caller_does_not_cancel_the_call_for_others():
+    async def run():
+        single_flight, upstream = SingleFlight(), Upstream()
+        first = asyncio.create_task(single_flight.do("key", upstream.call))
+        second = asyncio.create_task(single_flight.do("key", upstream.call))
+        await asyncio.sleep(0)
+        first.cancel()
+        await asyncio.sleep(0)
+        upstream.release.set()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+    
+    assert asyncio.run(run()) == "ok"
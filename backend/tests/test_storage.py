@@ -0,0 +1,121 @@
+import asyncio
+import hashlib
+import io
+
+import pytest
+
+from services.storage import read_with_hash
+from services.storage_backends import CloudinaryBackend, LocalDiskBackend, S3Backend, create_backend
+
+
+class FakeUpload:
+    """Async file-like object in the shape of FastAPI's UploadFile"""
+    
+    def __init__(self, content: bytes):
+        self.buffer = io.BytesIO(content)
+        self.reads = 0
+    
+    async def read(self, size: int = -1) -> bytes:
+        self.reads += 1
+        return self.buffer.read(size)
+
+
+def test_read_with_hash_returns_content_and_sha256():
+    content = bytes(range(256)) * 1000
+    upload = FakeUpload(content)
+    data, digest = asyncio.run(read_with_hash(upload, chunk_size=4096))
+    assert data == content
+    assert digest == hashlib.sha256(content).hexdigest()
+    assert upload.reads > 1
+
+
+def test_read_with_hash_empty_file():
+    data, digest = asyncio.run(read_with_hash(FakeUpload(b"")))
+    assert data == b""
+    assert digest == hashlib.sha256(b"").hexdigest()
+
+
+@pytest.fixture
+def local_backend(tmp_path, monkeypatch):
+    monkeypatch.setenv("LOCAL_STORAGE_PATH", str(tmp_path))
+    monkeypatch.setenv("STORAGE_PUBLIC_BASE_URL", "http://api.test/")
+    return LocalDiskBackend()
+
+
+def test_local_backend_shards_and_roundtrips(local_backend, tmp_path):
+    content = b"x" * 200000
+    url, key = asyncio.run(local_backend.upload(content, "audio/abcdef.ogg"))
+    assert key == "audio/ab/cd/abcdef.ogg"
+    assert url == "http://api.test/api/audio/audio/ab/cd/abcdef.ogg"
+    assert (tmp_path / key).read_bytes() == content
+    assert asyncio.run(local_backend.read(key)) == content
+
+
+def test_local_backend_iter_range_is_inclusive(local_backend):
+    _, key = asyncio.run(local_backend.upload(bytes(range(100)), "audio/abcdef.ogg"))
+    assert b"".join(local_backend.iter_range(key, 10, 19, chunk_size=3)) == bytes(range(10, 20))
+    assert list(local_backend.iter_range(key, 5, 4)) == []
+
+
+def test_local_backend_delete(local_backend):
+    _, key = asyncio.run(local_backend.upload(b"data", "audio/abcdef.ogg"))
+    assert asyncio.run(local_backend.delete(key)) is True
+    assert asyncio.run(local_backend.delete(key)) is False
+
+
+def test_local_backend_refuses_keys_outside_root(local_backend):
+    with pytest.raises(ValueError):
+        local_backend.path_for("../secrets.txt")
+
+
+class FakeS3Client:
+    def generate_presigned_url(self, operation, Params, ExpiresIn):
+        return f"https://signed.test/{Params['Bucket']}/{Params['Key']}?expires={ExpiresIn}"
+
+
+def s3_backend(public_base_url=None):
+    # boto3 is optional; skip __init__ and wire in a fake client
+    backend = S3Backend.__new__(S3Backend)
+    backend.bucket = "audio-bucket"
+    backend.public_base_url = public_base_url
+    backend.url_expires = 60
+    backend.client = FakeS3Client()
+    return backend
+
+
+def test_s3_stores_object_reference_and_presigns_on_playback():
+    backend = s3_backend()
+    url = backend._url("audio/abc.ogg")
+    assert url == "s3://audio-bucket/audio/abc.ogg"
+    assert backend.playback_url(url) == "https://signed.test/audio-bucket/audio/abc.ogg?expires=60"
+
+
+def test_s3_public_base_url_is_served_as_is():
+    backend = s3_backend(public_base_url="https://cdn.test/")
+    url = backend._url("audio/abc.ogg")
+    assert url == "https://cdn.test/audio/abc.ogg"
+    assert backend.playback_url(url) == url
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        create_backend("ftp")
+
+
+def test_s3_key_from_url():
+    backend = s3_backend(public_base_url="https://cdn.test")
+    assert backend.key_from_url("s3://audio-bucket/audio/abc.ogg") == "audio/abc.ogg"
+    assert backend.key_from_url("https://cdn.test/audio/abc.ogg") == "audio/abc.ogg"
+    assert backend.key_from_url("https://other.test/audio/abc.ogg") is None
+
+
+def test_local_key_from_url_ignores_base_url_changes(local_backend):
+    assert local_backend.key_from_url("http://old-host:8000/api/audio/audio/ab/cd/abcd%201.ogg") == "audio/ab/cd/abcd 1.ogg"
+    assert local_backend.key_from_url("http://api.test/other/abc.ogg") is None
+
+
+def test_cloudinary_key_from_url():
+    backend = CloudinaryBackend.__new__(CloudinaryBackend)
+    url = "https://res.cloudinary.com/demo/video/upload/v1712345678/healthcare_audio/abc.webm"
+    assert backend.key_from_url(url) == "healthcare_audio/abc"
+    assert backend.key_from_url("https://res.cloudinary.com/demo/video/upload/healthcare_audio/abc") == "healthcare_audio/abc"
@@ -0,0 +1,125 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from services.database import Database
+from services.shared_state import InMemorySharedState
+from services.summary_precompute import SummaryPrecomputeService
+
+
+class FakeSummaries:
+    """summaries collection"""
+    
+    def __init__(self):
+        self.docs = {}
+    
+    async def find_one(self, query):
+        return self.docs.get(query["_id"])
+    
+    async def update_one(self, query, update, upsert=False):
+        self.docs.setdefault(query["_id"], {"_id": query["_id"]}).update(update["$set"])
+
+
+class FakeMessageService:
+    def __init__(self, messages):
+        self.messages = messages
+    
+    async def get_messages(self, conversation_id=None, limit=100):
+        return list(self.messages)
+    
+    async def get_latest_message_id(self, conversation_id):
+        return self.messages[-1]["_id"] if self.messages else None
+
+
+class FakeAISummaryService:
+    def __init__(self):
+        self.calls = 0
+        self.fallback = False
+        self.started = None
+        self.release = None
+    
+    async def generate_summary(self, messages):
+        self.calls += 1
+        if self.started:
+            self.started.set()
+            await self.release.wait()
+        return {"summary": f"summary {self.calls}", "message_count": len(messages), "fallback": self.fallback}
+
+
+@pytest.fixture
+def precompute(monkeypatch):
+    summaries = FakeSummaries()
+    monkeypatch.setattr(Database, "get_db", classmethod(lambda cls: SimpleNamespace(summaries=summaries)))
+    return SummaryPrecomputeService(
+        message_service=FakeMessageService([{"_id": "m1"}, {"_id": "m2"}]),
+        ai_summary_service=FakeAISummaryService(),
+        shared_state=InMemorySharedState()
+    )
+
+
+def get_summary(precompute, conversation_id="visit-1"):
+    return asyncio.run(precompute.get_summary(conversation_id))
+
+
+def test_fresh_summary_is_served_without_recomputing(precompute):
+    summary, precomputed = get_summary(precompute)
+    assert (summary["summary"], precomputed) == ("summary 1", False)
+    assert precompute.collection.docs["visit-1"]["last_message_id"] == "m2"
+    
+    summary, precomputed = get_summary(precompute)
+    assert (summary["summary"], precomputed) == ("summary 1", True)
+    assert precompute.ai_summary_service.calls == 1
+    assert asyncio.run(precompute.get_status("visit-1"))["status"] == "done"
+
+
+def test_new_message_makes_summary_stale(precompute):
+    get_summary(precompute)
+    precompute.message_service.messages.append({"_id": "m3"})
+    summary, precomputed = get_summary(precompute)
+    assert (summary["summary"], precomputed) == ("summary 2", False)
+    assert precompute.collection.docs["visit-1"]["last_message_id"] == "m3"
+
+
+def test_fallback_summary_is_stored_but_not_served(precompute):
+    precompute.ai_summary_service.fallback = True
+    get_summary(precompute)
+    assert precompute.collection.docs["visit-1"]["fallback"] is True
+    assert asyncio.run(precompute.get_status("visit-1"))["status"] == "failed"
+    
+    precompute.ai_summary_service.fallback = False
+    summary, precomputed = get_summary(precompute)
+    assert (summary["summary"], precomputed) == ("summary 2", False)
+    assert precompute.metrics["fallback"] == 1
+
+
+def test_concurrent_requests_share_one_computation(precompute):
+    async def both():
+        ai_summary = precompute.ai_summary_service
+        ai_summary.started, ai_summary.release = asyncio.Event(), asyncio.Event()
+        first = asyncio.create_task(precompute.get_summary("visit-1"))
+        await ai_summary.started.wait()
+        second = asyncio.create_task(precompute.get_summary("visit-1"))
+        await asyncio.sleep(0)
+        ai_summary.release.set()
+        return await asyncio.gather(first, second)
+    
+    (first, _), (second, _) = asyncio.run(both())
+    assert first is second
+    assert precompute.ai_summary_service.calls == 1
+    assert precompute.single_flight.metrics["coalesced"] == 1
+
+
+def test_failed_status_update_is_logged(precompute, capsys):
+    async def broken_set(key, value, ttl=None):
+        raise ConnectionError("mongo down")
+    
+    async def schedule():
+        precompute.shared_state.set = broken_set
+        precompute.schedule("visit-1")
+        await asyncio.gather(*precompute._status_tasks, return_exceptions=True)
+        await asyncio.sleep(0)
+    
+    asyncio.run(schedule())
+    assert not precompute._status_tasks
+    assert "Failed to update summary job status: mongo down" in capsys.readouterr().out
@@ -0,0 +1,117 @@
+import asyncio
+import time
+
+import orjson
+import pytest
+
+from services import tracing as tracing_module
+from services.profiling import RequestProfiler
+from services.tracing import STATUS_ERROR, Tracer, current_span, record_exception
+
+
+@pytest.fixture
+def tracer(monkeypatch, tmp_path):
+    monkeypatch.setenv("TRACING_ENABLED", "true")
+    monkeypatch.setenv("TRACE_FILE", str(tmp_path / "traces.jsonl"))
+    tracer = Tracer()
+    monkeypatch.setattr(tracing_module, "_tracer", tracer)
+    return tracer
+
+
+def exported(tracer, count=1):
+    """Wait for the writer thread, then read back the exported traces"""
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        try:
+            with open(tracer.path, encoding="utf-8") as file:
+                lines = file.read().splitlines()
+            if len(lines) >= count:
+                return [orjson.loads(line)["resourceSpans"][0]["scopeSpans"][0]["spans"] for line in lines]
+        except FileNotFoundError:
+            pass
+        time.sleep(0.01)
+    raise AssertionError("trace was not written")
+
+
+def test_nested_spans_form_one_trace(tracer):
+    async def request():
+        with tracer.span("POST /api/messages/send", user="doctor"):
+            with tracer.span("translation.translate", chars=12, cached=False):
+                pass
+            # Spans follow the request into the tasks it starts
+            await asyncio.create_task(child())
+    
+    async def child():
+        with tracer.span("db.create_message"):
+            pass
+    
+    asyncio.run(request())
+    spans, = exported(tracer)
+    root = spans[-1]
+    assert [span["name"] for span in spans] == ["translation.translate", "db.create_message", root["name"]]
+    assert "parentSpanId" not in root
+    assert {span["traceId"] for span in spans} == {root["traceId"]}
+    assert all(span["parentSpanId"] == root["spanId"] for span in spans[:-1])
+    assert spans[0]["attributes"] == [
+        {"key": "chars", "value": {"intValue": "12"}},
+        {"key": "cached", "value": {"boolValue": False}}
+    ]
+
+
+def test_exception_is_recorded_once_with_its_stack_trace(tracer):
+    with pytest.raises(ValueError):
+        with tracer.span("request"):
+            with tracer.span("storage.upload"):
+                raise ValueError("bucket missing")
+    
+    inner, root = exported(tracer)[0]
+    assert inner["status"] == {"code": STATUS_ERROR, "message": "ValueError: bucket missing"}
+    assert root["status"]["code"] == STATUS_ERROR
+    assert "events" not in root
+    event = {item["key"]: item["value"]["stringValue"] for item in inner["events"][0]["attributes"]}
+    assert event["exception.type"] == "ValueError"
+    assert "raise ValueError" in event["exception.stacktrace"]
+
+
+def test_fast_traces_are_not_exported(tracer):
+    tracer.slow_ms = 60_000
+    with tracer.span("request"):
+        pass
+    assert tracer.get_metrics()["traces"] == 1
+    assert tracer.get_metrics()["exported"] == 0
+
+
+def test_disabled_tracer_yields_noop_spans(monkeypatch):
+    monkeypatch.setenv("TRACING_ENABLED", "false")
+    tracer = Tracer()
+    with tracer.span("request") as span:
+        span.set_attribute("ignored", 1)
+        assert current_span() is span
+    assert tracer.get_metrics()["traces"] == 0
+
+
+def test_record_exception_prints_without_a_span(capsys):
+    try:
+        raise RuntimeError("translator timeout")
+    except RuntimeError as e:
+        record_exception(e)
+    err = capsys.readouterr().err
+    assert err.startswith("Traceback")
+    assert "RuntimeError: translator timeout" in err
+
+
+def test_profiled_request_is_written(tmp_path, capsys):
+    profiler = RequestProfiler(directory=str(tmp_path))
+    assert profiler.should_profile({"x-profile": "1"})
+    assert not profiler.should_profile({})
+    
+    async def request():
+        async with profiler.profile("POST /api/messages/send"):
+            assert not profiler.should_profile({"x-profile": "1"})
+            sum(range(1000))
+    
+    asyncio.run(request())
+    files = list(tmp_path.iterdir())
+    assert len(files) == 1
+    assert files[0].name.endswith("_POST_api_messages_send" + (".html" if profiler._pyinstrument else ".txt"))
+    assert "🔬 Profiled POST /api/messages/send" in capsys.readouterr().out
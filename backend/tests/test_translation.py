@@ -0,0 +1,92 @@
+import asyncio
+
+import httpx
+import pytest
+
+from services import translation as translation_module
+from services.translation import TranslationService
+
+
+class FakeTranslatorClient:
+    """Stands in for httpx.AsyncClient; 'translates' by upper-casing"""
+    
+    requests = []
+    failing = set()
+    
+    def __init__(self, **kwargs):
+        pass
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, *exc_info):
+        pass
+    
+    async def post(self, url, headers, json):
+        text = json[0]["text"]
+        FakeTranslatorClient.requests.append(text)
+        request = httpx.Request("POST", url)
+        if text in FakeTranslatorClient.failing:
+            return httpx.Response(503, request=request)
+        return httpx.Response(200, json=[{"translations": [{"text": text.upper()}]}], request=request)
+
+
+class DirectScheduler:
+    async def request(self, upstream, send, cost=0, priority=0):
+        return await send()
+
+
+class BrokenSharedState:
+    distributed = True
+    
+    async def get_many(self, keys):
+        raise ConnectionError("mongo down")
+    
+    async def set(self, key, value, ttl=None):
+        raise ConnectionError("mongo down")
+
+
+@pytest.fixture
+def service(monkeypatch):
+    monkeypatch.setenv("AZURE_TRANSLATOR_KEY", "test-key")
+    monkeypatch.setenv("AZURE_TRANSLATOR_ENDPOINT", "https://translator.test")
+    monkeypatch.setenv("TRANSLATION_SEGMENT_MIN_CHARS", "0")
+    monkeypatch.setattr(translation_module.httpx, "AsyncClient", FakeTranslatorClient)
+    monkeypatch.setattr(translation_module, "get_scheduler", lambda: DirectScheduler())
+    FakeTranslatorClient.requests = []
+    FakeTranslatorClient.failing = set()
+    return TranslationService()
+
+
+def test_sentences_are_translated_once_and_cached(service):
+    text = "Take one tablet. Drink water. Take one tablet."
+    assert asyncio.run(service.translate(text, "en", "es")) == "TAKE ONE TABLET. DRINK WATER. TAKE ONE TABLET."
+    assert sorted(FakeTranslatorClient.requests) == ["Drink water.", "Take one tablet."]
+    
+    asyncio.run(service.translate("Drink water.", "en", "es"))
+    assert len(FakeTranslatorClient.requests) == 2
+
+
+def test_failed_segment_is_marked_and_not_cached(service):
+    FakeTranslatorClient.failing = {"Drink water."}
+    translated = asyncio.run(service.translate("Take one tablet. Drink water.", "en", "es"))
+    assert translated == "TAKE ONE TABLET. [Translation error] Drink water."
+    assert ("en", "es", "Drink water.") not in service._cache
+
+
+def test_shared_cache_failures_fall_back_to_translating(service):
+    service.shared_state = BrokenSharedState()
+    assert asyncio.run(service.translate("Take one tablet.", "en", "es")) == "TAKE ONE TABLET."
+    assert FakeTranslatorClient.requests == ["Take one tablet."]
+
+
+def test_identical_concurrent_translations_share_one_request(service):
+    async def both():
+        return await asyncio.gather(
+            service.translate("Take one tablet.", "en", "es"),
+            service.translate("Take one tablet.", "en", "es")
+        )
+    
+    assert asyncio.run(both()) == ["TAKE ONE TABLET.", "TAKE ONE TABLET."]
+    assert FakeTranslatorClient.requests == ["Take one tablet."]
+    assert service.single_flight.metrics["coalesced"] == 1